@@ -1,24 +1,175 @@
+import hashlib
+import threading
+import time
 import traceback
+import os
 import streamlit as st
-from genppt import GenPPT
+import streamlit.components.v1 as components
+from extraction import source_digest
+from genppt import GenPPT, get_model
+from renderers import RENDERERS, render_slides
 from utils import *
 
-max_pages=20
-max_chars=max_pages*2000
-def get_upload_file(uploaded_file,page_range):
-        import fitz  # PyMuPDF
-        import pymupdf4llm 
+# Chunked and outline generation split long documents over several model calls
+max_chunked_pages=500
+# Estimated tokens of the source text in a single call. Longer documents are cut
+# down to the sections most relevant to the agenda, see planner.plan_budget.
+token_budget=12000
+mode_labels = {
+    "single": "Single call",
+    "chunked": f"Long document (chunked, up to {max_chunked_pages} pages)",
+    "outline": f"Long deck (outline, then each slide, up to {max_chunked_pages} pages)",
+}
+format_labels = {
+    "pptx": "PowerPoint (.pptx)",
+    "html": "reveal.js slides (.html)",
+    "marp": "Marp markdown (.md)",
+    "json": "Slide JSON (.json)",
+}
+# Finished generations kept per session, so reruns and downloads reuse their decks
+max_kept_generations=5
+
+@st.cache_data(show_spinner="Extracting PDF...", max_entries=16)
+def extract_pdf(file_hash, page_range, max_pages, _pdf):
+    """
+    Extract the markdown of an uploaded PDF, memoized on the upload hash and page options.
+
+    The PDF bytes are not hashed by Streamlit (leading underscore), file_hash stands in for them.
+    """
+    from extraction import get_extractor
+
+    return get_extractor().extract(_pdf, page_range, max_pages)
+
+def get_upload_file(uploaded_file,page_range,max_pages=max_chunked_pages):
 
         if uploaded_file  is not None:
-            # Open the uploaded file with PyMuPDF
-            
-            document = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-            pages=parse_page_ranges(page_range, document.page_count, max_pages)
-            markdown_content=pymupdf4llm.to_markdown(document, pages=pages)
+            pdf = uploaded_file.getvalue()
+            markdown_content=extract_pdf(hashlib.sha256(pdf).hexdigest(), page_range, max_pages, pdf)
 
             
         return markdown_content
 
+@st.cache_resource(show_spinner=False)
+def load_model(model_name="gemini_flash_l"):
+    """
+    Create the shared model client once per server, instead of on the first generation.
+    """
+    try:
+        return get_model(model_name, None, use_cache=True)
+    except Exception as e:
+        print(f"Warning: Could not load model '{model_name}': {e}")
+        return None
+
+def start_generation(pp, deck=None, manifest=None, figures_pdf=None):
+    """
+    Run a generation in a background thread, so that the UI stays responsive.
+
+    With a deck and its manifest, only the slides affected by changes are regenerated.
+    With the content of the source PDF, its figures are extracted in the thread as well.
+
+    Returns:
+        dict: The generation state, updated by the thread: status, slides so far,
+            the deck bytes and the error, if any.
+    """
+    generation = {"status": "running", "pp": pp, "slides": [], "data": None, "error": None, "started": time.time()}
+
+    def run():
+        try:
+            if figures_pdf is not None:
+                pp.load_figures(figures_pdf)
+            if manifest is not None:
+                generation["data"] = pp.update(deck, manifest)
+            else:
+                generation["data"] = pp.run_streaming(on_slide=generation["slides"].append)
+            # GenPPT reports a failed generation by returning None and keeping the exception
+            if pp.error is not None:
+                generation["error"] = "".join(traceback.format_exception(pp.error))
+        except Exception:
+            generation["error"] = traceback.format_exc()
+        generation["status"] = "done"
+
+    threading.Thread(target=run, daemon=True).start()
+    return generation
+
+def show_slide(container, slide):
+    """
+    Render a preview of a generated slide.
+    """
+    with container:
+        st.markdown(f"#### {slide.get('title_text', '')}")
+        if "subtitle_text" in slide:
+            st.caption(slide["subtitle_text"])
+        for bullet in slide.get("text", []):
+            st.markdown(f"- {bullet}")
+        if slide.get("table"):
+            st.table(slide["table"])
+
+def show_trace(tracer):
+    """
+    Render the per-stage timings and counters of a generation.
+    """
+    summary = tracer.summary()
+    with st.expander("Advanced: performance breakdown"):
+        st.table([
+            {"stage": name, "calls": stage["count"], "total (s)": round(stage["total_s"], 3), "max (s)": round(stage["max_s"], 3)}
+            for name, stage in summary["stages"].items()
+        ])
+        if summary["counters"]:
+            st.json(summary["counters"])
+
+@st.experimental_fragment(run_every=1)
+def show_progress(generation, streaming):
+    """
+    Poll a running generation, rerunning only this fragment until it has finished.
+    """
+    if generation["status"] != "running":
+        st.rerun()
+    slides = list(generation["slides"])
+    st.info(f"Generating slides... {len(slides)} done after {time.time() - generation['started']:.0f}s")
+    if streaming:
+        for slide in slides:
+            show_slide(st.container(), slide)
+
+def get_output(generation, output_format):
+    """
+    Return the deck of a finished generation in an output format, rendered from its slides on first use.
+    """
+    pp = generation["pp"]
+    outputs = generation.setdefault("outputs", {pp.output_format: generation["data"]})
+    if output_format not in outputs:
+        outputs[output_format] = render_slides(pp.slides, output_format)
+    return outputs[output_format]
+
+def show_result(generation):
+    """
+    Render the outcome of a finished generation with a preview and its download button.
+    """
+    pp, data = generation["pp"], generation["data"]
+    show_trace(pp.tracer)
+    if data is None:
+        st.error("Error in generating slides.")
+        if generation["error"]:
+            st.error(generation["error"])
+        return
+    st.success(f"Slides generated successfully! {len(pp.slides)} slides.")
+    if pp.manifest is not None:
+        st.session_state["deck"] = get_output(generation, "pptx")
+        st.session_state["manifest"] = pp.manifest
+
+    # The preview is rendered from the slide model, without building the pptx
+    with st.expander("Preview", expanded=True):
+        components.html(get_output(generation, "html").decode("utf-8"), height=480, scrolling=True)
+
+    # Serve the deck from memory, nothing is written to disk. Clicking reruns
+    # the script, which finds the finished generation in the session state.
+    output_format = st.selectbox("Download format:", list(format_labels), format_func=format_labels.get)
+    st.download_button(
+        label="Download Slides",
+        data=get_output(generation, output_format),
+        file_name=os.path.splitext(pp.file_name)[0] + RENDERERS[output_format].extension,
+        mime=RENDERERS[output_format].mime
+    )
+
 def create_ui():
     st.set_page_config(page_title="GenSlides", page_icon="📊", layout="wide")
     
@@ -42,35 +193,65 @@ def create_ui():
     with col2:
         st.subheader("Advanced Options")
         #max_pages = st.number_input("Maximum number of pages:", min_value=1, max_value=200, value=100)
-        page_range = st.text_input(f"Page range (e.g. 2,3,5-8,9 or leave empty for all) (Max of {max_pages} pages):", "")
+        mode = st.radio("Generation mode:", list(mode_labels), format_func=mode_labels.get,
+                        help="Long documents and long decks need more than one model call.")
+        chunked = mode != "single"
+        budget = st.number_input("Token budget of the source text (0 for no limit):", min_value=0,
+                                 value=0 if chunked else token_budget, step=1000,
+                                 help="Longer documents are cut down to the sections most relevant to the agenda.")
+        streaming = st.checkbox("Show slides as they are generated", value=True)
+        figures = content_type == "PDF" and st.checkbox("Add the figures of the PDF to matching slides", value=False)
+        # Decks generated in outline mode can be patched instead of regenerated, if they are of the same document
+        document_key = source_digest(uploaded_file.getvalue()) if content_type == "PDF" and uploaded_file else None
+        manifest = st.session_state.get("manifest")
+        incremental = mode == "outline" and manifest is not None and manifest.source == document_key and \
+            st.checkbox("Only regenerate the slides affected by my changes", value=True)
+        page_range = st.text_input(f"Page range (e.g. 2,3,5-8,9 or leave empty for all) (Max of {max_chunked_pages} pages):", "",
+                                   help="10- selects page 10 to the end, -5 the last five pages and 1-40:2 every second page.")
+
+    load_model()
+    generations = st.session_state.setdefault("generations", {})
 
     if st.button("Generate Slides", type="primary"):
         try:
-            with st.spinner("Generating slides..."):
-                if content_type == "Text" and content:
-                    pp = GenPPT(text=content[:max_chars], agenda=agenda, pages=page_range)
-                    
-                elif content_type == "PDF" and uploaded_file:
-                    content=get_upload_file(uploaded_file,page_range)
-                    pp = GenPPT(text=content, agenda=agenda, pages=page_range)
+            if content_type == "Text" and content:
+                text = content
+            elif content_type == "PDF" and uploaded_file:
+                text=get_upload_file(uploaded_file,page_range,max_chunked_pages)
+            else:
+                st.error("Please provide either text content or upload a PDF file.")
+                return
+
+            # Identical inputs and options reuse the deck of the session
+            key = hashlib.sha256(repr((text, agenda, page_range, mode, budget, figures, incremental)).encode()).hexdigest()
+            generation = generations.get(key)
+            if generation is None or (generation["status"] == "done" and generation["data"] is None):
+                # Outline decks are kept as pptx to be patched, others are only built for the download
+                pp = GenPPT(text=text, agenda=agenda, pages=page_range, max_pages=max_chunked_pages, mode=mode,
+                            token_budget=budget or None, output_format="pptx" if mode == "outline" else "json",
+                            in_memory=True, document_key=document_key)
+                figures_pdf = uploaded_file.getvalue() if figures else None
+                if incremental:
+                    generation = start_generation(pp, st.session_state["deck"], st.session_state["manifest"], figures_pdf)
                 else:
-                    st.error("Please provide either text content or upload a PDF file.")
-                    return
-
-                filename = pp.run()
-                st.success(f"Slides generated successfully! File: {filename}")
-                
-                # Add a download button for the generated file
-                with open(filename, "rb") as file:
-                    st.download_button(
-                        label="Download Slides",
-                        data=file,
-                        file_name=filename,
-                        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
-                    )
+                    generation = start_generation(pp, figures_pdf=figures_pdf)
+                generations.pop(key, None)
+                generations[key] = generation
+                for old_key in list(generations)[:-max_kept_generations]:
+                    del generations[old_key]
+            st.session_state["current_generation"] = key
+        except PageRangeError as e:
+            st.error(str(e))
         except Exception as e:
             st.error("Error in generating slides.")
             st.error(traceback.format_exc())
 
+    generation = generations.get(st.session_state.get("current_generation"))
+    if generation is not None:
+        if generation["status"] == "running":
+            show_progress(generation, streaming)
+        else:
+            show_result(generation)
+
 if __name__ == "__main__":
     create_ui()
\ No newline at end of file
@@ -0,0 +1,288 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+from cache import default_cache_dir
+from extraction import open_document, source_digest, write_atomic
+from planner import tokenize
+from tracing import Tracer
+from utils import parse_page_ranges
+
+
+class Figure:
+    """
+    A figure extracted from a PDF page.
+
+    Args:
+        page: 0-based index of the page the figure is on.
+        path: Path of the image in the asset cache.
+        width: Width in pixels.
+        height: Height in pixels.
+        text: Text of the page, used to match the figure to a slide.
+    """
+
+    __slots__ = ("page", "path", "width", "height", "text")
+
+    def __init__(self, page: int, path: str, width: int, height: int, text: str = ""):
+        self.page = page
+        self.path = path
+        self.width = width
+        self.height = height
+        self.text = text
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class AssetStore:
+    """
+    Prepare images for slides and extract figures from PDFs, caching both on disk.
+
+    Images are downsampled to the size they are placed at on the slide and
+    re-encoded, as JPEG for photos and as optimized PNG for images with
+    transparency or few colors, which keeps diagrams sharp. Prepared images
+    are stored under a hash of their content and the target size, so identical
+    images give identical files across slides, decks and runs, and python-pptx
+    stores them in a single media part of the deck.
+
+    Args:
+        cache_dir: Folder of the asset cache. Defaults to assets/ in the cache folder.
+        dpi: Pixels per inch of prepared images at their placed size.
+        jpeg_quality: Quality of re-encoded JPEG images.
+        min_figure_pixels: Smaller extracted images, e.g. logos and icons, are skipped.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 dpi: int = 150,
+                 jpeg_quality: int = 80,
+                 min_figure_pixels: int = 150,
+                 ):
+        self.cache_dir = cache_dir or os.path.join(default_cache_dir(), "assets")
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self.min_figure_pixels = min_figure_pixels
+
+    def prepare(self, source: Union[str, bytes], width: Optional[float] = None, height: Optional[float] = None) -> str:
+        """
+        Return the path of a copy of an image sized for its placement on a slide.
+
+        Args:
+            source (Union[str, bytes]): Path or content of the image.
+            width (Optional[float]): Placed width in inches, if fixed.
+            height (Optional[float]): Placed height in inches, if fixed.
+
+        Returns:
+            str: Path of the prepared image, or the source path if it cannot be decoded.
+
+        Raises:
+            FileNotFoundError: If the image file is not found.
+        """
+        if isinstance(source, bytes):
+            data = source
+        else:
+            with open(source, "rb") as f:
+                data = f.read()
+
+        box = (round(width * self.dpi) if width else 0, round(height * self.dpi) if height else 0)
+        digest = hashlib.sha256(data + repr((box, self.jpeg_quality)).encode()).hexdigest()
+        folder = os.path.join(self.cache_dir, "images", digest[:2])
+        for ext in (".jpg", ".png"):
+            path = os.path.join(folder, digest + ext)
+            if os.path.exists(path):
+                return path
+
+        try:
+            prepared, ext = self._encode(data, box)
+        except OSError as e:
+            if isinstance(source, bytes):
+                raise
+            print(f"Warning: Could not process image {source}: {e}")
+            return source
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, digest + ext)
+        write_atomic(path, prepared)
+        return path
+
+    def _encode(self, data: bytes, box: tuple) -> tuple:
+        """
+        Downsample an image into a box of pixels and re-encode it.
+
+        Returns:
+            tuple: The encoded bytes and the file extension.
+        """
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as image:
+            original_format = image.format
+            width, height = image.size
+            scale = min([limit / size for limit, size in zip(box, (width, height)) if limit] or [1.0])
+            resized = scale < 1
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            if resized and original_format == "JPEG":
+                # Let the JPEG decoder scale down by a power of two, at most to the target size
+                image.draft("RGB", size)
+            image.load()
+            transparent = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            # Counted before resampling, which blends the flat colors of diagrams
+            few_colors = image.getcolors(256) is not None
+            if resized:
+                image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+            buffer = io.BytesIO()
+            if transparent or few_colors:
+                if not transparent and image.mode not in ("P", "1", "L"):
+                    image = image.convert("RGB").quantize(256)
+                image.save(buffer, "PNG", optimize=True)
+                ext = ".png"
+            else:
+                image.convert("RGB").save(buffer, "JPEG", quality=self.jpeg_quality, optimize=True,
+                                          progressive=True)
+                ext = ".jpg"
+
+        encoded = buffer.getvalue()
+        # An image that needed no downsampling may already be smaller than its re-encoding
+        if not resized and original_format in ("JPEG", "PNG") and len(data) <= len(encoded):
+            return data, ".jpg" if original_format == "JPEG" else ".png"
+        return encoded, ext
+
+    def extract_figures(self, source: Union[str, bytes], page_range: Optional[str] = None, max_pages: int = 20,
+                        tracer: Optional[Tracer] = None) -> List[Figure]:
+        """
+        Extract the figures of a page range of a PDF.
+
+        Images smaller than min_figure_pixels in either dimension and repeats of
+        an image, e.g. a logo on every page, are skipped. The figures of each
+        page are cached per (SHA-256 of the file, page index), like the markdown
+        of the pages.
+
+        Args:
+            source (Union[str, bytes]): Path or content of the PDF file.
+            page_range (Optional[str]): Page range to extract, e.g. "1-3,5", see utils.parse_page_spec.
+            max_pages (int): Maximum number of pages to extract.
+            tracer (Optional[Tracer]): Tracer to count the extracted figures on.
+
+        Returns:
+            List[Figure]: The figures in page order, with their images in the asset cache.
+
+        Raises:
+            PageRangeError: If the page range is malformed or selects no page of the PDF.
+        """
+        digest = source_digest(source)
+        folder = os.path.join(self.cache_dir, "figures", digest[:2], digest)
+
+        figures = []
+        seen = set()
+        cached = 0
+        with open_document(source) as document:
+            pages = parse_page_ranges(page_range or "", document.page_count, max_pages)
+            for page in pages:
+                index_path = os.path.join(folder, f"{page}.json")
+                if os.path.exists(index_path):
+                    with open(index_path, encoding="utf-8") as f:
+                        records = json.load(f)
+                    cached += 1
+                else:
+                    records = self._extract_page_figures(document, page)
+                    os.makedirs(folder, exist_ok=True)
+                    write_atomic(index_path, json.dumps(records).encode("utf-8"))
+                for record in records:
+                    if record["path"] not in seen and os.path.exists(record["path"]):
+                        seen.add(record["path"])
+                        figures.append(Figure(**record))
+
+        if tracer is not None:
+            tracer.count("figure_pages_cached", cached)
+            tracer.count("figures", len(figures))
+        return figures
+
+    def _extract_page_figures(self, document: Any, page: int) -> List[Dict[str, Any]]:
+        import fitz  # PyMuPDF
+
+        text = document[page].get_text()
+        records = []
+        for xref, smask, width, height, *_ in document[page].get_images(full=True):
+            if min(width, height) < self.min_figure_pixels:
+                continue
+            info = document.extract_image(xref)
+            if not smask and info.get("ext") in ("png", "jpeg", "jpg"):
+                data = info["image"]
+            else:
+                # Other formats (JPX, JBIG2, CMYK) and soft masks go through a pixmap
+                pixmap = fitz.Pixmap(document, xref)
+                if smask:
+                    pixmap = fitz.Pixmap(pixmap, fitz.Pixmap(document, smask))
+                if pixmap.n - pixmap.alpha > 3:
+                    pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+                data = pixmap.tobytes("png")
+            name = hashlib.sha256(data).hexdigest()
+            folder = os.path.join(self.cache_dir, "originals", name[:2])
+            ext = "jpg" if data[:2] == b"\xff\xd8" else "png"
+            path = os.path.join(folder, f"{name}.{ext}")
+            if not os.path.exists(path):
+                os.makedirs(folder, exist_ok=True)
+                write_atomic(path, data)
+            records.append({"page": page, "path": path, "width": width, "height": height, "text": text})
+        return records
+
+
+class FigurePicker:
+    """
+    Match figures to the slides that talk about the pages they are on.
+
+    A slide gets the unused figure whose page shares the most index terms with
+    the title and bullets of the slide, if it shares at least min_shared_terms.
+    Slides with a table or images of their own are left alone.
+
+    Args:
+        figures: The candidate figures.
+        min_shared_terms: Minimum number of distinct shared terms.
+    """
+
+    def __init__(self, figures: List[Figure], min_shared_terms: int = 3):
+        self.figures = figures
+        self.min_shared_terms = min_shared_terms
+        self._terms = [set(tokenize(figure.text)) for figure in figures]
+        self._used = set()
+
+    def pick(self, slide: Dict[str, Any]) -> Optional[Figure]:
+        """
+        Return the figure for a slide and mark it used, or None.
+        """
+        if "table" in slide or slide.get("img_path"):
+            self._used.update(slide.get("img_path") or [])
+            return None
+        text = " ".join([str(slide.get("title_text", ""))] + [str(line) for line in slide.get("text", [])])
+        terms = set(tokenize(text))
+        best = None
+        best_shared = self.min_shared_terms - 1
+        for figure, figure_terms in zip(self.figures, self._terms):
+            if figure.path in self._used:
+                continue
+            shared = len(terms & figure_terms)
+            if shared > best_shared:
+                best, best_shared = figure, shared
+        if best is not None:
+            self._used.add(best.path)
+        return best
+
+
+_default_store: Optional[AssetStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_asset_store() -> AssetStore:
+    """
+    Return the process-wide asset store, creating it on first use.
+
+    Returns:
+        AssetStore: The shared store.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = AssetStore()
+        return _default_store
@@ -0,0 +1,107 @@
+"""
+Benchmark of image handling in rendered decks: embedding image files as they
+are against preparing them with assets.AssetStore (downsampled to the placed
+size, re-encoded and deduplicated by content hash).
+
+A set of synthetic camera-sized photos and flat-color charts is generated and
+every content slide places one of them, so images repeat across slides. For
+each variant the deck size and the best time to render and save it are
+printed as one JSON object per line:
+
+    {"variant": "prepared_warm", "slides": 20, "deck_bytes": ..., "best_s": ..., "repeat": 5}
+
+Usage:
+    python benchmarks/bench_assets.py [--slides 20] [--images 4] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ppt
+from assets import AssetStore
+
+
+def make_images(folder: str, n_images: int):
+    """
+    Write alternating noisy photos and flat-color bar charts, return their paths.
+    """
+    from PIL import Image, ImageDraw
+
+    paths = []
+    for i in range(n_images):
+        if i % 2:
+            image = Image.new("RGB", (2400, 1600), "white")
+            draw = ImageDraw.Draw(image)
+            for bar in range(6):
+                draw.rectangle([200 + bar * 350, 1500 - (bar + i) * 150, 450 + bar * 350, 1500], fill=(0, 112, 192))
+            path = os.path.join(folder, f"chart-{i}.png")
+            image.save(path)
+        else:
+            noise = Image.effect_noise((3000, 2000), 40 + i)
+            gradient = Image.linear_gradient("L").resize((3000, 2000))
+            image = Image.merge("RGB", [noise, gradient, noise.transpose(Image.FLIP_LEFT_RIGHT)])
+            path = os.path.join(folder, f"photo-{i}.jpg")
+            image.save(path, quality=95)
+        paths.append(path)
+    return paths
+
+
+class RawStore:
+    """
+    Stands in for the asset store and embeds the files as they are.
+    """
+
+    @staticmethod
+    def prepare(source, width=None, height=None):
+        return source
+
+
+def render(slides) -> bytes:
+    return ppt.SlideDeck().create_presentation({"title_text": "Assets"}, slides, in_memory=True)
+
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=20)
+    parser.add_argument("--images", type=int, default=4, help="Distinct images, reused across the slides.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = make_images(tmp, args.images)
+        slides = [{"title_text": f"Slide {i}", "text": ["Point"], "img_path": [paths[i % len(paths)]]}
+                  for i in range(args.slides)]
+        variants = [
+            ("raw", lambda: RawStore),
+            # A new cache folder for every run, so each run prepares all images
+            ("prepared_cold", lambda: AssetStore(tempfile.mkdtemp(dir=tmp))),
+            ("prepared_warm", lambda store=AssetStore(os.path.join(tmp, "warm")): store),
+        ]
+        for variant, make_store in variants:
+            def run():
+                store = make_store()
+                ppt.get_asset_store = lambda: store
+                return render(slides)
+
+            deck = run()
+            print(json.dumps({"variant": variant, "slides": args.slides, "images": args.images,
+                              "deck_bytes": len(deck), "best_s": round(best_time(run, args.repeat), 6),
+                              "repeat": args.repeat}))
+
+
+if __name__ == "__main__":
+    main()
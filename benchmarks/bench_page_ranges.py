@@ -0,0 +1,100 @@
+"""
+Benchmark of page range parsing: the legacy parse_page_ranges, which expanded
+every range into a list and deduplicated it with a linear scan, against the
+interval engine in utils.parse_page_ranges.
+
+For each case and document size the number of selected pages and the best time
+per parse are printed as one JSON object per line:
+
+    {"case": "full_range", "pages": 10000, "items": 1, "selected": 20, "legacy_selected": 20, "best_s": ..., "legacy_best_s": ...}
+
+The legacy parser is quadratic in the pages it expands the ranges into, so it
+is only timed on cases of up to --legacy-limit expanded pages. This script
+only times the parsers, the engine is checked against a brute-force reference
+in tests/test_utils.py.
+
+Usage:
+    python benchmarks/bench_page_ranges.py [--max-pages 20] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import parse_page_ranges
+
+
+def legacy_parse_page_ranges(page_string: str, num_pages: int, max_pages: int):
+    """
+    The parser replaced by the interval engine, kept here for comparison.
+    """
+    try:
+        result = []
+        for page_range in page_string.replace(' ', '').split(','):
+            if '-' in page_range:
+                start, end = map(int, page_range.split('-'))
+                if start > end:
+                    raise ValueError(f"Invalid range: {page_range}")
+                pages = list(range(max(0, start), end + 1))
+            else:
+                pages = [int(page_range)]
+            for page in pages:
+                if page not in result and page >= 0 and page <= num_pages:
+                    result.append(page - 1)
+        return sorted(result[:max_pages]) if result else list(range(0, min(max_pages, num_pages)))
+    except (TypeError, ValueError):
+        return list(range(0, min(num_pages, max_pages)))
+
+
+def build_cases(num_pages: int):
+    """
+    Return (case, page range string, pages the legacy parser expands) tuples for
+    a document size. The last is None for syntax the legacy parser does not support.
+    """
+    return [
+        ("full_range", f"1-{num_pages}", num_pages),
+        ("every_other_page", ",".join(str(page) for page in range(1, num_pages + 1, 2)), num_pages // 2),
+        ("overlapping_ranges", ",".join(f"{page}-{page + 50}" for page in range(1, num_pages, 10)),
+         51 * len(range(1, num_pages, 10))),
+        ("past_the_end", f"1-{num_pages * 10}", num_pages * 10),
+        ("open_ended", f"{num_pages // 2}-", None),
+        ("last_pages", "-50", None),
+        ("stepped", f"1-{num_pages}:3", None),
+    ]
+
+
+def best_time(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--legacy-limit", type=int, default=10000,
+                        help="Most pages the legacy parser may expand a case into to be timed on it.")
+    args = parser.parse_args()
+
+    for num_pages in (100, 1000, 5000, 100000):
+        for case, spec, expanded in build_cases(num_pages):
+            timed_legacy = expanded is not None and expanded <= args.legacy_limit
+            print(json.dumps({
+                "case": case, "pages": num_pages, "items": spec.count(",") + 1,
+                "selected": len(parse_page_ranges(spec, num_pages, args.max_pages)),
+                "legacy_selected": len(legacy_parse_page_ranges(spec, num_pages, args.max_pages)) if timed_legacy else None,
+                "best_s": round(best_time(lambda: parse_page_ranges(spec, num_pages, args.max_pages), args.repeat), 7),
+                "legacy_best_s": round(best_time(lambda: legacy_parse_page_ranges(spec, num_pages, args.max_pages),
+                                                 args.repeat), 7) if timed_legacy else None,
+            }))
+
+
+if __name__ == "__main__":
+    main()
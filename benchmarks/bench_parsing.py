@@ -0,0 +1,63 @@
+"""
+Benchmark of parsing model output on a corpus of well-formed and malformed responses.
+
+The corpus is fake_llm.make_malformed_responses, deterministic slide lists with
+the defects seen in real model output. For each case the legacy parser (strip
+the fences, then json.loads) and parsing.extract_slides are compared on the
+number of slides recovered and the time per parse, printed as one JSON object
+per line:
+
+    {"case": "trailing_commas", "slides": 50, "expected": 50, "legacy_slides": 0, "best_s": ..., "legacy_best_s": ...}
+
+This script only times the parsers, the slides recovered from each case are
+checked in tests/test_parsing.py.
+
+Usage:
+    python benchmarks/bench_parsing.py [--slides 50] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm import make_malformed_responses
+from parsing import extract_slides
+
+
+def legacy_parse(text: str):
+    try:
+        return json.loads(text.strip("```").replace("json", "").strip())
+    except json.JSONDecodeError:
+        return []
+
+
+def best_time(fn, text: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slides", type=int, default=50, help="Content slides per response.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for case, text, expected in make_malformed_responses(args.slides):
+        slides, repairs = extract_slides(text)
+        print(json.dumps({
+            "case": case, "chars": len(text), "slides": len(slides), "expected": expected,
+            "legacy_slides": len(legacy_parse(text)), "repairs": len(repairs),
+            "best_s": round(best_time(extract_slides, text, args.repeat), 6),
+            "legacy_best_s": round(best_time(legacy_parse, text, args.repeat), 6),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Offline benchmark of the GenSlides pipeline, stage by stage.
+
+A deterministic fake model is registered in genppt.MODELS, so no network access
+or API key is needed. Every stage is timed separately over inputs of increasing
+size and each measurement is printed as one JSON object per line:
+
+    {"stage": "render", "size": 100, "unit": "slides", "best_s": ..., "median_s": ..., "repeat": 5, ...}
+
+Usage:
+    python benchmarks/bench_pipeline.py [--quick] [--repeat 5] [--output results.jsonl]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import MarkdownExtractor
+from fake_llm import register_fake_model
+from genppt import GenPPT, render_presentation
+from renderers import RENDERERS
+from planner import plan_budget
+from preprocess import preprocess_markdown
+from utils import parse_page_ranges
+
+PAGE_SIZES = (10, 50, 200)
+SLIDE_SIZES = (10, 50, 100, 500)
+TABLE_SHAPE = (30, 8)
+
+
+def make_pdf(path: str, n_pages: int) -> None:
+    """
+    Write a synthetic report with headings, paragraphs and a running footer.
+    """
+    import fitz  # PyMuPDF
+
+    document = fitz.open()
+    for i in range(n_pages):
+        page = document.new_page()
+        text = f"Section {i + 1}: Operating Review\n\n"
+        text += " ".join(f"Revenue grew by {j}.{i % 10}% in segment {j} during the quarter." for j in range(25))
+        page.insert_textbox(fitz.Rect(72, 72, 540, 720), text, fontsize=10)
+        page.insert_text((72, 770), f"Annual Report 2023 - page {i + 1}", fontsize=8)
+    document.save(path)
+    document.close()
+
+
+def measure(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def record(out, stage: str, size: int, unit: str, repeat: int, fn, **params) -> None:
+    best, median = measure(fn, repeat)
+    out.write(json.dumps({"stage": stage, "size": size, "unit": unit, "best_s": round(best, 6),
+                          "median_s": round(median, 6), "repeat": repeat, **params}) + "\n")
+    out.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Only run the smallest sizes.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency of the fake model in seconds.")
+    parser.add_argument("--output", help="Append results to this file instead of printing them.")
+    args = parser.parse_args()
+
+    page_sizes = PAGE_SIZES[:1] if args.quick else PAGE_SIZES
+    slide_sizes = SLIDE_SIZES[:2] if args.quick else SLIDE_SIZES
+    out = open(args.output, "a") if args.output else sys.stdout
+    register_fake_model("bench", latency=args.latency)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_pages in page_sizes:
+            pdf_path = os.path.join(tmp, f"report-{n_pages}.pdf")
+            make_pdf(pdf_path, n_pages)
+
+            record(out, "parse_page_ranges", n_pages, "pages", args.repeat,
+                   lambda: parse_page_ranges(f"1-{n_pages}", n_pages, n_pages))
+
+            cold_dirs = iter(tempfile.mkdtemp(dir=tmp) for _ in range(args.repeat))
+            record(out, "extract_cold", n_pages, "pages", args.repeat,
+                   lambda: MarkdownExtractor(next(cold_dirs)).extract(pdf_path, "", n_pages))
+            warm = MarkdownExtractor(os.path.join(tmp, "warm"))
+            text = warm.extract(pdf_path, "", n_pages)
+            record(out, "extract_warm", n_pages, "pages", args.repeat,
+                   lambda: warm.extract(pdf_path, "", n_pages))
+            _, report = preprocess_markdown(text)
+            record(out, "preprocess", n_pages, "pages", args.repeat, lambda: preprocess_markdown(text),
+                   tokens_before=report.tokens_before, tokens_saved=report.tokens_saved)
+            record(out, "plan_budget", n_pages, "pages", args.repeat,
+                   lambda: plan_budget(text, "Revenue growth by segment", 2000), budget=2000)
+
+            pp = GenPPT(text=text, agenda="Financial performance", model_name="bench", use_cache=False)
+            record(out, "build_prompt", n_pages, "pages", args.repeat,
+                   lambda: pp.build_prompt(pp.text), chars=len(text))
+
+        for n_slides in slide_sizes:
+            for table_rows, table_cols in ((0, 0), TABLE_SHAPE):
+                register_fake_model("bench", latency=args.latency, n_slides=n_slides,
+                                    table_rows=table_rows, table_cols=table_cols)
+                pp = GenPPT(text="Synthetic content", model_name="bench", use_cache=False, in_memory=True)
+                response = pp.llm.execute(pp.build_prompt(pp.text))
+                params = {"table": f"{table_rows}x{table_cols}" if table_rows else None,
+                          "response_chars": len(response.content)}
+
+                record(out, "parse_json", n_slides, "slides", args.repeat,
+                       lambda: pp.parse_slides(response), **params)
+                slides = pp.parse_slides(response)
+                for output_format in RENDERERS:
+                    record(out, "render", n_slides, "slides", args.repeat,
+                           lambda: render_presentation(slides, True, output_format), format=output_format,
+                           **params)
+                record(out, "end_to_end", n_slides, "slides", args.repeat,
+                       lambda: GenPPT(text="Synthetic content", model_name="bench", use_cache=False,
+                                      in_memory=True).run(), latency=args.latency, **params)
+
+            register_fake_model("bench", latency=args.latency, n_slides=n_slides)
+            record(out, "end_to_end_outline", n_slides, "slides", args.repeat,
+                   lambda: GenPPT(text=text, model_name="bench", use_cache=False, in_memory=True,
+                                  mode="outline", max_workers=8).run(), latency=args.latency)
+
+    if args.output:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Micro-benchmark of SlideDeck rendering: the original per-cell python-pptx
+implementation against the template-cached, bulk XML implementation.
+
+Usage:
+    python benchmarks/bench_render.py [--rows 40] [--cols 8] [--slides 20] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pptx import Presentation
+from pptx.util import Inches, Pt
+from pptx.enum.text import PP_ALIGN
+from pptx.dml.color import RGBColor
+
+from ppt import SlideDeck
+
+
+class LegacySlideDeck(SlideDeck):
+    """
+    SlideDeck as it was before template caching and bulk table writes.
+    """
+
+    def __init__(self, output_folder: str = "generated"):
+        self.prs = Presentation()
+        self.output_folder = output_folder
+
+    def add_slide(self, slide_data):
+        prs = self.prs
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        shapes = slide.shapes
+        shapes.title.text = slide_data.get("title_text", "")
+        if "text" in slide_data:
+            tf = shapes.placeholders[1].text_frame
+            for bullet in slide_data.get("text", []):
+                p = tf.add_paragraph()
+                p.text = bullet
+                p.level = 0
+        if "table" in slide_data:
+            self.add_table(slide, slide_data["table"])
+
+    def add_table(self, slide, table_data):
+        max_cols = max(len(row) for row in table_data)
+        rows = len(table_data)
+        table = slide.shapes.add_table(rows, max_cols, Inches(0.5), Inches(1.5), Inches(9), Inches(5.5)).table
+
+        first_col_width = 3.5
+        remaining_width = 9 - first_col_width
+        other_col_width = remaining_width / (max_cols - 1) if max_cols > 1 else remaining_width
+        table.columns[0].width = Inches(first_col_width)
+        for i in range(1, max_cols):
+            table.columns[i].width = Inches(other_col_width)
+
+        for i, row in enumerate(table_data):
+            if len(row) < max_cols:
+                row = [" ", *row]
+            for j, cell in enumerate(row):
+                table.cell(i, j).text = str(cell)
+                paragraph = table.cell(i, j).text_frame.paragraphs[0]
+                paragraph.font.size = Pt(10)
+                paragraph.alignment = PP_ALIGN.CENTER if j > 0 or i == 0 else PP_ALIGN.LEFT
+
+        for cell in table.rows[0].cells:
+            cell.fill.solid()
+            cell.fill.fore_color.rgb = RGBColor(0, 112, 192)
+            cell.text_frame.paragraphs[0].font.color.rgb = RGBColor(255, 255, 255)
+            cell.text_frame.paragraphs[0].font.bold = True
+
+        for i in range(1, rows):
+            cell = table.cell(i, 0)
+            cell.fill.solid()
+            cell.fill.fore_color.rgb = RGBColor(230, 230, 230)
+            cell.text_frame.paragraphs[0].font.bold = True
+
+
+def make_slides(n_slides, rows, cols):
+    table = [[" "] + [f"FY{2000 + j}" for j in range(cols - 1)]]
+    table += [[f"Line item {i}"] + [f"{i * j:,}.{j}" for j in range(cols - 1)] for i in range(1, rows)]
+    slides = []
+    for i in range(n_slides):
+        slides.append({"id": i + 2, "title_text": f"Financials {i}", "table": [list(r) for r in table]})
+        slides.append({"id": i + 2, "title_text": f"Summary {i}", "text": [f"Point {k} of slide {i}" for k in range(5)]})
+    return slides
+
+
+def render(deck_class, slides):
+    deck = deck_class()
+    deck.add_title_slide({"title_text": "Benchmark", "subtitle_text": "Rendering"})
+    for slide in slides:
+        deck.add_slide(slide)
+    return deck
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--cols", type=int, default=8)
+    parser.add_argument("--slides", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    slides = make_slides(args.slides, args.rows, args.cols)
+    results = {"rows": args.rows, "cols": args.cols, "table_slides": args.slides}
+    for name, deck_class in (("before", LegacySlideDeck), ("after", SlideDeck)):
+        results[f"{name}_new_deck_ms"] = best_of(args.repeat, deck_class) * 1000
+        results[f"{name}_render_ms"] = best_of(args.repeat, lambda: render(deck_class, slides)) * 1000
+    results["render_speedup"] = results["before_render_ms"] / results["after_render_ms"]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "genslides")
+
+
+def default_cache_dir() -> str:
+    """
+    Return the root folder for on-disk caches.
+
+    The folder can be overridden with the GENSLIDES_CACHE_DIR environment variable.
+
+    Returns:
+        str: Path of the cache folder.
+    """
+    return os.getenv("GENSLIDES_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+class ResponseCache:
+    """
+    A persistent, content-addressed cache for LLM responses backed by sqlite.
+
+    Entries expire after ttl seconds and the least recently used entries are
+    evicted once the stored responses exceed max_bytes.
+
+    Args:
+        path: Path of the sqlite database. Defaults to responses.sqlite in the cache folder.
+        max_bytes: Maximum total size of the stored responses. Defaults to 256 MB.
+        ttl: Time to live of an entry in seconds. Defaults to 7 days.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 ttl: float = 7 * 24 * 3600,
+                 ):
+        self.path = path or os.path.join(default_cache_dir(), "responses.sqlite")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from a content hash of the given parts.
+
+        Args:
+            *parts: JSON serializable parts identifying a request.
+
+        Returns:
+            str: The SHA-256 hex digest of the parts.
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a response.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached response, or None on a miss or an expired entry.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if now - created > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response and evict old entries if the cache is over its size limit.
+
+        Args:
+            key (str): The cache key.
+            value (str): The response text.
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """
+        Drop expired entries, then the least recently used ones until under max_bytes.
+        """
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """
+    Return the process-wide response cache, creating it on first use.
+
+    Returns:
+        ResponseCache: The shared cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,206 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Union
+
+from cache import default_cache_dir
+from tracing import Tracer
+from utils import parse_page_ranges
+
+
+def open_document(source: Union[str, bytes]):
+    """
+    Open a PDF with PyMuPDF.
+
+    Args:
+        source (Union[str, bytes]): Path or content of the PDF file.
+
+    Returns:
+        fitz.Document: The document, to be used as a context manager.
+    """
+    import fitz  # PyMuPDF
+
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def source_digest(source: Union[str, bytes]) -> str:
+    """
+    Return the SHA-256 of a PDF, the key of its cached pages and figures.
+
+    Files are hashed in blocks, so large PDFs are never read into memory at once.
+
+    Args:
+        source (Union[str, bytes]): Path or content of the PDF file.
+
+    Returns:
+        str: The hex digest.
+    """
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    sha = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Write a cache file through a temporary file, so that concurrent readers never see a partial file.
+
+    Args:
+        path (str): Path of the file.
+        data (bytes): The content.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the process pool of page extraction shared by all extractors, creating it on first use.
+
+    Its workers are spawned rather than forked, since extraction is started from
+    the threads of the app and the server, and forking a multithreaded process
+    can deadlock.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool, with a worker per CPU.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def _extract_page_group(source: Union[str, bytes], pages: List[int]) -> List[str]:
+    """
+    Extract the markdown of each page separately. Runs in a worker process.
+    """
+    import pymupdf4llm
+
+    with open_document(source) as document:
+        return [pymupdf4llm.to_markdown(document, pages=[page]) for page in pages]
+
+
+class MarkdownExtractor:
+    """
+    Extract markdown from PDFs, caching the markdown of each page on disk.
+
+    Pages are cached per (SHA-256 of the file, page index), so overlapping page
+    ranges of the same file reuse earlier work. Pages that are not cached yet
+    are extracted in parallel in the process pool shared by all extractors, see
+    get_process_pool.
+
+    Args:
+        cache_dir: Folder of the page cache. Defaults to markdown/ in the cache folder.
+        max_workers: Maximum number of worker processes per extraction. Defaults to the CPU count.
+        min_parallel_pages: Minimum number of uncached pages to use the process pool for.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 max_workers: Optional[int] = None,
+                 min_parallel_pages: int = 4,
+                 ):
+        self.cache_dir = cache_dir or os.path.join(default_cache_dir(), "markdown")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_parallel_pages = min_parallel_pages
+
+    def extract(self, source: Union[str, bytes], page_range: Optional[str] = None, max_pages: int = 20,
+                tracer: Optional[Tracer] = None) -> str:
+        """
+        Extract the markdown of a page range of a PDF.
+
+        Args:
+            source (Union[str, bytes]): Path or content of the PDF file.
+            page_range (Optional[str]): Page range to extract, e.g. "1-3,5", see utils.parse_page_spec.
+            max_pages (int): Maximum number of pages to extract.
+            tracer (Optional[Tracer]): Tracer to count cached and extracted pages on.
+
+        Returns:
+            str: Extracted markdown text.
+
+        Raises:
+            PageRangeError: If the page range is malformed or selects no page of the PDF.
+        """
+        with open_document(source) as document:
+            pages = parse_page_ranges(page_range or "", document.page_count, max_pages)
+        return "".join(self.extract_pages(source, pages, tracer))
+
+    def extract_pages(self, source: Union[str, bytes], pages: List[int], tracer: Optional[Tracer] = None) -> List[str]:
+        """
+        Extract the markdown of the given pages of a PDF.
+
+        Args:
+            source (Union[str, bytes]): Path or content of the PDF file.
+            pages (List[int]): 0-based page indices.
+            tracer (Optional[Tracer]): Tracer to count cached and extracted pages on.
+
+        Returns:
+            List[str]: The markdown of each page, in the order of pages.
+        """
+        digest = source_digest(source)
+        folder = os.path.join(self.cache_dir, digest[:2], digest)
+        markdown = {}
+        missing = []
+        for page in dict.fromkeys(pages):
+            path = os.path.join(folder, f"{page}.md")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    markdown[page] = f.read()
+            else:
+                missing.append(page)
+
+        if tracer is not None:
+            tracer.count("pages_cached", len(markdown))
+            tracer.count("pages_extracted", len(missing))
+
+        if missing:
+            os.makedirs(folder, exist_ok=True)
+            for page, text in zip(missing, self._extract_missing(source, missing)):
+                markdown[page] = text
+                write_atomic(os.path.join(folder, f"{page}.md"), text.encode("utf-8"))
+
+        return [markdown[page] for page in pages]
+
+    def _extract_missing(self, source: Union[str, bytes], pages: List[int]) -> List[str]:
+        workers = min(self.max_workers, len(pages))
+        if workers <= 1 or len(pages) < self.min_parallel_pages:
+            return _extract_page_group(source, pages)
+
+        # Contiguous groups, one per worker, so each worker opens the file once
+        size = -(-len(pages) // workers)
+        groups = [pages[i:i + size] for i in range(0, len(pages), size)]
+        results = get_process_pool().map(_extract_page_group, [source] * len(groups), groups)
+        return [text for group in results for text in group]
+
+
+_default_extractor: Optional[MarkdownExtractor] = None
+_default_extractor_lock = threading.Lock()
+
+
+def get_extractor() -> MarkdownExtractor:
+    """
+    Return the process-wide markdown extractor, creating it on first use.
+
+    Returns:
+        MarkdownExtractor: The shared extractor.
+    """
+    global _default_extractor
+    with _default_extractor_lock:
+        if _default_extractor is None:
+            _default_extractor = MarkdownExtractor()
+        return _default_extractor
@@ -0,0 +1,202 @@
+import functools
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from gemini import BaseModel, ModelResponse
+from resilience import TransientModelError
+from tokens import TokenUsage, estimate_tokens
+
+
+def make_slides(n_slides: int = 10, table_rows: int = 0, table_cols: int = 0) -> List[Dict[str, Any]]:
+    """
+    Build a deterministic slide list in the format the prompt asks the model for.
+
+    Args:
+        n_slides (int): Number of content slides after the title slide.
+        table_rows (int): Rows of the table on every other slide, 0 for bullet slides only.
+        table_cols (int): Columns of those tables.
+
+    Returns:
+        List[Dict[str, Any]]: Slide data dictionaries, title slide first.
+    """
+    slides = [{"id": 1, "title_text": "Synthetic Presentation", "subtitle_text": "Generated offline", "is_title_slide": "yes"}]
+    for i in range(n_slides):
+        slide = {"id": i + 2, "title_text": f"Slide {i + 1} Title"}
+        if table_rows and table_cols and i % 2:
+            slide["table"] = [[" "] + [f"FY{2000 + j}" for j in range(table_cols - 1)]]
+            slide["table"] += [[f"Line item {r}"] + [f"{r * (j + 1):,}.{j}" for j in range(table_cols - 1)]
+                               for r in range(1, table_rows)]
+        else:
+            slide["text"] = [f"Key point {k + 1} of slide {i + 1}" for k in range(5)]
+        slides.append(slide)
+    return slides
+
+
+def make_malformed_responses(n_slides: int = 50) -> List[Tuple[str, str, int]]:
+    """
+    Build model responses with the defects seen in real model output.
+
+    Covers markdown fences and chatter, single quotes, unquoted and half-quoted
+    keys, missing and trailing commas and responses cut off by the output token limit.
+
+    Args:
+        n_slides (int): Number of content slides per response.
+
+    Returns:
+        List[Tuple[str, str, int]]: (case, response, slides recoverable from it) tuples.
+    """
+    slides = make_slides(n_slides, table_rows=6, table_cols=4)
+    total = len(slides)
+    clean = json.dumps(slides, indent=1)
+    compact = json.dumps(slides)
+    # Cut inside the last slide, so it is dropped and the others are kept
+    last = compact.rfind('{"id"')
+    return [
+        ("clean", clean, total),
+        ("fenced", f"```json\n{clean}\n```", total),
+        ("chatter", f"Sure! Here is the presentation:\n```json\n{clean}\n```\nLet me know if you need changes.", total),
+        ("chatter_brackets", f"Sure [see below]:\n```json\n{clean}\n```", total),
+        ("chatter_object", f'Note {{"ok": true}}\n{compact}', total),
+        ("json_in_text", compact.replace("Key point", "json key point"), total),
+        ("trailing_commas", re.sub(r"(\]|\}|\")(\s*[\]\}])", r"\1,\2", compact), total),
+        ("missing_commas", compact.replace("}, {", "}\n{"), total),
+        ("single_quotes", compact.replace('"', "'"), total),
+        ("unquoted_keys", re.sub(r'"(\w+)":', r"\1:", compact), total),
+        ("half_quoted_keys", compact.replace('"title_text"', 'title_text"'), total),
+        ("python_literals", compact.replace('"yes"', "True"), total),
+        ("truncated", compact[:last + 40], total - 1),
+        ("truncated_fenced", "```json\n" + clean[:clean.rfind('"id"') + 60], total - 1),
+    ]
+
+
+class FakeBackendError(TransientModelError):
+    """
+    An injected backend failure, retryable like a 503 from the real backend.
+    """
+
+
+class FakeModel(BaseModel):
+    """
+    A deterministic, offline stand-in for the Gemini models.
+
+    It returns canned slide JSON after a configurable latency and goes through
+    the same cache, token accounting, streaming and resilience code as the real
+    models. Slow calls and failures can be injected to exercise retries, hedging
+    and the circuit breaker; the injected faults are reproducible for a given seed.
+    Outline and single slide prompts of the "outline" mode get an outline of
+    n_slides slides and one slide object, unless a canned response is given.
+
+    Args:
+        API_KEY: Only selects the limiter, accepted for compatibility with the MODELS registry.
+        use_cache: Whether to use the response cache. Defaults to False.
+        latency: Seconds to wait before responding. Defaults to 0.
+        response: Canned response text. Defaults to the JSON of make_slides.
+        n_slides: Number of content slides of the default response.
+        table_rows: Table rows of the default response.
+        table_cols: Table columns of the default response.
+        chunk_size: Characters per chunk when streaming.
+        tail_latency: Latency of slow calls in seconds.
+        tail_rate: Fraction of calls that are slow.
+        failure_rate: Fraction of calls that fail with FakeBackendError.
+        fail_first: Number of initial calls that fail with FakeBackendError.
+        seed: Seed of the fault injection.
+    """
+
+    def __init__(self,
+                 API_KEY=None,
+                 use_cache: bool = False,
+                 latency: float = 0.0,
+                 response: Optional[str] = None,
+                 n_slides: int = 10,
+                 table_rows: int = 0,
+                 table_cols: int = 0,
+                 chunk_size: int = 64,
+                 tail_latency: float = 0.0,
+                 tail_rate: float = 0.0,
+                 failure_rate: float = 0.0,
+                 fail_first: int = 0,
+                 seed: int = 0,
+                 **kwargs,
+                 ):
+        kwargs.setdefault("api_key", API_KEY or "fake")
+        self.canned = response is not None
+        self.response = response if response is not None else \
+            "```json\n" + json.dumps(make_slides(n_slides, table_rows, table_cols), indent=1) + "\n```"
+        # Everything that shapes the responses, so differently configured fakes never share cached responses
+        params = {"latency": latency, "response": hashlib.sha256(self.response.encode()).hexdigest(),
+                  "canned": self.canned, "n_slides": n_slides}
+        super().__init__("fake", params, use_cache=use_cache, **kwargs)
+        self.latency = latency
+        self.n_slides = n_slides
+        self.chunk_size = chunk_size
+        self.tail_latency = tail_latency
+        self.tail_rate = tail_rate
+        self.failure_rate = failure_rate
+        self.fail_first = fail_first
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _backend_call(self) -> None:
+        """
+        Count the call, sleep for its latency and raise an injected failure, if any.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            slow = self._random.random() < self.tail_rate
+            failed = call <= self.fail_first or self._random.random() < self.failure_rate
+        latency = self.tail_latency if slow else self.latency
+        if latency:
+            time.sleep(latency)
+        if failed:
+            raise FakeBackendError(f"Injected failure of call {call}")
+
+    def respond(self, prompt: str) -> str:
+        """
+        Return the response text for a prompt.
+        """
+        if self.canned:
+            return self.response
+        if "\nExcerpt: " in prompt:
+            title = prompt.split('slide "', 1)[1].split('" of a powerpoint', 1)[0]
+            excerpt = prompt.split("\nExcerpt: ", 1)[1]
+            return json.dumps({"title_text": title, "text": [f"Key point {k + 1}: {excerpt[:40]}" for k in range(5)]})
+        if "[Section " in prompt:
+            n_sections = prompt.count("[Section ")
+            outline = make_slides(self.n_slides)
+            for i, slide in enumerate(outline[1:]):
+                del slide["text"]
+                slide["sections"] = [i * n_sections // self.n_slides + 1]
+            return json.dumps(outline)
+        return self.response
+
+    def generate(self, prompt: str) -> ModelResponse:
+        self._backend_call()
+        response = self.respond(prompt)
+        return ModelResponse(response, TokenUsage(estimate_tokens(prompt), estimate_tokens(response)))
+
+    def generate_stream(self, prompt: str):
+        self._backend_call()
+        response = self.respond(prompt)
+        for start in range(0, len(response), self.chunk_size):
+            yield response[start:start + self.chunk_size]
+        return TokenUsage(estimate_tokens(prompt), estimate_tokens(response))
+
+
+def register_fake_model(name: str = "fake", **options: Any) -> None:
+    """
+    Register a FakeModel in genppt.MODELS so that GenPPT(model_name=name) uses it.
+
+    Args:
+        name (str): The model name to register.
+        **options: Keyword arguments for FakeModel, e.g. latency or n_slides.
+    """
+    from genppt import MODELS
+
+    MODELS[name] = functools.partial(FakeModel, **options)
@@ -1,21 +1,308 @@
-import google.generativeai as genai
+import asyncio
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, Dict, Any, Generator, List
 
-from langchain_google_genai import ChatGoogleGenerativeAI
+from cache import ResponseCache, get_default_cache
+from resilience import ResilientCaller, TransientModelError, classify_error
+from tokens import TokenUsage, UsageMetrics
 
-generation_config=genai.types.GenerationConfig(
+# A plain dict, genai accepts it as a GenerationConfig. The genai and langchain
+# clients take seconds to import, so they are imported when a model is created.
+generation_config = {
         # Only one candidate for now.
-        #candidate_count=1,
-        #stop_sequences=['x'],
-        max_output_tokens=4096,
-        temperature=0.1
-)
-class GeminiModel:
+        #"candidate_count": 1,
+        #"stop_sequences": ['x'],
+        "max_output_tokens": 4096,
+        "temperature": 0.1,
+}
+
+# The google.generativeai client is configured process-wide, so GeminiModel
+# instances can only use one API key, the first one configured
+_genai_api_key: Optional[str] = None
+_genai_configured = False
+_genai_lock = threading.Lock()
+
+
+class KeyLimiter:
+    """
+    Limits the concurrent requests and the request rate of one API key.
+
+    Requests over the concurrency limit wait for a free slot, and requests are
+    spaced to stay under the rate limit, so bursts queue up locally instead of
+    being rejected by the backend with 429 errors.
+
+    Args:
+        max_concurrency: Maximum number of requests in flight.
+        requests_per_minute: Maximum request rate. None for no rate limit.
+    """
+
+    def __init__(self, max_concurrency: int = 8, requests_per_minute: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Reserve the next start time allowed by the rate limit and return the wait until then.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+            return start - now
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc):
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(0.01)
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
+
+
+_limiters: Dict[str, KeyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(api_key: Optional[str] = None) -> KeyLimiter:
+    """
+    Return the limiter shared by all models using an API key.
+
+    The limits are read from the GENSLIDES_MAX_CONCURRENCY and
+    GENSLIDES_REQUESTS_PER_MINUTE environment variables when the limiter is created.
+
+    Args:
+        api_key (Optional[str]): The API key. Defaults to GOOGLE_API_KEY.
+
+    Returns:
+        KeyLimiter: The limiter of the key.
+    """
+    key = api_key or os.getenv("GOOGLE_API_KEY") or ""
+    with _limiters_lock:
+        if key not in _limiters:
+            requests_per_minute = os.getenv("GENSLIDES_REQUESTS_PER_MINUTE")
+            _limiters[key] = KeyLimiter(int(os.getenv("GENSLIDES_MAX_CONCURRENCY", "8")),
+                                        float(requests_per_minute) if requests_per_minute else None)
+        return _limiters[key]
+
+
+class ModelResponse:
+    """
+    The text of a model response.
+
+    Args:
+        content: The generated text.
+        usage: Token counts of the generation, if known.
+        cached: Whether the response was served from the response cache.
+        attempts: Number of backend calls it took, including retries.
+    """
+
+    def __init__(self, content: str, usage: Optional[TokenUsage] = None, cached: bool = False, attempts: int = 1):
+        self.content = content
+        self.usage = usage
+        self.cached = cached
+        self.attempts = attempts
+
+
+class BaseModel:
+    """
+    Base class for the text generation models.
+
+    Responses are looked up in and stored to a persistent response cache keyed on
+    the model name, the generation parameters and the prompt, so repeated
+    generations of unchanged content cost no tokens.
+
+    Token counts are taken from the usage metadata of the response when the backend
+    reports it and estimated locally otherwise. The counts of the last call are in
+    last_usage, running totals in metrics.
+
+    Models are meant to be shared across requests (see genppt.get_model), so calls
+    to the backend go through the limiter of the API key.
+
+    Backend calls go through a ResilientCaller, which retries transient errors,
+    enforces a deadline per attempt and fails fast while the backend is down.
+    Failures are raised as typed errors from the resilience module.
+
+    Args:
+        model_name: The name of the model to be used.
+        params: The generation parameters of the model.
+        cache: The response cache. Defaults to the process-wide cache.
+        use_cache: Whether to use the response cache at all. Defaults to True.
+        limiter: Concurrency and rate limiter. Defaults to the limiter of the API key.
+        api_key: The API key, used to pick the default limiter.
+        resilience: Retry, deadline, hedging and circuit breaker policies.
+            Defaults to 3 attempts with a 120 second deadline and no hedging.
+    """
+
+    # Input tokens accepted in one prompt, 1M for the Gemini 1.5 models
+    context_tokens = 1_048_576
+
+    def __init__(self,
+                 model_name: str,
+                 params: Dict[str, Any],
+                 cache: Optional[ResponseCache] = None,
+                 use_cache: bool = True,
+                 limiter: Optional[KeyLimiter] = None,
+                 api_key: Optional[str] = None,
+                 resilience: Optional[ResilientCaller] = None,
+                 ):
+        self.model_name = model_name
+        self.params = params
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        self.limiter = limiter or get_limiter(api_key)
+        self.resilience = resilience or ResilientCaller()
+        self.metrics = UsageMetrics()
+        self.last_usage: Optional[TokenUsage] = None
+
+    def cache_key(self, prompt: str) -> str:
+        return ResponseCache.make_key(type(self).__name__, self.model_name, self.params, prompt)
+
+    def execute(self, prompt: str) -> ModelResponse:
+
+        key = self.cache_key(prompt)
+        response = self._from_cache(key)
+        if response is not None:
+            return response
+
+        response, response.attempts = self.resilience.call(self.generate, prompt, limiter=self.limiter)
+        return self._store(key, prompt, response)
+
+    async def aexecute(self, prompt: str) -> ModelResponse:
+
+        key = self.cache_key(prompt)
+        response = self._from_cache(key)
+        if response is not None:
+            return response
+
+        response, response.attempts = await self.resilience.acall(self.agenerate, prompt, limiter=self.limiter)
+        return self._store(key, prompt, response)
+
+    def stream(self, prompt: str) -> Generator[str, None, ModelResponse]:
+        """
+        Generate text for a prompt, yielding chunks of the response as they arrive.
+
+        A cached response is yielded as a single chunk. Transient errors before the
+        first chunk are retried like other calls. Later errors are not, since chunks
+        may already have been consumed. Every attempt goes through the circuit breaker
+        and holds a slot of the key limiter.
+
+        Args:
+            prompt (str): The prompt.
+
+        Yields:
+            str: Chunks of the generated text.
+
+        Returns:
+            ModelResponse: The complete response, as the value of StopIteration.
+        """
+        key = self.cache_key(prompt)
+        response = self._from_cache(key)
+        if response is not None:
+            yield response.content
+            return response
+
+        retry = self.resilience.retry
+        attempt = 0
+        while True:
+            attempt += 1
+            chunks: List[str] = []
+            try:
+                usage = yield from self._stream_attempt(prompt, chunks)
+            except TransientModelError:
+                if chunks or attempt >= retry.max_attempts:
+                    raise
+                time.sleep(retry.delay(attempt))
+                continue
+            return self._store(key, prompt, ModelResponse("".join(chunks), usage))
+
+    def _stream_attempt(self, prompt: str, chunks: List[str]) -> Generator[str, None, Optional[TokenUsage]]:
+        """
+        Stream one attempt, appending its chunks to chunks, and return the token usage.
+        """
+        breaker = self.resilience.breaker
+        breaker.before_call()
+        error = None
+        try:
+            with self.limiter:
+                stream = self.generate_stream(prompt)
+                while True:
+                    try:
+                        chunk = next(stream)
+                    except StopIteration as stop:
+                        return stop.value
+                    except Exception as e:
+                        error = classify_error(e)
+                        raise error from e
+                    chunks.append(chunk)
+                    yield chunk
+        finally:
+            # Also runs when the consumer abandons the stream, so a half-open circuit never stays blocked
+            breaker.record(error)
+
+    def _from_cache(self, key: str) -> Optional[ModelResponse]:
+        if self.cache is None:
+            return None
+        content = self.cache.get(key)
+        if content is None:
+            return None
+        return self._record(ModelResponse(content, TokenUsage(source="cache"), cached=True))
+
+    def _store(self, key: str, prompt: str, response: ModelResponse) -> ModelResponse:
+        if response.usage is None:
+            response.usage = TokenUsage.estimate(prompt, response.content)
+        if self.cache is not None:
+            self.cache.set(key, response.content)
+        return self._record(response)
+
+    def _record(self, response: ModelResponse) -> ModelResponse:
+        self.last_usage = response.usage
+        self.metrics.record(response.usage)
+        return response
+
+    def generate(self, prompt: str) -> ModelResponse:
+        raise NotImplementedError
+
+    async def agenerate(self, prompt: str) -> ModelResponse:
+        return await asyncio.to_thread(self.generate, prompt)
+
+    def generate_stream(self, prompt: str) -> Generator[str, None, Optional[TokenUsage]]:
+        """
+        Yield chunks of the generated text and return the token usage, if known.
+
+        Backends without streaming support yield the whole response at once.
+        """
+        response = self.generate(prompt)
+        yield response.content
+        return response.usage
+
+
+class GeminiModel(BaseModel):
     """
     This class is used to interact with the Google LLM models for text generation.
 
+    The google.generativeai client is configured process-wide, so all instances
+    must use the same API key. LangchainGemini has a client per instance and
+    supports several keys.
+
     Args:
         model: The name of the model to be used. Defaults to 'gemini-pro'.
         max_output_tokens: The maximum number of tokens to generate. Defaults to 1024.
@@ -26,29 +313,64 @@ class GeminiModel:
 
     def __init__(self,
                  model_name: Optional[str] = 'gemini-1.5-flash',
+                 API_KEY=None,
+                 cache: Optional[ResponseCache] = None,
+                 use_cache: bool = True,
+                 resilience: Optional[ResilientCaller] = None,
                  ):
-        
-        
+
+        import google.generativeai as genai
+
         load_dotenv()
-        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        super().__init__(model_name,
+                         dict(generation_config),
+                         cache=cache,
+                         use_cache=use_cache,
+                         api_key=API_KEY,
+                         resilience=resilience)
+        global _genai_api_key, _genai_configured
+        api_key = API_KEY or os.getenv("GOOGLE_API_KEY")
+        with _genai_lock:
+            if _genai_configured and api_key != _genai_api_key:
+                # Reconfiguring would move the calls of every existing instance to the new key
+                raise ValueError("GeminiModel is already configured with another API key, "
+                                 "use LangchainGemini for several keys.")
+            genai.configure(api_key=api_key)
+            _genai_api_key, _genai_configured = api_key, True
         self.model = genai.GenerativeModel(model_name) # type: ignore
-        
 
-    def execute(self, prompt: str) -> str:
-        
-        try:
-            prompt_tokens = self.model.count_tokens(prompt).total_tokens
-            print(f"Input tokens: {prompt_tokens}")
-            response = self.model.generate_content(prompt, generation_config=generation_config)
-            output_tokens = self.model.count_tokens(response.text).total_tokens
-            print(f"Output tokens: {output_tokens}")
-
-            return response.text,{'prompt_tokens':prompt_tokens,"total_tokens":output_tokens}
-        except Exception as e:
-            return f"An error occurred: {e}"
-        
-
-class LangchainGemini:
+
+    def generate(self, prompt: str) -> ModelResponse:
+
+        response = self.model.generate_content(prompt, generation_config=generation_config,
+                                              request_options={"timeout": self.resilience.timeout})
+        return ModelResponse(response.text, self.usage_from_response(response))
+
+    async def agenerate(self, prompt: str) -> ModelResponse:
+
+        response = await self.model.generate_content_async(prompt, generation_config=generation_config,
+                                                          request_options={"timeout": self.resilience.timeout})
+        return ModelResponse(response.text, self.usage_from_response(response))
+
+    def generate_stream(self, prompt: str) -> Generator[str, None, Optional[TokenUsage]]:
+
+        response = self.model.generate_content(prompt, generation_config=generation_config, stream=True,
+                                               request_options={"timeout": self.resilience.timeout})
+        for chunk in response:
+            yield chunk.text
+        return self.usage_from_response(response)
+
+    @staticmethod
+    def usage_from_response(response: Any) -> Optional[TokenUsage]:
+        metadata = getattr(response, "usage_metadata", None)
+        if not metadata or not metadata.total_token_count:
+            return None
+        return TokenUsage(metadata.prompt_token_count,
+                          metadata.candidates_token_count,
+                          metadata.total_token_count)
+
+
+class LangchainGemini(BaseModel):
     """
     This class is used to interact with the Google LLM models using Langchain for text generation.
 
@@ -62,21 +384,54 @@ class LangchainGemini:
 
     def __init__(self,
                  model_name: Optional[str] = 'gemini-1.5-flash',
-                 API_KEY=None
+                 API_KEY=None,
+                 cache: Optional[ResponseCache] = None,
+                 use_cache: bool = True,
+                 resilience: Optional[ResilientCaller] = None,
                  ):
-    
+
+        super().__init__(model_name,
+                         {"temperature": 0.5, "max_tokens": 4096},
+                         cache=cache,
+                         use_cache=use_cache,
+                         api_key=API_KEY,
+                         resilience=resilience)
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         #load_dotenv()
         self.model= ChatGoogleGenerativeAI(model=model_name,
-                                            temperature=0.5,
-                                            max_tokens=4096,
-                                            timeout=None,
-                                            max_retries=2,
+                                            **self.params,
+                                            timeout=self.resilience.timeout,
+                                            # A single attempt, retries are handled by the ResilientCaller
+                                            max_retries=1,
                                             google_api_key=API_KEY)
-        
-    def execute(self, prompt: str) -> str:
-        
-        try:
-            response = self.model.invoke(prompt)
-            return response
-        except Exception as e:
-            return f"An error occurred: {e}"
\ No newline at end of file
+
+    def generate(self, prompt: str) -> ModelResponse:
+
+        response = self.model.invoke(prompt)
+        return ModelResponse(response.content, self.usage_from_message(response))
+
+    async def agenerate(self, prompt: str) -> ModelResponse:
+
+        response = await self.model.ainvoke(prompt)
+        return ModelResponse(response.content, self.usage_from_message(response))
+
+    def generate_stream(self, prompt: str) -> Generator[str, None, Optional[TokenUsage]]:
+
+        message = None
+        for chunk in self.model.stream(prompt):
+            message = chunk if message is None else message + chunk
+            yield chunk.content
+        return self.usage_from_message(message)
+
+    @staticmethod
+    def usage_from_message(message: Any) -> Optional[TokenUsage]:
+        metadata = getattr(message, "usage_metadata", None)
+        if metadata:
+            return TokenUsage(metadata["input_tokens"], metadata["output_tokens"], metadata["total_tokens"])
+        metadata = getattr(message, "response_metadata", {}).get("usage_metadata")
+        if metadata:
+            return TokenUsage(metadata.get("prompt_token_count", 0),
+                              metadata.get("candidates_token_count", 0),
+                              metadata.get("total_token_count"))
+        return None
@@ -1,11 +1,23 @@
-import json
+import asyncio
 import os
-from typing import Optional, List, Dict, Any
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple, Union
 
 from ppt import SlideDeck
-from gemini import GeminiModel, LangchainGemini
-from prompts import get_ppt_prompt
-from utils import parse_page_ranges
+from assets import FigurePicker, get_asset_store
+from manifest import SlideManifest, diff_slides, manifest_path, slide_hash
+from gemini import GeminiModel, LangchainGemini, ModelResponse
+from prompts import get_ppt_prompt, get_chunk_prompt, get_outline_prompt, get_slide_prompt
+from extraction import MarkdownExtractor, get_extractor, source_digest
+from parsing import JsonArrayStream, extract_slides, validate_slides
+from planner import plan_budget
+from preprocess import preprocess_markdown
+from renderers import RENDERERS, get_renderer
+from slides import Deck
+from tracing import Span, Tracer, get_tracer
+from utils import chunk_markdown, split_sections
 
 # Define available models
 MODELS: Dict[str, Any] = {
@@ -13,6 +25,106 @@ MODELS: Dict[str, Any] = {
     "gemini_flash": GeminiModel
 }
 
+# Generation modes: "single" sends the whole text in one prompt, "chunked"
+# summarizes chunks of the text concurrently and merges the partial decks,
+# "outline" plans the slides in one call and writes each slide in its own call.
+MODES = ("single", "chunked", "outline")
+
+# Tokens of a single call prompt kept free for the instructions and the agenda
+PROMPT_OVERHEAD_TOKENS = 4096
+
+# Minimum characters of each section shown to the model when planning an outline
+OUTLINE_PREVIEW_CHARS = 300
+
+# Share of the sections of a deck's text that must be unchanged for update() to keep its outline
+MIN_OUTLINE_OVERLAP = 0.2
+
+_model_pool: Dict[Any, Any] = {}
+_model_pool_lock = threading.Lock()
+
+
+def get_model(model_name: str, api_key: Optional[str] = None, **params: Any) -> Any:
+    """
+    Return a shared model instance for a model name, API key and parameters.
+
+    Model clients are created once per process and reused across generations, so
+    their connections stay open and requests of all users of a key share its
+    concurrency and rate limits.
+
+    Args:
+        model_name (str): Name of the model in MODELS.
+        api_key (Optional[str]): API key for the language model.
+        **params: Further keyword arguments for the model class, e.g. use_cache.
+
+    Returns:
+        Any: The model instance.
+
+    Raises:
+        KeyError: If the model name is not in MODELS.
+    """
+    model_class = MODELS[model_name]
+    key = (model_name, model_class, api_key, tuple(sorted(params.items())))
+    with _model_pool_lock:
+        if key not in _model_pool:
+            _model_pool[key] = model_class(API_KEY=api_key, **params)
+        return _model_pool[key]
+
+
+def extract_markdown(source: str, pages: Optional[str] = None, max_pages: int = 20, max_workers: Optional[int] = None,
+                     tracer: Optional[Tracer] = None) -> str:
+    """
+    Extract markdown content from a PDF file.
+
+    This is a module-level function so that it can run in a process pool.
+
+    Args:
+        source (str): Path to the source PDF file.
+        pages (Optional[str]): Page range to extract, e.g. "1-3,5".
+        max_pages (int): Maximum number of pages to extract.
+        max_workers (Optional[int]): Maximum number of extraction processes.
+            Defaults to the setting of the shared extractor.
+        tracer (Optional[Tracer]): Tracer to count cached and extracted pages on.
+
+    Returns:
+        str: Extracted markdown text.
+
+    Raises:
+        ImportError: If pymupdf4llm is not installed.
+        FileNotFoundError: If the source PDF file is not found.
+    """
+    try:
+        import pymupdf4llm
+    except ImportError:
+        raise ImportError("pymupdf4llm is required for PDF extraction. Please install it.")
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Source PDF file not found: {source}")
+
+    extractor = get_extractor()
+    if max_workers is not None:
+        extractor = MarkdownExtractor(extractor.cache_dir, max_workers)
+    return extractor.extract(source, pages, max_pages, tracer=tracer)
+
+
+def render_presentation(content: List[Dict[str, Any]], in_memory: bool = False, output_format: str = "pptx") -> Any:
+    """
+    Render slide content into a presentation.
+
+    This is a module-level function so that it can run in a process pool.
+
+    Args:
+        content (List[Dict[str, Any]]): List of slide data dictionaries, title slide first.
+        in_memory (bool): Return the content instead of saving it to a file.
+        output_format (str): Output format, one of renderers.RENDERERS.
+
+    Returns:
+        Any: The content if in_memory, else the file path of the saved presentation.
+    """
+    renderer = get_renderer(output_format)
+    deck = Deck.from_dicts(content)
+    return renderer.render(deck) if in_memory else renderer.save(deck)
+
+
 class GenPPT:
     """
     A class to generate PowerPoint presentations from text or PDF sources using AI models.
@@ -27,6 +139,17 @@ class GenPPT:
         llm_api_key: Optional[str] = None,
         pages: Optional[str] = None,
         max_pages: int = 20,
+        mode: str = "single",
+        chunk_chars: int = 40000,
+        max_workers: int = 4,
+        use_cache: bool = True,
+        preprocess: bool = True,
+        token_budget: Optional[int] = None,
+        figures: bool = False,
+        output_format: str = "pptx",
+        in_memory: bool = False,
+        tracer: Optional[Tracer] = None,
+        document_key: Optional[str] = None,
     ):
         """
         Initialize the GenPPT object.
@@ -39,41 +162,288 @@ class GenPPT:
             llm_api_key (Optional[str]): API key for the language model.
             pages (Optional[str]): Page range to extract from PDF.
             max_pages (int): Maximum number of pages to process.
+            mode (str): Generation mode, one of MODES.
+            chunk_chars (int): Maximum characters per chunk in chunked mode, and of the
+                outline prompt and each slide excerpt in outline mode.
+            max_workers (int): Maximum concurrent model calls in chunked and outline mode.
+            use_cache (bool): Whether to reuse cached model responses.
+            preprocess (bool): Whether to remove boilerplate such as running headers,
+                page numbers and duplicate paragraphs from the text before prompting.
+            token_budget (Optional[int]): Maximum estimated tokens of the source text. Longer
+                texts are cut down to the sections most relevant to the agenda, see
+                planner.plan_budget. In single mode the text is always kept within the
+                context window of the model.
+            figures (bool): Whether to extract the figures of the source PDF and place each
+                on the slide that best matches the text of its page.
+            output_format (str): Output format, one of renderers.RENDERERS. Only pptx
+                decks can be updated.
+            in_memory (bool): Return the content as bytes instead of saving it
+                to the generated/ folder.
+            tracer (Optional[Tracer]): Tracer for the stage timings and counters of this
+                generation. Defaults to a new tracer feeding the process-wide one.
+            document_key (Optional[str]): Key of the source document recorded in the manifest,
+                e.g. extraction.source_digest of a PDF whose text is given. Defaults to the
+                digest of source. Only decks of the same source are updated incrementally.
         """
         self.source: Optional[str] = source.strip() or None
+        self.document_key: Optional[str] = document_key
         self.text: Optional[str] = text.strip() or None
         self.agenda: str = agenda.strip() or "Generic"
 
         self.max_pages: int = max_pages
         self.pages=pages
 
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Expected one of {MODES}.")
+        self.mode: str = mode
+        self.chunk_chars: int = chunk_chars
+        self.max_workers: int = max_workers
+        self.preprocess: bool = preprocess
+        self.token_budget: Optional[int] = token_budget
+        self.figures: bool = figures
+        # Matches extracted figures to slides, set once the figures are extracted
+        self.figure_picker: Optional[FigurePicker] = None
+        if output_format not in RENDERERS:
+            raise ValueError(f"Unknown output format '{output_format}'. Expected one of {tuple(RENDERERS)}.")
+        self.output_format: str = output_format
+        self.in_memory: bool = in_memory
+        # File name of the generated presentation, set once the title slide is known
+        self.file_name: Optional[str] = None
+        # Slide data of the presentation, title slide first, set once it is rendered
+        self.slides: Optional[List[Dict[str, Any]]] = None
+        # How each slide was generated, set after a generation in outline mode
+        self.manifest: Optional[SlideManifest] = None
+        # The exception of the last run or update, if it failed
+        self.error: Optional[Exception] = None
+        self.tracer: Tracer = tracer or Tracer(parent=get_tracer())
+
         self.model_name: str = model_name.strip()
         try:
-            self.llm = MODELS[self.model_name](API_KEY=llm_api_key)
+            self.llm = get_model(self.model_name, llm_api_key, use_cache=use_cache)
         except KeyError:
             print(f"Warning: Model '{self.model_name}' not found. Using default model.")
-            self.llm = MODELS["gemini_flash_l"](API_KEY=llm_api_key)
+            self.llm = get_model("gemini_flash_l", llm_api_key, use_cache=use_cache)
 
     def run(self) -> Optional[Any]:
         """
         Run the presentation generation process.
 
         Returns:
-            Optional[Any]: Generated presentation or None if an error occurs.
+            Optional[Any]: Generated presentation or None if an error occurs, which is kept in self.error.
+        """
+        self.error = None
+        try:
+            self.prepare_text()
+
+            slides = self.place_figures(self.generate_slides())
+            with self.tracer.span("render", slides=len(slides)):
+                return self.generate_presentation(slides)
+        except Exception as e:
+            print(f"An error occurred during presentation generation: {e}")
+            self.error = e
+            return None
+
+    def run_streaming(self, on_slide: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Any]:
+        """
+        Run the presentation generation process, rendering slides as they are generated.
+
+        Args:
+            on_slide (Optional[Callable]): Called with each slide data dictionary as soon
+                as it is parsed from the model output, title slide first.
+
+        Returns:
+            Optional[Any]: Generated presentation or None if an error occurs, which is kept in self.error.
         """
+        self.error = None
         try:
-            if self.text is None:
-                if self.source is not None:
-                    self.text = self.extract_markdown_from_pdf()
+            self.prepare_text()
+
+            # Other formats are rendered in one go from the finished slides, see generate_presentation
+            if self.output_format != "pptx":
+                slides = []
+                for slide in self.stream_slides():
+                    if slides:
+                        self.place_figure(slide)
+                    slides.append(slide)
+                    if on_slide is not None:
+                        on_slide(slide)
+                if not slides:
+                    raise ValueError("Invalid model response: no slides generated")
+                if self.manifest is not None:
+                    self.manifest.rehash()
+                with self.tracer.span("render", slides=len(slides)):
+                    return self.generate_presentation(slides)
+
+            # Rendering is interleaved with the model stream, so its time is summed up here
+            render_span = Span("render")
+            start = time.perf_counter()
+            deck = SlideDeck()
+            render_span.duration += time.perf_counter() - start
+            slides = []
+            for slide in self.stream_slides():
+                start = time.perf_counter()
+                if not slides:
+                    deck.add_title_slide(slide)
                 else:
-                    raise ValueError("Both source and text cannot be None.")
+                    self.place_figure(slide)
+                    deck.add_slide(slide)
+                render_span.duration += time.perf_counter() - start
+                slides.append(slide)
+                if on_slide is not None:
+                    on_slide(slide)
+
+            if not slides:
+                raise ValueError("Invalid model response: no slides generated")
+            title_slide_data = slides[0]
+            render_span.attrs["slides"] = len(deck.prs.slides)
+            if self.manifest is not None:
+                self.manifest.rehash()
+            self.tracer.record(render_span)
+            self.slides = slides
+            self.file_name = SlideDeck.file_name(title_slide_data)
+            with self.tracer.span("save", in_memory=self.in_memory):
+                return deck.to_bytes() if self.in_memory else self._save_manifest(deck.save(title_slide_data))
+        except Exception as e:
+            print(f"An error occurred during presentation generation: {e}")
+            self.error = e
+            return None
+
+    async def arun(self, executor: Optional[Executor] = None, semaphore: Optional[asyncio.Semaphore] = None) -> Optional[Any]:
+        """
+        Run the presentation generation process asynchronously.
+
+        PDF extraction and rendering are CPU-bound and run in the given executor,
+        model calls are awaited on the event loop.
+
+        Args:
+            executor (Optional[Executor]): Executor for extraction and rendering,
+                e.g. a ProcessPoolExecutor. Defaults to the loop's default executor.
+            semaphore (Optional[asyncio.Semaphore]): Bounds concurrent model calls.
+
+        Returns:
+            Optional[Any]: Generated presentation or None if an error occurs, which is kept in self.error.
+        """
+        loop = asyncio.get_running_loop()
+        self.error = None
+        try:
+            if self.text is None and self.source is not None:
+                # Already running in a worker, so extract the pages serially there
+                with self.tracer.span("extract", source=self.source):
+                    self.text = await loop.run_in_executor(
+                        executor, extract_markdown, self.source, self.pages, self.max_pages, 1)
+            # The rest of prepare_text runs in a thread, so the loop keeps serving other decks
+            await loop.run_in_executor(None, self.prepare_text)
 
-            slides = self.generate_slides()
-            return self.generate_presentation(slides)
+            slides = self.place_figures(await self.agenerate_slides(semaphore))
+            self.slides = slides
+            self.file_name = get_renderer(self.output_format).file_name(Deck.from_dicts(slides))
+            with self.tracer.span("render", slides=len(slides)):
+                result = await loop.run_in_executor(
+                    executor, render_presentation, slides, self.in_memory, self.output_format)
+                return result if self.in_memory else self._save_manifest(result)
         except Exception as e:
             print(f"An error occurred during presentation generation: {e}")
+            self.error = e
             return None
 
+    def prepare_text(self) -> str:
+        """
+        Extract the text from the source PDF if no text was given, preprocess it and
+        cut it down to the token budget.
+
+        Returns:
+            str: The text to generate slides from.
+
+        Raises:
+            ValueError: If neither a source nor a text was given.
+        """
+        if self.text is None:
+            if self.source is not None:
+                self.text = self.extract_markdown_from_pdf()
+            else:
+                raise ValueError("Both source and text cannot be None.")
+        if self.figures and self.source is not None:
+            self.load_figures()
+        self.preprocess_text()
+        return self.select_text()
+
+    def preprocess_text(self) -> str:
+        """
+        Remove boilerplate from the text, see preprocess.preprocess_markdown.
+
+        The removed items and the estimated prompt tokens saved are recorded on
+        the preprocess span, and the savings in the tokens_saved counter.
+
+        Returns:
+            str: The preprocessed text.
+        """
+        if self.preprocess and self.text:
+            with self.tracer.span("preprocess") as span:
+                text, report = preprocess_markdown(self.text)
+                span.attrs.update(report.as_dict())
+            self.tracer.count("tokens_saved", report.tokens_saved)
+            # Keep the text if everything was boilerplate, so the model still gets an input
+            self.text = text or self.text
+        return self.text
+
+    def select_text(self) -> str:
+        """
+        Cut the text down to the token budget, keeping the sections most relevant to the agenda.
+
+        The plan is recorded on the plan span, the tokens left out in the
+        tokens_dropped counter.
+
+        Returns:
+            str: The selected text.
+        """
+        budget = self.token_budget
+        if self.mode == "single":
+            limit = self.llm.context_tokens - PROMPT_OVERHEAD_TOKENS
+            budget = min(budget, limit) if budget else limit
+        if budget and self.text:
+            with self.tracer.span("plan") as span:
+                self.text, plan = plan_budget(self.text, self.agenda, budget)
+                span.attrs.update(plan.as_dict())
+            if plan.tokens_dropped:
+                self.tracer.count("tokens_dropped", plan.tokens_dropped)
+        return self.text
+
+    def load_figures(self, pdf: Union[str, bytes, None] = None) -> None:
+        """
+        Extract the figures of a PDF for placing them on slides.
+
+        Args:
+            pdf (Union[str, bytes, None]): Path or content of the PDF. Defaults to the source PDF.
+        """
+        with self.tracer.span("figures") as span:
+            figures = get_asset_store().extract_figures(pdf or self.source, self.pages, self.max_pages,
+                                                        tracer=self.tracer)
+            span.attrs["figures"] = len(figures)
+        self.figure_picker = FigurePicker(figures)
+
+    def place_figure(self, slide: Dict[str, Any]) -> None:
+        """
+        Add the extracted figure that best matches a content slide to its images, if any.
+        """
+        figure = self.figure_picker.pick(slide) if self.figure_picker is not None else None
+        if figure is not None:
+            slide["img_path"] = [figure.path]
+            self.tracer.count("figures_placed")
+
+    def place_figures(self, slides: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Place the extracted figures on the content slides of a deck, in deck order.
+
+        Returns:
+            List[Dict[str, Any]]: The slides, changed in place.
+        """
+        if self.figure_picker is not None:
+            for slide in slides[1:]:
+                self.place_figure(slide)
+            if self.manifest is not None:
+                self.manifest.rehash()
+        return slides
+
     def extract_markdown_from_pdf(self) -> str:
         """
         Extract markdown content from the source PDF.
@@ -85,16 +455,8 @@ class GenPPT:
             ImportError: If pymupdf4llm is not installed.
             FileNotFoundError: If the source PDF file is not found.
         """
-        try:
-            import pymupdf4llm
-        except ImportError:
-            raise ImportError("pymupdf4llm is required for PDF extraction. Please install it.")
-
-        if not os.path.exists(self.source):
-            raise FileNotFoundError(f"Source PDF file not found: {self.source}")
-
-        print(f"Extracting {len(self.pages)} pages")
-        return pymupdf4llm.to_markdown(self.source, pages=self.pages)
+        with self.tracer.span("extract", source=self.source):
+            return extract_markdown(self.source, self.pages, self.max_pages, tracer=self.tracer)
 
     def generate_slides(self) -> List[Dict[str, Any]]:
         """
@@ -106,13 +468,556 @@ class GenPPT:
         Raises:
             ValueError: If the model response is invalid.
         """
-        prompt = f"{get_ppt_prompt()}\nAgenda: {self.agenda}\nContent: {self.text}"
-        resp = self.llm.execute(prompt)
+        if self.mode == "chunked":
+            return self.generate_slides_chunked()
+        if self.mode == "outline":
+            return list(self.iter_slides_outline())
+
+        return self.parse_slides(self.execute(self.build_prompt(self.text)))
+
+    def generate_slides_chunked(self) -> List[Dict[str, Any]]:
+        """
+        Generate slide content for long texts by summarizing chunks concurrently.
+
+        The text is split at heading and page boundaries into chunks of at most
+        chunk_chars characters, each chunk is turned into a partial slide list
+        by its own model call, and the partial lists are merged into one deck.
+
+        Returns:
+            List[Dict[str, Any]]: List of slide data dictionaries.
+
+        Raises:
+            ValueError: If any model response is invalid.
+        """
+        chunks = chunk_markdown(self.text, self.chunk_chars)
+        if len(chunks) <= 1:
+            return self.parse_slides(self.execute(self.build_prompt(self.text)))
+
+        prompts = [self.build_prompt(chunk, part, len(chunks)) for part, chunk in enumerate(chunks, 1)]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(prompts))) as executor:
+            responses = list(executor.map(self.execute, prompts))
+
+        return self.merge_slides([self.parse_slides(resp) for resp in responses])
+
+    def iter_slides_outline(self) -> Iterator[Dict[str, Any]]:
+        """
+        Generate slide content in two phases, an outline and then each slide.
+
+        The first model call sees a preview of every section and returns the
+        slide titles with the numbers of the sections each slide covers. The
+        content of each slide is then generated concurrently from only the
+        sections it references. No call has to fit the whole deck into its
+        output tokens, and the time per deck stays close to that of a
+        single slide as long as max_workers calls can run at once.
+
+        Yields:
+            Dict[str, Any]: Slide data dictionaries in deck order, title slide first.
+
+        Raises:
+            ValueError: If any model response is invalid.
+        """
+        sections = split_sections(self.text)
+        title_slide, planned = self.plan_outline(sections)
+        yield from self.expand_outline(sections, title_slide, planned)
+
+    def plan_outline(self, sections: List[str]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Generate the outline of a deck.
+
+        Args:
+            sections (List[str]): The sections of the text.
+
+        Returns:
+            Tuple[Dict[str, Any], List[Dict[str, Any]]]: The title slide and the outlined content slides.
+
+        Raises:
+            ValueError: If the model response is invalid.
+        """
+        return self.parse_outline(self.execute(self.build_outline_prompt(sections)))
+
+    def parse_outline(self, resp: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Parse the response to an outline prompt into the title slide and the outlined content slides.
+
+        Raises:
+            ValueError: If the model response is invalid.
+        """
+        title_slide, *planned = self.parse_slides(resp)
+        title_slide.pop("sections", None)
+        title_slide["id"] = 1
+        return title_slide, planned
+
+    def expand_outline(self, sections: List[str], title_slide: Dict[str, Any], planned: List[Dict[str, Any]],
+                       previous: Optional[SlideManifest] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generate the content of outlined slides concurrently and record them in self.manifest.
+
+        Args:
+            sections (List[str]): The sections of the text.
+            title_slide (Dict[str, Any]): The title slide.
+            planned (List[Dict[str, Any]]): The outlined content slides.
+            previous (Optional[SlideManifest]): Manifest of an earlier generation. Slides
+                with the same title and excerpt are taken from it instead of generated.
+
+        Yields:
+            Dict[str, Any]: Slide data dictionaries in deck order, title slide first.
+
+        Raises:
+            ValueError: If any model response is invalid.
+        """
+        jobs = self._outline_jobs(sections, planned, previous)
+        prompts = self._outline_prompts(jobs)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(prompts)))) as executor:
+            # map yields in deck order, so each slide is yielded as soon as it and its predecessors are done
+            yield from self._collect_outline(sections, title_slide, jobs, executor.map(self.execute, prompts))
+
+    def _outline_prompts(self, jobs: List[Tuple[Dict[str, Any], List[int], str, Optional[Dict[str, Any]]]]) -> List[str]:
+        """
+        Return the slide prompts of the outline jobs without a reusable slide, in deck order.
+        """
+        prompts = [self.build_slide_prompt(plan["title_text"], excerpt) for plan, _, excerpt, slide in jobs if slide is None]
+        self.tracer.count("slides_reused", len(jobs) - len(prompts))
+        return prompts
+
+    def _collect_outline(self, sections: List[str], title_slide: Dict[str, Any],
+                         jobs: List[Tuple[Dict[str, Any], List[int], str, Optional[Dict[str, Any]]]],
+                         responses: Iterator[Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the slides of the outline jobs from the responses to their prompts and record them in self.manifest.
+        """
+        manifest = SlideManifest(self.agenda, sections, title_slide, self.get_document_key())
+        yield title_slide
+        for slide_id, (plan, numbers, excerpt, slide) in enumerate(jobs, 2):
+            slide = dict(slide, id=slide_id) if slide is not None else self.expand_slide(plan, next(responses), slide_id)
+            manifest.add(numbers, excerpt, slide)
+            yield slide
+        self.manifest = manifest
+
+    def _outline_jobs(self, sections: List[str], planned: List[Dict[str, Any]],
+                      previous: Optional[SlideManifest] = None) -> List[Tuple[Dict[str, Any], List[int], str, Optional[Dict[str, Any]]]]:
+        """
+        Return the plan, section numbers, excerpt and reusable slide, if any, of every outlined slide.
+        """
+        jobs = []
+        for index, plan in enumerate(planned):
+            numbers = self.slide_sections(plan, sections, index, len(planned))
+            excerpt = self.slide_excerpt(numbers, sections)
+            slide = previous.find(plan["title_text"], excerpt) if previous is not None else None
+            jobs.append((plan, numbers, excerpt, slide))
+        return jobs
+
+    def get_document_key(self) -> Optional[str]:
+        """
+        Return the key of the source document, the digest of the source PDF unless one was given.
+        """
+        if self.document_key is None and self.source is not None:
+            self.document_key = source_digest(self.source)
+        return self.document_key
+
+    def update(self, deck: Union[str, bytes], manifest: Optional[SlideManifest] = None) -> Optional[Any]:
+        """
+        Update a deck generated in outline mode to the current text and agenda.
 
+        Only the slides whose title or source sections changed are generated
+        again, see update_slides, and only the slides whose content changed
+        are replaced in the existing pptx. With an unchanged agenda no outline
+        call is made, so editing one paragraph costs one slide call.
+
+        Args:
+            deck (Union[str, bytes]): Path or content of the pptx to update. A saved deck is
+                updated in place.
+            manifest (Optional[SlideManifest]): Manifest of the deck. Defaults to the manifest
+                saved next to the deck.
+
+        Returns:
+            Optional[Any]: The pptx content if in_memory, else the file path of the updated
+                presentation, or None if an error occurs, which is kept in self.error.
+        """
+        self.error = None
         try:
-            return json.loads(resp.content.strip("```").replace("json", "").strip())
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid model response: {e}")
+            if self.output_format != "pptx":
+                raise ValueError(f"Only pptx decks can be updated, not {self.output_format}.")
+            self.prepare_text()
+            if manifest is None:
+                if not isinstance(deck, str):
+                    raise ValueError("A manifest is required to update a deck given as bytes.")
+                manifest = SlideManifest.load(manifest_path(deck))
+
+            slides = self.place_figures(self.update_slides(manifest))
+            self.slides = slides
+            self.file_name = SlideDeck.file_name(slides[0])
+            with self.tracer.span("render", slides=len(slides)) as span:
+                opcodes = diff_slides(manifest.slide_hashes(), [slide_hash(slide) for slide in slides])
+                presentation = SlideDeck(source=deck)
+                # Patch from the end of the deck, so the positions of earlier opcodes stay valid
+                for _, i1, i2, j1, j2 in reversed(opcodes):
+                    for index in reversed(range(i1, i2)):
+                        presentation.delete_slide(index)
+                    for offset, slide in enumerate(slides[j1:j2]):
+                        presentation.insert_slide(i1 + offset, slide, title=j1 + offset == 0)
+                span.attrs["patched"] = sum(max(i2 - i1, j2 - j1) for _, i1, i2, j1, j2 in opcodes)
+
+            with self.tracer.span("save", in_memory=self.in_memory):
+                if self.in_memory:
+                    return presentation.to_bytes()
+                if isinstance(deck, str):
+                    presentation.prs.save(deck)
+                    return self._save_manifest(deck)
+                return self._save_manifest(presentation.save(slides[0]))
+        except Exception as e:
+            print(f"An error occurred during presentation update: {e}")
+            self.error = e
+            return None
+
+    def update_slides(self, manifest: SlideManifest) -> List[Dict[str, Any]]:
+        """
+        Generate the slides of the current text and agenda, reusing the slides of a manifest.
+
+        With the agenda of the manifest, its outline is carried over to the
+        current sections (see SlideManifest.remap). With a new agenda, or a text
+        that shares less than MIN_OUTLINE_OVERLAP of its sections with the
+        manifest, a new outline is generated. Either way, slides whose title and
+        excerpt are unchanged are reused and only the others are generated.
+        A manifest of another source document is not used at all.
+
+        Args:
+            manifest (SlideManifest): Manifest of the earlier generation.
+
+        Returns:
+            List[Dict[str, Any]]: List of slide data dictionaries.
+
+        Raises:
+            ValueError: If any model response is invalid.
+        """
+        sections = split_sections(self.text)
+        if manifest.source != self.get_document_key():
+            print("Warning: The manifest is of another source document, generating all slides.")
+            return list(self.expand_outline(sections, *self.plan_outline(sections)))
+        if manifest.agenda == self.agenda and manifest.overlap(sections) >= MIN_OUTLINE_OVERLAP:
+            title_slide, planned = dict(manifest.title_slide), manifest.remap(sections)
+        else:
+            title_slide, planned = self.plan_outline(sections)
+        return list(self.expand_outline(sections, title_slide, planned, manifest))
+
+    def stream_slides(self) -> Iterator[Dict[str, Any]]:
+        """
+        Generate slide content, yielding each slide as soon as the model has produced it.
+
+        Outline mode yields each slide when its call has finished. Chunked mode
+        and models without a stream method yield the slides after the whole
+        generation has finished.
+
+        Yields:
+            Dict[str, Any]: Slide data dictionaries, title slide first.
+
+        Raises:
+            ValueError: If the model response is invalid.
+        """
+        if self.mode == "outline":
+            yield from self.iter_slides_outline()
+            return
+        if self.mode != "single" or not hasattr(self.llm, "stream"):
+            yield from self.generate_slides()
+            return
+
+        prompt = self.build_prompt(self.text)
+        parser = JsonArrayStream()
+        chunks = []
+        emitted = 0
+        with self.tracer.span("llm", streaming=True) as span:
+            start = time.perf_counter()
+            stream = self.llm.stream(prompt)
+            while True:
+                try:
+                    chunk = next(stream)
+                except StopIteration as stop:
+                    response = stop.value
+                    break
+                chunks.append(chunk)
+                if parser is None:
+                    continue
+                try:
+                    slides = parser.feed(chunk)
+                except ValueError:
+                    # Too malformed to split incrementally, repair the whole response at the end
+                    parser = None
+                    continue
+                if slides:
+                    try:
+                        slides, problems = validate_slides(slides)
+                    except ValueError:
+                        # Only objects without slide fields, e.g. a note of the model
+                        slides, problems = [], ["dropped objects without slide fields"]
+                    parser.repairs.extend(problems)
+                    emitted += len(slides)
+                if slides and "time_to_first_slide_s" not in span.attrs:
+                    span.attrs["time_to_first_slide_s"] = time.perf_counter() - start
+                yield from slides
+            self._record_response(span, response)
+            if parser is not None:
+                try:
+                    parser.close()
+                except ValueError:
+                    # No array was found, e.g. bare objects, repair the whole response below
+                    parser = None
+            # An array that yielded no slide was nested in an unbracketed object
+            if parser is not None and parser.count:
+                self.tracer.count("parse_repairs", len(parser.repairs))
+                return
+        yield from self.parse_slides(ModelResponse("".join(chunks)))[emitted:]
+
+    async def agenerate_slides(self, semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict[str, Any]]:
+        """
+        Generate slide content asynchronously, running chunk calls concurrently.
+
+        Args:
+            semaphore (Optional[asyncio.Semaphore]): Bounds concurrent model calls.
+
+        Returns:
+            List[Dict[str, Any]]: List of slide data dictionaries.
+
+        Raises:
+            ValueError: If any model response is invalid.
+        """
+        if self.mode == "outline":
+            # Same steps as iter_slides_outline, with the model calls awaited
+            sections = split_sections(self.text)
+            title_slide, planned = self.parse_outline(await self.aexecute(self.build_outline_prompt(sections), semaphore))
+            jobs = self._outline_jobs(sections, planned)
+            responses = await asyncio.gather(*(self.aexecute(prompt, semaphore) for prompt in self._outline_prompts(jobs)))
+            return list(self._collect_outline(sections, title_slide, jobs, iter(responses)))
+
+        chunks = chunk_markdown(self.text, self.chunk_chars) if self.mode == "chunked" else []
+        if len(chunks) <= 1:
+            return self.parse_slides(await self.aexecute(self.build_prompt(self.text), semaphore))
+
+        prompts = [self.build_prompt(chunk, part, len(chunks)) for part, chunk in enumerate(chunks, 1)]
+        responses = await asyncio.gather(*(self.aexecute(prompt, semaphore) for prompt in prompts))
+        return self.merge_slides([self.parse_slides(resp) for resp in responses])
+
+    async def aexecute(self, prompt: str, semaphore: Optional[asyncio.Semaphore] = None) -> Any:
+        """
+        Call the model asynchronously, holding the semaphore for the duration of the call.
+
+        Models without an aexecute method are run in a worker thread.
+
+        Args:
+            prompt (str): The prompt.
+            semaphore (Optional[asyncio.Semaphore]): Bounds concurrent model calls.
+
+        Returns:
+            Any: The model response.
+        """
+        aexecute = getattr(self.llm, "aexecute", None)
+        if semaphore is None:
+            with self.tracer.span("llm") as span:
+                resp = await aexecute(prompt) if aexecute else await asyncio.to_thread(self.llm.execute, prompt)
+                return self._record_response(span, resp)
+        async with semaphore:
+            with self.tracer.span("llm") as span:
+                resp = await aexecute(prompt) if aexecute else await asyncio.to_thread(self.llm.execute, prompt)
+                return self._record_response(span, resp)
+
+    def execute(self, prompt: str) -> Any:
+        """
+        Call the model, recording the call and its token usage on the tracer.
+
+        Args:
+            prompt (str): The prompt.
+
+        Returns:
+            Any: The model response.
+        """
+        with self.tracer.span("llm") as span:
+            return self._record_response(span, self.llm.execute(prompt))
+
+    def _record_response(self, span: Span, resp: Any) -> Any:
+        """
+        Record the token usage and cache status of a model response.
+        """
+        usage = getattr(resp, "usage", resp)
+        self.tracer.count("llm_calls")
+        retries = getattr(resp, "attempts", 1) - 1
+        if retries:
+            span.attrs["retries"] = retries
+            self.tracer.count("retries", retries)
+        if getattr(usage, "source", None) == "cache":
+            self.tracer.count("cache_hits")
+        if usage is not None and hasattr(usage, "total_tokens"):
+            span.attrs.update(prompt_tokens=usage.prompt_tokens, output_tokens=usage.output_tokens,
+                              token_source=usage.source)
+            self.tracer.count("prompt_tokens", usage.prompt_tokens)
+            self.tracer.count("output_tokens", usage.output_tokens)
+        return resp
+
+    def build_prompt(self, text: str, part: Optional[int] = None, total: Optional[int] = None) -> str:
+        """
+        Build the generation prompt for a text or a part of it.
+
+        Args:
+            text (str): The content to summarize.
+            part (Optional[int]): 1-based index of the chunk, if the text is a chunk.
+            total (Optional[int]): Total number of chunks.
+
+        Returns:
+            str: The prompt.
+        """
+        with self.tracer.span("prompt", chars=len(text)):
+            prompt = get_ppt_prompt()
+            if part is not None:
+                prompt += get_chunk_prompt(part, total)
+            return f"{prompt}\nAgenda: {self.agenda}\nContent: {text}"
+
+    def build_outline_prompt(self, sections: List[str]) -> str:
+        """
+        Build the prompt of the outline call from numbered section previews.
+
+        Each section is shown with its share of chunk_chars characters, but at
+        least OUTLINE_PREVIEW_CHARS, which keeps headings and opening sentences
+        of long documents while bounding the input tokens of the call.
+
+        Args:
+            sections (List[str]): The sections of the text, see utils.split_sections.
+
+        Returns:
+            str: The prompt.
+        """
+        with self.tracer.span("prompt", chars=sum(map(len, sections)), outline=True):
+            preview_chars = max(OUTLINE_PREVIEW_CHARS, self.chunk_chars // max(1, len(sections)))
+            content = "\n\n".join(f"[Section {number}]\n{section[:preview_chars]}"
+                                   for number, section in enumerate(sections, 1))
+            return f"{get_outline_prompt()}\nAgenda: {self.agenda}\nContent: {content}"
+
+    def build_slide_prompt(self, title: str, excerpt: str) -> str:
+        """
+        Build the prompt of the call that writes the content of one outlined slide.
+
+        Args:
+            title (str): The slide title from the outline.
+            excerpt (str): The sections the slide covers.
+
+        Returns:
+            str: The prompt.
+        """
+        with self.tracer.span("prompt", chars=len(excerpt)):
+            return f"{get_slide_prompt(title)}\nAgenda: {self.agenda}\nExcerpt: {excerpt}"
+
+    def slide_sections(self, plan: Dict[str, Any], sections: List[str], index: int, total: int) -> List[int]:
+        """
+        Return the valid section numbers an outlined slide references.
+
+        Slides without valid section numbers get the section at the same relative
+        position in the document.
+
+        Args:
+            plan (Dict[str, Any]): The outlined slide.
+            sections (List[str]): The sections of the text.
+            index (int): 0-based index of the slide among the content slides.
+            total (int): Number of content slides.
+
+        Returns:
+            List[int]: Sorted 1-based section numbers.
+        """
+        refs = plan.get("sections")
+        numbers = set()
+        for ref in refs if isinstance(refs, list) else [refs]:
+            try:
+                number = int(ref)
+            except (TypeError, ValueError):
+                continue
+            if 1 <= number <= len(sections):
+                numbers.add(number)
+        if not numbers:
+            numbers = {index * len(sections) // total + 1}
+        return sorted(numbers)
+
+    def slide_excerpt(self, numbers: List[int], sections: List[str]) -> str:
+        """
+        Return the text of the given sections, cut to chunk_chars characters.
+
+        Args:
+            numbers (List[int]): 1-based section numbers.
+            sections (List[str]): The sections of the text.
+
+        Returns:
+            str: The excerpt.
+        """
+        return "\n\n".join(sections[number - 1] for number in numbers)[:self.chunk_chars]
+
+    def expand_slide(self, plan: Dict[str, Any], resp: Any, slide_id: int) -> Dict[str, Any]:
+        """
+        Combine an outlined slide with the content generated for it.
+
+        Args:
+            plan (Dict[str, Any]): The outlined slide.
+            resp (Any): The model response with the slide content.
+            slide_id (int): The id of the slide in the deck.
+
+        Returns:
+            Dict[str, Any]: The slide data dictionary.
+
+        Raises:
+            ValueError: If the model response is invalid.
+        """
+        content = self.parse_slides(resp)[0]
+        slide = {"id": slide_id, "title_text": plan["title_text"]}
+        slide.update((key, value) for key, value in content.items()
+                     if key not in slide and key not in ("is_title_slide", "sections"))
+        return slide
+
+    def parse_slides(self, resp: Any) -> List[Dict[str, Any]]:
+        """
+        Parse a model response into a list of slide data dictionaries.
+
+        Malformed JSON is repaired and the slides are validated, see
+        parsing.extract_slides.
+
+        Args:
+            resp (Any): The model response.
+
+        Returns:
+            List[Dict[str, Any]]: List of slide data dictionaries.
+
+        Raises:
+            ValueError: If the model response is invalid.
+        """
+        with self.tracer.span("parse") as span:
+            slides, repairs = extract_slides(resp.content)
+            if repairs:
+                span.attrs["repairs"] = repairs
+                self.tracer.count("parse_repairs", len(repairs))
+            return slides
+
+    def merge_slides(self, parts: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Merge the partial slide lists of a chunked generation into one deck.
+
+        The title slide of the first part is kept, the title slides of the
+        other parts are dropped, and the slide ids are renumbered.
+
+        Args:
+            parts (List[List[Dict[str, Any]]]): Slide lists in document order.
+
+        Returns:
+            List[Dict[str, Any]]: The merged list of slide data dictionaries.
+        """
+        title_slide: Optional[Dict[str, Any]] = None
+        slides: List[Dict[str, Any]] = []
+        for part in parts:
+            if not part:
+                continue
+            part_title, *part_slides = part
+            if title_slide is None:
+                title_slide = part_title
+            slides.extend(part_slides)
+
+        if title_slide is None:
+            raise ValueError("Invalid model response: no slides generated")
+
+        merged = [title_slide, *slides]
+        for slide_id, slide in enumerate(merged, 1):
+            slide["id"] = slide_id
+        return merged
 
     def generate_presentation(self, content: List[Dict[str, Any]]) -> Any:
         """
@@ -122,8 +1027,62 @@ class GenPPT:
             content (List[Dict[str, Any]]): List of slide data dictionaries.
 
         Returns:
-            Any: The generated presentation object.
+            Any: The content if in_memory, else the file path of the saved presentation.
         """
-        deck = SlideDeck()
-        title_slide_data, *slides_data = content
-        return deck.create_presentation(title_slide_data, slides_data)
\ No newline at end of file
+        self.slides = content
+        self.file_name = get_renderer(self.output_format).file_name(Deck.from_dicts(content))
+        result = render_presentation(content, self.in_memory, self.output_format)
+        return result if self.in_memory else self._save_manifest(result)
+
+    def _save_manifest(self, deck_path: str) -> str:
+        """
+        Save the manifest of an outline mode generation next to the saved deck, so update() can patch it later.
+        """
+        if self.manifest is not None and self.output_format == "pptx":
+            self.manifest.save(manifest_path(deck_path))
+        return deck_path
+
+
+async def agenerate_many(jobs: Iterable[Dict[str, Any]], concurrency: int = 4, processes: Optional[int] = None) -> List[Optional[Any]]:
+    """
+    Generate many presentations concurrently.
+
+    Model calls of all jobs share a semaphore of size concurrency, PDF extraction
+    and rendering run in a process pool.
+
+    Args:
+        jobs (Iterable[Dict[str, Any]]): Keyword arguments for GenPPT, one dict per deck.
+        concurrency (int): Maximum number of concurrent model calls.
+        processes (Optional[int]): Size of the process pool. Defaults to the CPU count.
+
+    Returns:
+        List[Optional[Any]]: Generated presentations in job order, None for failed jobs.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(job: Dict[str, Any]) -> Optional[Any]:
+        # An invalid job only fails its own deck
+        try:
+            deck = GenPPT(**job)
+        except Exception as e:
+            print(f"An error occurred during presentation generation: {e}")
+            return None
+        return await deck.arun(executor, semaphore)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return await asyncio.gather(*(generate(job) for job in jobs))
+
+
+def generate_many(jobs: Iterable[Dict[str, Any]], concurrency: int = 4, processes: Optional[int] = None) -> List[Optional[Any]]:
+    """
+    Generate many presentations concurrently. Blocking wrapper around agenerate_many.
+
+    Args:
+        jobs (Iterable[Dict[str, Any]]): Keyword arguments for GenPPT, one dict per deck.
+        concurrency (int): Maximum number of concurrent model calls.
+        processes (Optional[int]): Size of the process pool. Defaults to the CPU count.
+
+    Returns:
+        List[Optional[Any]]: Generated presentations in job order, None for failed jobs.
+    """
+    return asyncio.run(agenerate_many(jobs, concurrency, processes))
@@ -0,0 +1,10 @@
+"""
+Headless entry points of GenSlides.
+
+    python -m genslides build report.pdf --pages 1-20 --agenda "Financial results"
+    python -m genslides serve --port 8000 --workers 4
+
+The command line builds a deck without the Streamlit UI, the HTTP service
+queues generation jobs for batch systems. Both import the generation modules
+lazily, so the command line starts fast.
+"""
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+# Kept in sync with genppt.MODES, which is not imported here to keep startup fast
+MODES = ("single", "chunked", "outline")
+# Kept in sync with renderers.RENDERERS
+FORMATS = ("pptx", "html", "marp", "json")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m genslides", description="Generate PowerPoint decks from PDF or text.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Generate a deck from a PDF, markdown or text file.")
+    build.add_argument("input", help="PDF, markdown or text file, or - to read text from stdin.")
+    build.add_argument("-o", "--output", help="Path of the deck to write. Defaults to a file named "
+                                              "after the title in the generated/ folder.")
+    build.add_argument("--format", choices=FORMATS, default="pptx", help="Output format: pptx, reveal.js html, "
+                                                                         "Marp markdown or slide json. "
+                                                                         "Defaults to pptx.")
+    build.add_argument("--pages", default="", help="Page range of a PDF, e.g. 1-20, 2,3,5-8, 10- (to the end), "
+                                                     "-5 (the last five) or 1-40:2 (every second page).")
+    build.add_argument("--max-pages", type=int, default=20, help="Maximum number of PDF pages. Defaults to 20.")
+    build.add_argument("--token-budget", type=int, help="Maximum estimated tokens of the source text. Longer "
+                                                         "texts are cut down to the sections most relevant to the agenda.")
+    build.add_argument("--agenda", default="Generic", help="Main points or topics to cover.")
+    build.add_argument("--mode", choices=MODES, default="single", help="Generation mode. Defaults to single.")
+    build.add_argument("--model", default="gemini_flash_l", help="Model name, see genppt.MODELS.")
+    build.add_argument("--api-key", help="API key of the model. Defaults to GOOGLE_API_KEY.")
+    build.add_argument("--update", metavar="DECK", help="Update a deck generated in outline mode, "
+                                                        "regenerating only the slides affected by changes.")
+    build.add_argument("--no-cache", action="store_true", help="Do not reuse cached model responses.")
+    build.add_argument("--figures", action="store_true", help="Place the figures of the PDF on the slides "
+                                                               "that match the text of their pages.")
+    build.add_argument("--no-preprocess", action="store_true", help="Keep running headers, page numbers and "
+                                                                    "other boilerplate in the prompt.")
+    build.add_argument("--trace", action="store_true", help="Print stage timings and counters as JSON to stderr.")
+
+    serve = commands.add_parser("serve", help="Run the HTTP job service.")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--workers", type=int, default=2, help="Number of concurrent generation jobs.")
+    serve.add_argument("--queue-size", type=int, default=32, help="Maximum number of queued jobs.")
+    serve.add_argument("--model", default="gemini_flash_l", help="Model name, see genppt.MODELS.")
+    return parser
+
+
+def build(args: argparse.Namespace) -> int:
+    """
+    Generate or update a deck and print the path it was written to.
+
+    Returns:
+        int: The exit status.
+    """
+    from genppt import GenPPT
+
+    text = ""
+    source = ""
+    if args.input == "-":
+        text = sys.stdin.read()
+    elif args.input.lower().endswith(".pdf"):
+        source = args.input
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            text = f.read()
+
+    pp = GenPPT(source=source, text=text, agenda=args.agenda, model_name=args.model, llm_api_key=args.api_key,
+                pages=args.pages, max_pages=args.max_pages, mode=args.mode, use_cache=not args.no_cache,
+                preprocess=not args.no_preprocess, token_budget=args.token_budget,
+                figures=args.figures, output_format=args.format, in_memory=args.output is not None)
+    result = pp.update(args.update) if args.update else pp.run()
+    if args.trace:
+        print(json.dumps(pp.tracer.summary()), file=sys.stderr)
+    if result is None:
+        return 1
+
+    if args.output is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "wb") as f:
+            f.write(result)
+        if pp.manifest is not None and args.format == "pptx":
+            from manifest import manifest_path
+
+            pp.manifest.save(manifest_path(args.output))
+        result = args.output
+    print(result)
+    return 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    from genslides.server import run_server
+
+    run_server(args.host, args.port, workers=args.workers, queue_size=args.queue_size, model_name=args.model)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command line interface.
+
+    Args:
+        argv (Optional[List[str]]): The arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: The exit status.
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == "build":
+        return build(args)
+    return serve(args)
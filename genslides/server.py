@@ -0,0 +1,356 @@
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Largest accepted request body, PDFs included
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+def _flag(value: Any) -> bool:
+    """
+    Parse a boolean option given as JSON or as a query parameter.
+    """
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ("1", "true", "yes", "on"):
+        return True
+    if str(value).lower() in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(value)
+
+
+class QueueFullError(Exception):
+    """
+    The job queue is full, the client should retry later.
+    """
+
+
+class Job:
+    """
+    A deck generation job and its result.
+
+    Args:
+        params: Keyword arguments for GenPPT, e.g. agenda, pages and mode.
+        text: Input text, if the job has no PDF.
+        pdf: Content of the input PDF.
+    """
+
+    __slots__ = ("id", "params", "text", "pdf", "status", "error", "result", "file_name",
+                 "trace", "created", "started", "finished")
+
+    def __init__(self, params: Dict[str, Any], text: str = "", pdf: Optional[bytes] = None):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.text = text
+        self.pdf = pdf
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.result: Optional[bytes] = None
+        self.file_name: Optional[str] = None
+        self.trace: Optional[Dict[str, Any]] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "file_name": self.file_name,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "trace": self.trace,
+        }
+
+
+class JobQueue:
+    """
+    A bounded queue of generation jobs processed by a pool of worker threads.
+
+    Submitting to a full queue fails right away instead of blocking, so callers
+    get backpressure. Finished jobs keep their result until they are deleted or
+    evicted, oldest first, once more than max_finished jobs have finished.
+
+    Args:
+        workers: Number of worker threads, i.e. concurrent generations.
+        queue_size: Maximum number of jobs waiting for a worker.
+        max_finished: Maximum number of finished jobs to keep.
+        model_name: Model used by jobs that do not name one.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 32, max_finished: int = 256, model_name: str = "gemini_flash_l"):
+        self.model_name = model_name
+        self.max_finished = max_finished
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        for i in range(workers):
+            worker = threading.Thread(target=self._work, name=f"genslides-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, job: Job) -> Job:
+        """
+        Queue a job.
+
+        Raises:
+            QueueFullError: If queue_size jobs are already waiting.
+        """
+        with self._lock:
+            self.jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self.jobs[job.id]
+            raise QueueFullError("Too many queued jobs, retry later")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def delete(self, job_id: str) -> bool:
+        """
+        Forget a finished job and its result.
+
+        Returns:
+            bool: Whether a finished job was deleted.
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished is None:
+                return False
+            del self.jobs[job_id]
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {"workers": len(self._workers), "queued": statuses.count("queued"),
+                "running": statuses.count("running"), "done": statuses.count("done"),
+                "failed": statuses.count("failed")}
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers after the jobs they are running.
+        """
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.status = "running"
+            job.started = time.time()
+            try:
+                self._run(job)
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+            job.status = "done" if job.result is not None else "failed"
+            job.finished = time.time()
+            job.pdf = job.text = None
+            self._evict()
+
+    def _run(self, job: Job) -> None:
+        from extraction import get_extractor
+        from genppt import GenPPT
+        from tracing import Tracer, get_tracer
+
+        tracer = Tracer(parent=get_tracer())
+        params = dict(job.params)
+        text = job.text
+        if job.pdf is not None:
+            with tracer.span("extract", source="upload"):
+                text = get_extractor().extract(job.pdf, params.get("pages"), params.get("max_pages", 20),
+                                               tracer=tracer)
+        params.setdefault("model_name", self.model_name)
+        figures = params.pop("figures", False)
+        pp = GenPPT(text=text, in_memory=True, tracer=tracer, **params)
+        if figures and job.pdf is not None:
+            pp.load_figures(job.pdf)
+        job.result = pp.run()
+        job.file_name = pp.file_name
+        job.trace = tracer.summary()
+        if job.result is None:
+            job.error = "Error in generating slides"
+
+    def _evict(self) -> None:
+        with self._lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.finished is not None]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self.jobs[job_id]
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    """
+    HTTP interface of a JobQueue.
+
+        POST   /jobs              Submit a job: a PDF body (Content-Type application/pdf) with
+                                  the options as query parameters, or a JSON body with "text"
+                                  and the options. Options: agenda, pages, max_pages, token_budget,
+                                  figures (PDF jobs only), mode, model_name, output_format.
+        GET    /jobs/<id>         Status of a job.
+        GET    /jobs/<id>/result  The generated deck of a finished job, pptx unless another
+                                  output_format was requested.
+        DELETE /jobs/<id>         Forget a finished job.
+        GET    /healthz           Worker and queue counts.
+        GET    /metrics           Stage timings and counters in Prometheus text format.
+    """
+
+    server_version = "genslides"
+    jobs: JobQueue
+
+    OPTIONS = {"agenda": str, "pages": str, "max_pages": int, "token_budget": int, "figures": _flag, "mode": str,
+               "model_name": str, "output_format": str}
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": "Not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            return self._send_json(413, {"error": f"Request body exceeds {MAX_BODY_BYTES} bytes"})
+        body = self.rfile.read(length)
+
+        try:
+            if self.headers.get("Content-Type", "").split(";")[0].strip() == "application/pdf":
+                options = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                job = Job(self._params(options), pdf=body)
+            else:
+                options = json.loads(body or b"{}")
+                if not isinstance(options, dict) or not str(options.get("text", "")).strip():
+                    raise ValueError('Expected a JSON object with a "text" field or a PDF body')
+                job = Job(self._params(options), text=str(options["text"]))
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+
+        try:
+            self.jobs.submit(job)
+        except QueueFullError as e:
+            return self._send_json(503, {"error": str(e)}, {"Retry-After": "5"})
+        self._send_json(202, job.as_dict(), {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path.rstrip("/")
+        if path == "/healthz":
+            return self._send_json(200, self.jobs.stats())
+        if path == "/metrics":
+            from tracing import get_tracer, prometheus_text
+
+            return self._send(200, prometheus_text(get_tracer()).encode(), "text/plain; version=0.0.4")
+
+        match = re.fullmatch(r"/jobs/(\w+)(/result)?", path)
+        job = self.jobs.get(match.group(1)) if match else None
+        if job is None:
+            return self._send_json(404, {"error": "Not found"})
+        if not match.group(2):
+            return self._send_json(200, job.as_dict())
+        if job.status != "done":
+            return self._send_json(409, {"error": f"Job is {job.status}", "status": job.status})
+        from renderers import RENDERERS
+
+        renderer = RENDERERS[job.params.get("output_format", "pptx")]
+        file_name = job.file_name or f"presentation{renderer.extension}"
+        self._send(200, job.result, renderer.mime, {"Content-Disposition": f'attachment; filename="{file_name}"'})
+
+    def do_DELETE(self) -> None:
+        match = re.fullmatch(r"/jobs/(\w+)", urlparse(self.path).path.rstrip("/"))
+        if match and self.jobs.delete(match.group(1)):
+            return self._send(204, b"", "application/json")
+        self._send_json(404, {"error": "Not found or not finished"})
+
+    def _params(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate the job options of a request.
+
+        Raises:
+            ValueError: If an option has an invalid value.
+        """
+        from genppt import MODES
+        from renderers import RENDERERS
+        from utils import parse_page_spec
+
+        params = {}
+        for key, cast in self.OPTIONS.items():
+            if options.get(key) not in (None, ""):
+                try:
+                    params[key] = cast(options[key])
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid value of {key}: {options[key]!r}")
+        if params.get("mode", "single") not in MODES:
+            raise ValueError(f"Unknown mode '{params['mode']}'. Expected one of {MODES}.")
+        # Checked against the page count of the PDF when the job runs
+        parse_page_spec(params.get("pages", ""))
+        if params.get("output_format", "pptx") not in RENDERERS:
+            raise ValueError(f"Unknown output format '{params['output_format']}'. "
+                             f"Expected one of {tuple(RENDERERS)}.")
+        return params
+
+    def _send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps(data).encode(), "application/json", headers)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host: str, port: int, jobs: JobQueue) -> ThreadingHTTPServer:
+    """
+    Create an HTTP server for a job queue.
+
+    Args:
+        host (str): The interface to listen on.
+        port (int): The port to listen on, 0 for any free port.
+        jobs (JobQueue): The queue to serve.
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet serving.
+    """
+    handler = type("Handler", (JobHandler,), {"jobs": jobs})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8000, workers: int = 2, queue_size: int = 32,
+               model_name: str = "gemini_flash_l") -> None:
+    """
+    Serve generation jobs over HTTP until interrupted.
+
+    Args:
+        host (str): The interface to listen on.
+        port (int): The port to listen on.
+        workers (int): Number of concurrent generation jobs.
+        queue_size (int): Maximum number of queued jobs.
+        model_name (str): Model used by jobs that do not name one.
+    """
+    jobs = JobQueue(workers=workers, queue_size=queue_size, model_name=model_name)
+    server = make_server(host, port, jobs)
+    print(f"Serving GenSlides jobs on http://{host}:{server.server_port} with {workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.shutdown()
@@ -0,0 +1,204 @@
+import difflib
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def text_hash(*parts: str) -> str:
+    """
+    Return a short content hash of one or more strings.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def slide_hash(slide: Dict[str, Any]) -> str:
+    """
+    Return the hash of the rendered content of a slide.
+
+    The id is left out, so that slides that only moved in the deck keep their hash.
+    """
+    content = {key: value for key, value in slide.items() if key not in ("id", "sections")}
+    return text_hash(json.dumps(content, sort_keys=True, ensure_ascii=False))
+
+
+def manifest_path(deck_path: str) -> str:
+    """
+    Return the path of the manifest stored next to a saved presentation.
+    """
+    return os.path.splitext(deck_path)[0] + ".manifest.json"
+
+
+class SlideManifest:
+    """
+    Records how each slide of a deck was generated, for incremental regeneration.
+
+    For the input it keeps the agenda, the key of the source document and a
+    hash of every section of the text, for every slide the numbers of the
+    sections it was generated from, a key over its title and source excerpt,
+    the hash of its content and its JSON.
+    Comparing a new input with the manifest tells which slides can be kept and
+    which have to be generated again, and comparing slide hashes tells which
+    slides of the saved deck have to be patched.
+
+    Args:
+        agenda: The agenda of the generation.
+        sections: The sections of the input text, see utils.split_sections.
+        title_slide: The title slide data.
+        source: Key of the source document, e.g. extraction.source_digest of the PDF,
+            or None for a text without a source, see GenPPT.get_document_key.
+    """
+
+    version = 1
+
+    def __init__(self, agenda: str, sections: List[str], title_slide: Dict[str, Any], source: Optional[str] = None):
+        self.agenda = agenda
+        self.source = source
+        self.section_hashes = [text_hash(section) for section in sections]
+        self.title_slide = title_slide
+        self.slides: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def source_key(title: str, excerpt: str) -> str:
+        """
+        Return the key of a slide over the inputs of its generation call.
+        """
+        return text_hash(title, excerpt)
+
+    def add(self, sections: List[int], excerpt: str, slide: Dict[str, Any]) -> None:
+        """
+        Record a generated content slide.
+
+        Args:
+            sections (List[int]): 1-based numbers of the sections the slide covers.
+            excerpt (str): The text the slide was generated from.
+            slide (Dict[str, Any]): The slide data.
+        """
+        self.slides.append({
+            "sections": sections,
+            "key": self.source_key(slide["title_text"], excerpt),
+            "hash": slide_hash(slide),
+            "slide": slide,
+        })
+
+    def find(self, title: str, excerpt: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the recorded slide generated from the same title and excerpt, if any.
+        """
+        key = self.source_key(title, excerpt)
+        return next((entry["slide"] for entry in self.slides if entry["key"] == key), None)
+
+    def rehash(self) -> None:
+        """
+        Update the content hashes after recorded slides were changed, e.g. by placing figures.
+        """
+        for entry in self.slides:
+            entry["hash"] = slide_hash(entry["slide"])
+
+    def slide_hashes(self) -> List[str]:
+        """
+        Return the hashes of all slides in deck order, title slide first.
+        """
+        return [slide_hash(self.title_slide)] + [entry["hash"] for entry in self.slides]
+
+    def overlap(self, sections: List[str]) -> float:
+        """
+        Return the share of the recorded sections that are unchanged in a new version of the input text.
+        """
+        if not self.section_hashes:
+            return 0.0
+        new_hashes = {text_hash(section) for section in sections}
+        return sum(digest in new_hashes for digest in self.section_hashes) / len(self.section_hashes)
+
+    def remap(self, sections: List[str]) -> List[Dict[str, Any]]:
+        """
+        Carry the outline over to a new version of the input text.
+
+        The section hashes are diffed with difflib. References to unchanged
+        sections follow them to their new position, references to an edited
+        block of sections point to the new version of the block, sections
+        inserted after a referenced section are added to the slides covering
+        it, and slides whose sections were all deleted are dropped.
+
+        Args:
+            sections (List[str]): The sections of the new input text.
+
+        Returns:
+            List[Dict[str, Any]]: The outlined content slides with the new section numbers.
+        """
+        new_hashes = [text_hash(section) for section in sections]
+        matcher = difflib.SequenceMatcher(None, self.section_hashes, new_hashes, autojunk=False)
+        # 1-based old section number -> 1-based new section numbers
+        mapping: Dict[int, List[int]] = {number: [] for number in range(1, len(self.section_hashes) + 1)}
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                for offset in range(i2 - i1):
+                    mapping[i1 + offset + 1].append(j1 + offset + 1)
+            elif tag == "replace":
+                for number in range(i1 + 1, i2 + 1):
+                    mapping[number].extend(range(j1 + 1, j2 + 1))
+            elif tag == "insert":
+                # Attach to the preceding section, or the following one at the start
+                anchor = i1 if i1 > 0 else i1 + 1
+                if anchor in mapping:
+                    mapping[anchor].extend(range(j1 + 1, j2 + 1))
+
+        plans = []
+        for entry in self.slides:
+            numbers = sorted({new for old in entry["sections"] for new in mapping.get(old, [])})
+            if numbers:
+                plans.append({"title_text": entry["slide"]["title_text"], "sections": numbers})
+        return plans
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "agenda": self.agenda,
+            "source": self.source,
+            "sections": self.section_hashes,
+            "title_slide": self.title_slide,
+            "slides": self.slides,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SlideManifest":
+        """
+        Restore a manifest from its to_dict form.
+
+        Raises:
+            ValueError: If the manifest has an unknown version.
+        """
+        if data.get("version") != cls.version:
+            raise ValueError(f"Unsupported manifest version: {data.get('version')}")
+        manifest = cls(data["agenda"], [], data["title_slide"], data.get("source"))
+        manifest.section_hashes = data["sections"]
+        manifest.slides = data["slides"]
+        return manifest
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "SlideManifest":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def diff_slides(old_hashes: List[str], new_hashes: List[str]) -> List[Tuple[str, int, int, int, int]]:
+    """
+    Return the difflib opcodes that turn the old slide sequence into the new one.
+
+    Args:
+        old_hashes (List[str]): Slide hashes of the existing deck.
+        new_hashes (List[str]): Slide hashes of the new deck.
+
+    Returns:
+        List[Tuple[str, int, int, int, int]]: The non-equal opcodes, see difflib.SequenceMatcher.get_opcodes.
+    """
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    return [opcode for opcode in matcher.get_opcodes() if opcode[0] != "equal"]
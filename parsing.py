@@ -0,0 +1,483 @@
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+
+class JsonArrayStream:
+    """
+    An incremental parser for a JSON array of objects arriving in chunks.
+
+    Text before the opening bracket of the array, such as a ```json fence, is
+    skipped. So is a bracketed span of that text without objects, such as
+    "[see below]", so the array after it is still found. Each top-level object
+    of the array is decoded and returned as soon as its closing brace arrives,
+    so callers can act on the first objects before the rest of the array has
+    been received. Malformed objects are repaired with repair_json, and a
+    stream that is cut off keeps the objects received so far.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = -1
+        self.started = False
+        self.finished = False
+        self.count = 0
+        self.repairs: List[str] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Add a chunk of text and return the objects completed by it.
+
+        Args:
+            chunk (str): The next chunk of the model output.
+
+        Returns:
+            List[Dict[str, Any]]: Objects whose closing brace is in this chunk.
+
+        Raises:
+            ValueError: If a completed object is not valid JSON.
+        """
+        if self.finished:
+            return []
+
+        self._buffer += chunk
+        objects = []
+        buffer = self._buffer
+        pos = self._pos
+
+        while pos < len(buffer):
+            char = buffer[pos]
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 1 and char == "{":
+                    self._object_start = pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and char == "}" and self._object_start >= 0:
+                    objects.append(self._decode(buffer[self._object_start:pos + 1]))
+                    self.count += 1
+                    self._object_start = -1
+                elif self._depth == 0:
+                    if not self.count:
+                        # Brackets in the text before the array, look for the next one
+                        self.started = False
+                        pos += 1
+                        continue
+                    self.finished = True
+                    pos += 1
+                    break
+            pos += 1
+
+        # Drop the consumed prefix so that long streams are scanned only once
+        keep = self._object_start if self._object_start >= 0 else pos
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._object_start >= 0:
+            self._object_start = 0
+        return objects
+
+    def close(self) -> None:
+        """
+        Signal the end of the stream.
+
+        Raises:
+            ValueError: If no JSON array or no complete object was received.
+        """
+        if not self.started:
+            raise ValueError("Invalid model response: no JSON array found")
+        if not self.finished:
+            if not self.count:
+                raise ValueError("Invalid model response: JSON array is incomplete")
+            self.repairs.append("dropped truncated final object")
+
+    def _decode(self, text: str) -> Dict[str, Any]:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+        repaired, repairs = repair_json(f"[{text}]")
+        try:
+            objects = json.loads(repaired)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid model response: {e}")
+        if len(objects) != 1 or not isinstance(objects[0], dict):
+            raise ValueError("Invalid model response: malformed slide object")
+        self.repairs.extend(repairs)
+        return objects[0]
+
+
+# Bare words that are valid JSON values
+_JSON_LITERALS = {"true": "true", "false": "false", "null": "null",
+                  "True": "true", "False": "false", "None": "null"}
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?$")
+_FENCE_RE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+# The body of a fenced block, up to the closing fence or the end of a truncated response
+_FENCED_BLOCK_RE = re.compile(r"```[a-zA-Z]*[ \t]*\n(.*?)(?:```|\Z)", re.S)
+# Brackets tried as the start of the array before a response is given up on
+MAX_JSON_CANDIDATES = 8
+_WORD_END = frozenset(' \t\r\n{}[]:,"\'')
+_decoder = json.JSONDecoder()
+# Keys of the slide schema, an object with none of them is not a slide
+SLIDE_KEYS = frozenset({"title_text", "title", "subtitle_text", "is_title_slide", "text", "p1", "img_path", "table"})
+
+
+def find_json_array(text: str) -> str:
+    """
+    Locate the JSON array of slides in a model response.
+
+    Markdown fences and text before the first bracket are dropped. A response
+    that is a bare object or a list of objects without brackets gets the
+    opening bracket added, and the text is cut after the bracket that closes
+    the array, if any.
+
+    Args:
+        text (str): The model response.
+
+    Returns:
+        str: The text of the array, possibly truncated or malformed.
+
+    Raises:
+        ValueError: If the response contains no JSON object or array.
+    """
+    text = _FENCE_RE.sub("", text)
+    starts = [i for i in (text.find("["), text.find("{")) if i >= 0]
+    if not starts:
+        raise ValueError("Invalid model response: no JSON array found")
+    start = min(starts)
+    if text[start] == "{":
+        return "[" + text[start:]
+
+    depth = 0
+    in_string = False
+    escape = False
+    for pos in range(start, len(text)):
+        char = text[pos]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    return text[start:]
+
+
+def _json_string(raw: str, quote: str) -> str:
+    """
+    Convert the body of a double- or single-quoted string to a valid JSON string.
+    """
+    if quote == "'":
+        raw = re.sub(r'(?<!\\)((?:\\\\)*)"', r'\1\\"', raw.replace("\\'", "'"))
+    raw = raw.replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+    try:
+        return json.dumps(json.loads(f'"{raw}"'), ensure_ascii=False)
+    except json.JSONDecodeError:
+        # Invalid escapes, treat backslashes literally
+        return json.dumps(raw.replace("\\n", "\n").replace("\\r", "\r").replace("\\t", "\t"), ensure_ascii=False)
+
+
+def _tokenize(text: str, repairs: List[str]) -> List[Tuple[str, str]]:
+    """
+    Split malformed JSON into punctuation, string and bare word tokens.
+    """
+    tokens = []
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+        if char in " \t\r\n":
+            i += 1
+        elif char in "{}[]:,":
+            tokens.append(("punct", char))
+            i += 1
+        elif char in "\"'":
+            j = i + 1
+            while j < n and text[j] != char:
+                j += 2 if text[j] == "\\" else 1
+            tokens.append(("string", _json_string(text[i + 1:min(j, n)], char)))
+            if char == "'":
+                repairs.append("converted single-quoted string")
+            i = j + 1
+        else:
+            j = i
+            while j < n and text[j] not in _WORD_END:
+                j += 1
+            word = text[i:j]
+            # A key with only its closing quote, like the title_text" typo
+            if j < n and text[j] == '"' and text[j + 1:].lstrip()[:1] == ":":
+                tokens.append(("string", json.dumps(word)))
+                repairs.append(f"quoted key {word}")
+                i = j + 1
+                continue
+            tokens.append(("word", word))
+            i = j if j > i else i + 1
+    return tokens
+
+
+def repair_json(text: str) -> Tuple[str, List[str]]:
+    """
+    Repair common defects of a JSON array of objects produced by a model.
+
+    Fixes single-quoted strings, unquoted or half-quoted keys, bare word values,
+    missing and trailing commas and mismatched brackets. A truncated array keeps
+    its complete objects and drops the object that was cut off.
+
+    Args:
+        text (str): The text of the array, e.g. from find_json_array.
+
+    Returns:
+        Tuple[str, List[str]]: The repaired JSON text and a description of each repair.
+    """
+    repairs: List[str] = []
+    out: List[str] = []
+    stack: List[str] = []
+    value_end = False
+    expect_key = False
+    # Length of out after the last complete element of the top-level array
+    safe_cut = None
+
+    for kind, value in _tokenize(text, repairs):
+        in_object = bool(stack) and stack[-1] == "{"
+        if kind == "punct" and value in "{[":
+            if value_end:
+                out.append(",")
+                repairs.append("inserted missing comma")
+            out.append(value)
+            stack.append(value)
+            value_end = False
+            expect_key = value == "{"
+        elif kind == "punct" and value in "}]":
+            if not stack:
+                continue
+            if out[-1] == ",":
+                out.pop()
+                repairs.append("removed trailing comma")
+            if out[-1] == ":":
+                out.append("null")
+                repairs.append("added missing value")
+            opener = stack.pop()
+            closer = "}" if opener == "{" else "]"
+            if closer != value:
+                repairs.append(f"replaced mismatched '{value}'")
+            out.append(closer)
+            value_end = True
+            expect_key = False
+            if len(stack) == 1:
+                safe_cut = len(out)
+            if not stack:
+                break
+        elif kind == "punct" and value == ",":
+            if not value_end:
+                repairs.append("removed extra comma")
+                continue
+            out.append(",")
+            value_end = False
+            expect_key = in_object
+        elif kind == "punct":
+            out.append(":")
+            value_end = False
+            expect_key = False
+        else:
+            if not stack:
+                continue
+            if value_end:
+                out.append(",")
+                repairs.append("inserted missing comma")
+                expect_key = in_object
+            if kind == "word":
+                if in_object and expect_key:
+                    repairs.append(f"quoted key {value}")
+                    value = json.dumps(value)
+                elif value in _JSON_LITERALS:
+                    if value != _JSON_LITERALS[value]:
+                        repairs.append(f"converted literal {value}")
+                    value = _JSON_LITERALS[value]
+                elif not _NUMBER_RE.match(value):
+                    repairs.append(f"quoted value {value}")
+                    value = json.dumps(value)
+            out.append(value)
+            value_end = not (in_object and expect_key)
+            expect_key = False
+
+    if stack:
+        if len(stack) > 1:
+            if safe_cut is None:
+                raise ValueError("Invalid model response: no complete slide in truncated output")
+            out = out[:safe_cut]
+            repairs.append("dropped truncated final object")
+        elif out[-1] == ",":
+            out.pop()
+        out.append("]")
+        repairs.append("closed truncated array")
+
+    return "".join(out), repairs
+
+
+def validate_slides(data: Any) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Validate parsed slides against the slide schema, coercing what can be coerced.
+
+    Slides that are not objects or have none of the SLIDE_KEYS are dropped,
+    text and image paths are coerced to lists of strings and tables to lists of
+    rows of strings.
+
+    Args:
+        data (Any): The parsed JSON.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[str]]: The valid slides and a description of each problem.
+
+    Raises:
+        ValueError: If there are no valid slides.
+    """
+    problems: List[str] = []
+    if isinstance(data, dict):
+        data = data.get("slides", [data])
+    if not isinstance(data, list):
+        raise ValueError(f"Invalid model response: expected a JSON array, got {type(data).__name__}")
+
+    slides = []
+    for index, item in enumerate(data):
+        if not isinstance(item, dict):
+            problems.append(f"dropped slide {index}: not an object")
+            continue
+        if SLIDE_KEYS.isdisjoint(item):
+            problems.append(f"dropped slide {index}: no slide fields")
+            continue
+        slide = dict(item)
+        for key in ("title_text", "subtitle_text", "p1"):
+            if key in slide and not isinstance(slide[key], str):
+                slide[key] = "" if slide[key] is None else str(slide[key])
+                problems.append(f"slide {index}: coerced {key} to text")
+        if "title_text" not in slide:
+            slide["title_text"] = str(slide.pop("title", ""))
+            problems.append(f"slide {index}: missing title_text")
+        for key in ("text", "img_path"):
+            if key not in slide:
+                continue
+            value = slide[key]
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list):
+                del slide[key]
+                problems.append(f"slide {index}: dropped invalid {key}")
+                continue
+            slide[key] = [str(entry) for entry in value if isinstance(entry, (str, int, float))]
+        if "table" in slide:
+            rows = slide["table"]
+            rows = [[("" if cell is None else str(cell)) for cell in row]
+                    for row in rows if isinstance(row, list) and row] if isinstance(rows, list) else []
+            if rows:
+                slide["table"] = rows
+            else:
+                del slide["table"]
+                problems.append(f"slide {index}: dropped invalid table")
+        slides.append(slide)
+
+    if not slides:
+        raise ValueError("Invalid model response: no slides found")
+    return slides, problems
+
+
+def json_candidates(text: str) -> List[str]:
+    """
+    Return the texts a JSON array of slides may start at, best first.
+
+    The body of a fenced block comes before the text around it, so brackets in
+    the chatter before the block do not hide it. Each candidate starts at one
+    of the first MAX_JSON_CANDIDATES brackets.
+
+    Args:
+        text (str): The model response.
+
+    Returns:
+        List[str]: The candidates, each starting with "[" or "{".
+    """
+    fenced = _FENCED_BLOCK_RE.search(text)
+    sources = [fenced.group(1), text] if fenced else [text]
+    candidates = []
+    for source in sources:
+        for match in re.finditer(r"[\[{]", source):
+            if len(candidates) == MAX_JSON_CANDIDATES:
+                return candidates
+            candidates.append(source[match.start():])
+    return candidates
+
+
+def _decode_candidate(text: str) -> Tuple[Any, List[str]]:
+    """
+    Decode the JSON array a candidate starts with, repairing it if needed.
+    """
+    try:
+        data, end = _decoder.raw_decode(text)
+        if isinstance(data, dict) and text[end:].lstrip(" \t\r\n,")[:1] == "{":
+            raise json.JSONDecodeError("Objects without enclosing array", text, end)
+        return data, []
+    except json.JSONDecodeError:
+        repaired, repairs = repair_json(find_json_array(text))
+        try:
+            return json.loads(repaired), repairs
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid model response: {e}")
+
+
+def extract_slides(text: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Extract and validate the slides of a model response.
+
+    Well-formed responses are decoded in place from the first bracket,
+    malformed ones are cut out with find_json_array and repaired with
+    repair_json, so that a small defect does not cost a new generation.
+    A fenced block is preferred over the text around it, and a bracket that
+    yields no titled slide, such as "[see below]" or {"ok": true} in the
+    chatter before the array, is skipped for the next one.
+
+    Args:
+        text (str): The model response.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[str]]: The slides and a description of each repair or problem.
+
+    Raises:
+        ValueError: If no slides can be recovered.
+    """
+    error = None
+    untitled = None
+    for candidate in json_candidates(text):
+        try:
+            data, repairs = _decode_candidate(candidate)
+            slides, problems = validate_slides(data)
+        except ValueError as e:
+            error = error or e
+            continue
+        if any(slide["title_text"] for slide in slides):
+            return slides, repairs + problems
+        # Kept in case no candidate has a title
+        untitled = untitled or (slides, repairs + problems + ["no slide has a title"])
+    if untitled is not None:
+        return untitled
+    raise error or ValueError("Invalid model response: no JSON array found")
@@ -0,0 +1,194 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+from tokens import estimate_tokens
+from utils import chunk_markdown, split_sections
+
+_TERM_RE = re.compile(r"[^\W_]+")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both but
+by can could did do does doing down during each few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my no nor not now of off on once only or other our ours out
+over own same she should so some such than that the their theirs them then there these they this those through
+to too under until up very was we were what when where which while who whom why will with would you your yours
+""".split())
+
+# Salient terms of the document used as the query when the agenda matches none of its terms
+QUERY_TERMS = 20
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into lowercase index terms, without stopwords and single characters.
+    """
+    return [term for term in _TERM_RE.findall(text.lower()) if len(term) > 1 and term not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    An Okapi BM25 index over a list of documents, e.g. the sections of a text.
+
+    Args:
+        documents: The documents to index.
+        k1: Term frequency saturation.
+        b: Document length normalization.
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(freqs.values()) for freqs in self.term_freqs]
+        self.avg_length = sum(self.lengths) / len(documents) if documents else 0.0
+        doc_freqs: Counter = Counter()
+        for freqs in self.term_freqs:
+            doc_freqs.update(freqs.keys())
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in doc_freqs.items()}
+
+    def scores(self, query: Iterable[str]) -> List[float]:
+        """
+        Return the BM25 score of every document for the query terms.
+        """
+        terms = [(term, self.idf[term]) for term in set(query) if term in self.idf]
+        scores = []
+        for freqs, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            score = 0.0
+            for term, idf in terms:
+                freq = freqs.get(term)
+                if freq:
+                    score += idf * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+    def top_terms(self, n: int) -> List[str]:
+        """
+        Return the n terms with the highest TF-IDF weight over all documents.
+        """
+        weights: Counter = Counter()
+        for freqs in self.term_freqs:
+            for term, freq in freqs.items():
+                weights[term] += freq * self.idf[term]
+        return [term for term, _ in weights.most_common(n)]
+
+
+class BudgetPlan:
+    """
+    Which units of a text were kept to fit a token budget.
+
+    Args:
+        budget: The token budget.
+        units: Number of units the text was split into.
+        selected: Indices of the kept units, in document order.
+        tokens_total: Estimated tokens of the whole text.
+        tokens_selected: Estimated tokens of the kept units.
+        query: The terms the units were ranked by.
+    """
+
+    __slots__ = ("budget", "units", "selected", "tokens_total", "tokens_selected", "query")
+
+    def __init__(self, budget: int, units: int, selected: List[int], tokens_total: int, tokens_selected: int,
+                 query: List[str]):
+        self.budget = budget
+        self.units = units
+        self.selected = selected
+        self.tokens_total = tokens_total
+        self.tokens_selected = tokens_selected
+        self.query = query
+
+    @property
+    def tokens_dropped(self) -> int:
+        return self.tokens_total - self.tokens_selected
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "units": self.units,
+            "selected": len(self.selected),
+            "tokens_total": self.tokens_total,
+            "tokens_selected": self.tokens_selected,
+            "tokens_dropped": self.tokens_dropped,
+        }
+
+
+def split_units(text: str, max_unit_tokens: int) -> List[str]:
+    """
+    Split a markdown text into sections, and sections longer than max_unit_tokens into paragraphs.
+    """
+    units = []
+    for section in split_sections(text):
+        if estimate_tokens(section) <= max_unit_tokens:
+            units.append(section)
+        else:
+            # Three characters per token keeps almost every piece under the limit
+            units.extend(chunk_markdown(section, max_unit_tokens * 3))
+    return units
+
+
+def truncate_to_budget(text: str, token_budget: int) -> str:
+    """
+    Return the longest prefix of a text within the token budget, cut at a word boundary if there is one.
+    """
+    low, high = 0, len(text)
+    # Estimated tokens only grow with the prefix, so the longest prefix that fits is found by bisection
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low == len(text):
+        return text
+    cut = text.rfind(" ", 0, low + 1)
+    return text[:cut if cut > 0 else low].rstrip()
+
+
+def plan_budget(text: str, agenda: str, token_budget: int) -> Tuple[str, BudgetPlan]:
+    """
+    Select the content of a text most relevant to the agenda that fits a token budget.
+
+    The text is split into sections at page boundaries and headings, long
+    sections into paragraphs, and the units are ranked by their BM25 score for
+    the agenda. If the agenda matches no term of the text, e.g. "Generic", the
+    most salient terms of the text are used instead, which favours the sections
+    that are representative of the whole document. Units are then added best
+    first while they fit, the first unit, which usually holds the title, before
+    all others, and returned in document order. If not even the best unit fits,
+    it is truncated to the budget, so the model never gets an empty text.
+
+    Args:
+        text (str): Markdown text, e.g. the output of pymupdf4llm.to_markdown.
+        agenda (str): The agenda of the presentation.
+        token_budget (int): Maximum estimated tokens of the selected text.
+
+    Returns:
+        Tuple[str, BudgetPlan]: The selected text and the plan. A text within the
+            budget is returned unchanged.
+    """
+    tokens_total = estimate_tokens(text)
+    if tokens_total <= token_budget:
+        return text, BudgetPlan(token_budget, 1, [0], tokens_total, tokens_total, [])
+
+    units = split_units(text, max(64, token_budget // 8))
+    costs = [estimate_tokens(unit) for unit in units]
+    index = BM25Index(units)
+    query = [term for term in tokenize(agenda) if term in index.idf] or index.top_terms(QUERY_TERMS)
+    scores = index.scores(query)
+
+    order = sorted(range(len(units)), key=lambda i: (i != 0, -scores[i], i))
+    selected = []
+    used = 0
+    for i in order:
+        if used + costs[i] <= token_budget:
+            selected.append(i)
+            used += costs[i]
+    if not selected:
+        best = truncate_to_budget(units[order[0]], token_budget)
+        return best, BudgetPlan(token_budget, len(units), [order[0]], tokens_total, estimate_tokens(best), query)
+    selected.sort()
+    return "\n\n".join(units[i] for i in selected), BudgetPlan(token_budget, len(units), selected, tokens_total,
+                                                               used, query)
@@ -1,25 +1,115 @@
+import copy
+import io
 import os
+import re
+import threading
 from typing import List, Dict, Union
+from xml.sax.saxutils import escape
 from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
+from pptx.oxml import parse_xml
+from pptx.util import Inches
+
+from assets import get_asset_store
+
+_NSDECL = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+
+# Control characters that are not allowed in XML, escaped the way python-pptx does
+_CTRL_CHAR_RE = re.compile(r"[\x00-\x08\x0B\x0C\x0E-\x1F]")
+
+HEADER_FILL = "0070C0"  # Blue color
+HEADER_FONT_COLOR = "FFFFFF"  # White text
+FIRST_COLUMN_FILL = "E6E6E6"  # Light gray
+TABLE_FONT_SIZE = 1000  # 10pt, in hundredths of a point
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def new_presentation():
+    """
+    Return a new presentation based on the default template.
+
+    The template package is parsed once per process and deep-copied for every
+    deck, which is several times faster than parsing it again.
+    """
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = Presentation()
+    return copy.deepcopy(_template)
+
+
+def _text_xml(text: str) -> str:
+    """
+    Return the runs of a paragraph, with line breaks for newlines and vertical tabs.
+    """
+    runs = []
+    for line in re.split("[\n\v]", text):
+        if line:
+            line = _CTRL_CHAR_RE.sub(lambda m: f"_x{ord(m.group()):04X}_", escape(line))
+            runs.append(f"<a:r><a:t>{line}</a:t></a:r>")
+        else:
+            runs.append("")
+    return "<a:br/>".join(runs)
+
+
+def _table_cell_xml(text: str, align: str, bold: bool, fill: str = "", font_color: str = "") -> str:
+    """
+    Return the XML of a table cell with a single formatted paragraph.
+    """
+    color = f'<a:solidFill><a:srgbClr val="{font_color}"/></a:solidFill>' if font_color else ""
+    bold_attr = ' b="1"' if bold else ""
+    first_line, *other_lines = text.split("\n")
+    paragraphs = f'<a:p><a:pPr algn="{align}"><a:defRPr sz="{TABLE_FONT_SIZE}"{bold_attr}>{color}</a:defRPr></a:pPr>{_text_xml(first_line)}</a:p>'
+    paragraphs += "".join(f"<a:p>{_text_xml(line)}</a:p>" for line in other_lines)
+    fill = f'<a:solidFill><a:srgbClr val="{fill}"/></a:solidFill>' if fill else ""
+    return f"<a:tc><a:txBody><a:bodyPr/><a:lstStyle/>{paragraphs}</a:txBody><a:tcPr>{fill}</a:tcPr></a:tc>"
+
+
+def reserve_path(folder: str, file_name: str) -> str:
+    """
+    Reserve a file name in a folder, creating the folder if needed.
+
+    If a file of that name exists, a numeric suffix is added. The empty file is
+    created atomically, so concurrent decks never overwrite each other.
+
+    Args:
+        folder (str): The output folder.
+        file_name (str): The wanted file name.
+
+    Returns:
+        str: The path of the reserved file.
+    """
+    os.makedirs(folder, exist_ok=True)
+    stem, ext = os.path.splitext(file_name)
+    suffix = 0
+    while True:
+        path = os.path.join(folder, f"{stem}-{suffix}{ext}" if suffix else f"{stem}{ext}")
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            suffix += 1
 
-from pptx.shapes.base import BaseShape
 
 class SlideDeck:
     """
     A class to create and manage PowerPoint presentations.
     """
 
-    def __init__(self, output_folder: str = "generated"):
+    def __init__(self, output_folder: str = "generated", source: Union[str, bytes, None] = None):
         """
         Initialize the SlideDeck class.
 
         Args:
             output_folder (str): The folder where the presentation will be saved.
+            source (Union[str, bytes, None]): Path or content of an existing pptx to edit.
+                Defaults to a new presentation.
         """
-        self.prs = Presentation()
+        if source is None:
+            self.prs = new_presentation()
+        else:
+            self.prs = Presentation(io.BytesIO(source) if isinstance(source, bytes) else source)
         self.output_folder = output_folder
 
     def add_slide(self, slide_data: Dict[str, Union[str, List[str], List[List[str]]]]) -> None:
@@ -38,19 +128,18 @@ class SlideDeck:
         title_shape = shapes.title
         title_shape.text = slide_data.get("title_text", "")
 
-        # Add body text
+        # Add body text, building all bullet paragraphs in one go
         if "text" in slide_data:
             body_shape = shapes.placeholders[1]
-            tf = body_shape.text_frame
+            paragraphs = []
             for bullet in slide_data.get("text", []):
-                p = tf.add_paragraph()
-                p.text = bullet
-                p.level = 0
+                paragraphs.append(f"<a:p><a:pPr/>{_text_xml(str(bullet))}</a:p>")
 
                 if "p1" in slide_data:
-                    p = tf.add_paragraph()
-                    p.text = slide_data.get("p1", "")
-                    p.level = 1
+                    paragraphs.append(f'<a:p><a:pPr lvl="1"/>{_text_xml(str(slide_data.get("p1", "")))}</a:p>')
+            if paragraphs:
+                body = parse_xml(f"<a:txBody {_NSDECL}>{''.join(paragraphs)}</a:txBody>")
+                body_shape.text_frame._txBody.extend(list(body))
 
         # Add images
         if "img_path" in slide_data:
@@ -60,7 +149,9 @@ class SlideDeck:
                     top = Inches(2)
                     left = Inches(cur_left)
                     height = Inches(4)
-                    pic = slide.shapes.add_picture(img_path, left, top, height=height)
+                    # Downsampled to the placed size, identical images share one media part
+                    image = get_asset_store().prepare(img_path, height=height.inches)
+                    pic = slide.shapes.add_picture(image, left, top, height=height)
                     cur_left += 1
                 except FileNotFoundError:
                     print(f"Warning: Image file not found: {img_path}")
@@ -104,7 +195,9 @@ class SlideDeck:
         width = Inches(9)
         height = Inches(5.5)
 
-        table = slide.shapes.add_table(rows, max_cols, left, top, width, height).table
+        # Create a single row only, the rows are written in bulk below
+        table = slide.shapes.add_table(1, max_cols, left, top, width, height).table
+        row_height = height // rows
 
         # Set column widths
         first_col_width = 3.5
@@ -115,55 +208,91 @@ class SlideDeck:
         for i in range(1, max_cols):
             table.columns[i].width = Inches(other_col_width)
 
-        # Populate the table with data
+        # Populate and style the table in bulk: build the XML of all rows at once
+        # instead of going through the python-pptx cell proxies cell by cell
+        tbl = table._tbl
+        rows_xml = []
         for i, row in enumerate(table_data):
             if len(row) < max_cols:
-                row.insert(0, " ")
-            for j, cell in enumerate(row):
-                table.cell(i, j).text = str(cell)
-                paragraph = table.cell(i, j).text_frame.paragraphs[0]
-                paragraph.font.size = Pt(10)
-                paragraph.alignment = PP_ALIGN.CENTER if j > 0 or i == 0 else PP_ALIGN.LEFT
-
-        # Style the header row
-        for cell in table.rows[0].cells:
-            cell.fill.solid()
-            cell.fill.fore_color.rgb = RGBColor(0, 112, 192)  # Blue color
-            cell.text_frame.paragraphs[0].font.color.rgb = RGBColor(255, 255, 255)  # White text
-            cell.text_frame.paragraphs[0].font.bold = True
-
-        # Style the first column
-        for i in range(1, rows):
-            cell = table.cell(i, 0)
-            cell.fill.solid()
-            cell.fill.fore_color.rgb = RGBColor(230, 230, 230)  # Light gray
-            cell.text_frame.paragraphs[0].font.bold = True
-
-    def create_presentation(self, title_slide_info: Dict[str, str], slide_pages_data: List[Dict[str, Union[str, List[str], List[List[str]]]]] = []) -> str:
+                row = [" ", *row]
+            cells = [str(cell) for cell in row] + [""] * (max_cols - len(row))
+            cells_xml = []
+            for j, cell in enumerate(cells):
+                if i == 0:
+                    cells_xml.append(_table_cell_xml(cell, "ctr", True, HEADER_FILL, HEADER_FONT_COLOR))
+                elif j == 0:
+                    cells_xml.append(_table_cell_xml(cell, "l", True, FIRST_COLUMN_FILL))
+                else:
+                    cells_xml.append(_table_cell_xml(cell, "ctr", False))
+            rows_xml.append(f'<a:tr h="{row_height}">{"".join(cells_xml)}</a:tr>')
+
+        new_rows = parse_xml(f"<a:tbl {_NSDECL}>{''.join(rows_xml)}</a:tbl>")
+        tbl.remove(tbl.tr_lst[0])
+        tbl.extend(list(new_rows))
+
+    def insert_slide(self, index: int, slide_data: Dict[str, Union[str, List[str], List[List[str]]]], title: bool = False) -> None:
+        """
+        Add a new slide at the given position.
+
+        Args:
+            index (int): 0-based position of the new slide.
+            slide_data (Dict): A dictionary containing the slide content.
+            title (bool): Whether to add a title slide.
+        """
+        if title:
+            self.add_title_slide(slide_data)
+        else:
+            self.add_slide(slide_data)
+        # Slides are ordered by the sldIdLst of the presentation, move the new entry
+        sld_id_lst = self.prs.slides._sldIdLst
+        sld_id = sld_id_lst[-1]
+        sld_id_lst.remove(sld_id)
+        sld_id_lst.insert(index, sld_id)
+
+    def delete_slide(self, index: int) -> None:
+        """
+        Remove the slide at the given position.
+
+        Args:
+            index (int): 0-based position of the slide.
+        """
+        sld_id_lst = self.prs.slides._sldIdLst
+        sld_id = sld_id_lst[index]
+        sld_id_lst.remove(sld_id)
+        # Without the relationship the slide part is no longer written out
+        self.prs.part.drop_rel(sld_id.rId)
+        # New slides are named after the slide count, so close the gap in the part names
+        self.prs.part.rename_slide_parts([sld_id.rId for sld_id in sld_id_lst])
+
+    def replace_slide(self, index: int, slide_data: Dict[str, Union[str, List[str], List[List[str]]]], title: bool = False) -> None:
+        """
+        Replace the slide at the given position with a new slide.
+
+        Args:
+            index (int): 0-based position of the slide.
+            slide_data (Dict): A dictionary containing the slide content.
+            title (bool): Whether the new slide is a title slide.
+        """
+        self.insert_slide(index, slide_data, title)
+        self.delete_slide(index + 1)
+
+    def create_presentation(self, title_slide_info: Dict[str, str], slide_pages_data: List[Dict[str, Union[str, List[str], List[List[str]]]]] = [], in_memory: bool = False) -> Union[str, bytes]:
         """
         Create a complete presentation.
 
         Args:
             title_slide_info (Dict): Information for the title slide.
             slide_pages_data (List[Dict]): Data for all other slides.
+            in_memory (bool): Return the pptx content instead of saving it to the output folder.
 
         Returns:
-            str: The file path of the saved presentation.
+            Union[str, bytes]: The pptx content if in_memory, else the file path of the saved presentation.
 
         Raises:
             OSError: If there's an error creating or saving the file.
             ValueError: If the input data is invalid.
         """
         try:
-            # Generate file name from title
-            file_name = title_slide_info.get("title_text", "presentation").\
-                lower().replace(",", "").replace(":", "").replace(" ", "-")
-            file_name += ".pptx"
-            file_name = os.path.join(self.output_folder, file_name)
-
-            # Create output folder if it doesn't exist
-            os.makedirs(self.output_folder, exist_ok=True)
-
             # Add title slide
             self.add_title_slide(title_slide_info)
 
@@ -171,12 +300,57 @@ class SlideDeck:
             for slide_data in slide_pages_data:
                 self.add_slide(slide_data)
 
-            # Save the presentation
-            self.prs.save(file_name)
-            return file_name
+            if in_memory:
+                return self.to_bytes()
+            return self.save(title_slide_info)
         except OSError as e:
             raise OSError(f"Error creating or saving the presentation: {str(e)}")
         except ValueError as e:
             raise ValueError(f"Invalid input data: {str(e)}")
         except Exception as e:
-            raise Exception(f"An unexpected error occurred: {str(e)}")
\ No newline at end of file
+            raise Exception(f"An unexpected error occurred: {str(e)}")
+
+    @staticmethod
+    def file_name(title_slide_info: Dict[str, str]) -> str:
+        """
+        Derive the file name of a presentation from its title.
+
+        Args:
+            title_slide_info (Dict): Information for the title slide.
+
+        Returns:
+            str: The file name, without folder.
+        """
+        file_name = title_slide_info.get("title_text", "presentation").\
+            lower().replace(",", "").replace(":", "").replace(" ", "-")
+        # Keep the name inside the output folder whatever the title contains
+        file_name = re.sub(r"[^\w.-]+", "", file_name).strip(".") or "presentation"
+        return file_name + ".pptx"
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the presentation in memory.
+
+        Returns:
+            bytes: The pptx content.
+        """
+        buffer = io.BytesIO()
+        self.prs.save(buffer)
+        return buffer.getvalue()
+
+    def save(self, title_slide_info: Dict[str, str]) -> str:
+        """
+        Save the presentation under a file name derived from its title.
+
+        If a file of that name exists, a numeric suffix is added, so concurrent
+        decks with the same title never overwrite each other.
+
+        Args:
+            title_slide_info (Dict): Information for the title slide.
+
+        Returns:
+            str: The file path of the saved presentation.
+        """
+        file_name = reserve_path(self.output_folder, self.file_name(title_slide_info))
+        self.prs.save(file_name)
+        return file_name
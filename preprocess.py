@@ -0,0 +1,300 @@
+import math
+import random
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from tokens import estimate_tokens
+from utils import PAGE_SEPARATOR_RE
+
+PAGE_SEPARATOR = "\n\n-----\n\n"
+
+# A line that is only a page number: "12", "Page 3 of 40", "- 7 -", "iv"
+PAGE_NUMBER_RE = re.compile(
+    r"^\W*(?:page\s*)?(?:\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?"
+    r"|(?=[ivxlcdm]+\W*$)m{0,3}(?:cm|cd|d?c{0,3})(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3}))\W*$",
+    re.IGNORECASE,
+)
+# Page numbers at either end of a running header or footer
+_EDGE_NUMBER_RE = re.compile(r"^\W*(?:page\s*)?\d{1,4}\b|\b(?:page\s*)?\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?\W*$", re.IGNORECASE)
+_MARKUP_RE = re.compile(r"[#*_`>|]")
+_ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+CONTENTS_RE = re.compile(r"^\W*(?:table\s+of\s+)?contents\W*$", re.IGNORECASE)
+# "Introduction ........ 3", "2.1 Results   14", "| Outlook | 27 |"
+TOC_LINE_RE = re.compile(r"^.{2,}?(?:\.{2,}|…+|\s|\|)\s*\d{1,4}\W*$")
+REFERENCES_RE = re.compile(
+    r"^(?:#{1,6}\s*)?[*_]*\s*(?:\d+\.?\s*)?(?:references|bibliography|works\s+cited|literature\s+cited)\s*[*_]*\s*:?\s*$",
+    re.IGNORECASE,
+)
+HEADING_LINE_RE = re.compile(r"^#{1,6}\s")
+# pymupdf4llm writes many headings as a bold line instead of a # heading
+BOLD_LINE_RE = re.compile(r"^\s*(\*\*|__)[^*_]+\1\s*$")
+# "[3] ...", "12. ...", "4) ...", or "Smith, J. ... (2020)" and "Doe A, Roe B. ... 2021;"
+CITATION_RE = re.compile(r"^\s*(?:[-*]\s+)?(?:\[\d+\]|\d{1,3}[.)]\s|[A-Z][^\s,]*(?:\s[A-Z]{1,3}\.?)?,.*\b(?:19|20)\d{2}[a-z]?\b)")
+_WORD_RE = re.compile(r"\w+")
+
+# Random masks of the MinHash signatures, one per hash function
+_MINHASH_MASKS = tuple(random.Random(0).getrandbits(32) for _ in range(16))
+
+
+class PreprocessReport:
+    """
+    What preprocessing removed from a text and the tokens it saved.
+
+    Args:
+        text_before: The text before preprocessing.
+        text_after: The text after preprocessing.
+        removed: Number of removed items per kind, e.g. "running_lines".
+    """
+
+    __slots__ = ("chars_before", "chars_after", "tokens_before", "tokens_after", "removed")
+
+    def __init__(self, text_before: str, text_after: str, removed: Dict[str, int]):
+        self.chars_before = len(text_before)
+        self.chars_after = len(text_after)
+        self.tokens_before = estimate_tokens(text_before)
+        self.tokens_after = estimate_tokens(text_after)
+        self.removed = removed
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "chars_before": self.chars_before,
+            "chars_after": self.chars_after,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_saved,
+            **{f"removed_{kind}": count for kind, count in self.removed.items()},
+        }
+
+
+def _running_key(line: str) -> str:
+    """
+    Normalize a header or footer line so that its copies on different pages compare equal.
+    """
+    line = _MARKUP_RE.sub(" ", line).lower()
+    line = _EDGE_NUMBER_RE.sub(" ", line)
+    return " ".join(line.split()).strip(" -–—|·:,.")
+
+
+def _page_number(line: str) -> Optional[int]:
+    """
+    Return the number of a page number line, e.g. 3 for "Page 3 of 40" or "iii", or None for other lines.
+    """
+    if not PAGE_NUMBER_RE.match(line):
+        return None
+    digits = re.search(r"\d+", line)
+    if digits:
+        return int(digits.group())
+    numeral = re.search(r"[ivxlcdm]+", line.lower())
+    if numeral is None:
+        return None
+    values = [_ROMAN_VALUES[char] for char in numeral.group()]
+    return sum(-value if value < following else value for value, following in zip(values, values[1:] + [0]))
+
+
+def remove_running_lines(pages: List[str], zone_lines: int = 3, min_ratio: float = 0.5,
+                         min_pages: int = 3) -> Tuple[List[str], int, int]:
+    """
+    Remove page numbers and headers and footers repeated across pages.
+
+    Only the first and last zone_lines non-empty lines of each page are
+    considered. A line is a running header or footer if it appears, up to its
+    page number, on at least min_ratio of the pages, and at least min_pages.
+    Headings are never running lines, so "## Chapter 1" and "## Chapter 2" are
+    kept. A number is a page number only if it follows the page sequence, i.e.
+    its offset from the page index is shared by at least min_pages pages, so a
+    single page or a year in the text keeps its numbers.
+
+    Args:
+        pages (List[str]): The markdown of each page.
+        zone_lines (int): Lines at the top and bottom of a page that are checked.
+        min_ratio (float): Fraction of pages a line must repeat on.
+        min_pages (int): Minimum number of pages a line must repeat on.
+
+    Returns:
+        Tuple[List[str], int, int]: The pages, the number of removed running lines
+            and the number of removed page numbers.
+    """
+    page_lines = [page.split("\n") for page in pages]
+    zones = []
+    counts: Counter = Counter()
+    offsets: Counter = Counter()
+    for index, lines in enumerate(page_lines):
+        filled = [i for i, line in enumerate(lines) if line.strip()]
+        # Headings keep their place in the zone but are never removed
+        zone = [i for i in sorted(set(filled[:zone_lines] + filled[-zone_lines:])) if not HEADING_LINE_RE.match(lines[i])]
+        zones.append(zone)
+        counts.update({_running_key(lines[i]) for i in zone})
+        offsets.update({number - index for number in map(_page_number, (lines[i] for i in zone)) if number is not None})
+
+    threshold = max(min_pages, math.ceil(min_ratio * len(pages)))
+    running = {key for key, count in counts.items() if key and count >= threshold}
+    sequences = {offset for offset, count in offsets.items() if count >= min_pages}
+
+    running_removed = numbers_removed = 0
+    cleaned = []
+    for index, (lines, zone) in enumerate(zip(page_lines, zones)):
+        drop = set()
+        for i in zone:
+            number = _page_number(lines[i])
+            if number is not None:
+                if number - index in sequences:
+                    drop.add(i)
+                    numbers_removed += 1
+            elif _running_key(lines[i]) in running:
+                drop.add(i)
+                running_removed += 1
+        cleaned.append("\n".join(line for i, line in enumerate(lines) if i not in drop))
+    return cleaned, running_removed, numbers_removed
+
+
+def remove_toc(pages: List[str], min_lines: int = 3) -> Tuple[List[str], int]:
+    """
+    Remove tables of contents, i.e. pages with a "Contents" line followed by
+    at least min_lines lines ending in a page number.
+
+    Returns:
+        Tuple[List[str], int]: The pages and the number of removed lines.
+    """
+    removed = 0
+    cleaned = []
+    for page in pages:
+        lines = page.split("\n")
+        start = next((i for i, line in enumerate(lines) if CONTENTS_RE.match(_MARKUP_RE.sub(" ", line))), None)
+        if start is not None:
+            entries = [i for i in range(start + 1, len(lines)) if TOC_LINE_RE.match(lines[i].strip())]
+            if len(entries) >= min_lines:
+                drop = {start, *entries}
+                removed += len(drop)
+                lines = [line for i, line in enumerate(lines) if i not in drop]
+        cleaned.append("\n".join(lines))
+    return cleaned, removed
+
+
+def remove_references(lines: List[str]) -> Tuple[List[str], int]:
+    """
+    Remove reference lists and bibliographies.
+
+    A list starts at its heading and ends at the next heading, # or bold, or
+    the next page separator. Only the lines of the list that look like
+    citations, i.e. numbered, bracketed or with authors and a year, are
+    removed, so body text after an unmarked end of the list is kept.
+
+    Returns:
+        Tuple[List[str], int]: The lines and the number of removed lines.
+    """
+    kept = []
+    removed = 0
+    in_references = False
+    for line in lines:
+        if REFERENCES_RE.match(line.strip()):
+            in_references = True
+            removed += 1
+            continue
+        if in_references and (HEADING_LINE_RE.match(line) or BOLD_LINE_RE.match(line)
+                              or PAGE_SEPARATOR_RE.fullmatch(f"\n{line}\n")):
+            in_references = False
+        if in_references and CITATION_RE.match(line):
+            removed += 1
+            continue
+        kept.append(line)
+    return kept, removed
+
+
+def collapse_whitespace(text: str) -> str:
+    """
+    Collapse runs of spaces within lines and runs of blank lines.
+    """
+    lines = [" ".join(line.split()) for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _shingles(words: List[str], size: int) -> Set[int]:
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+            for i in range(max(1, len(words) - size + 1))}
+
+
+def dedupe_paragraphs(text: str, threshold: float = 0.8, min_words: int = 8, shingle_size: int = 5,
+                      bands: int = 4) -> Tuple[str, int]:
+    """
+    Remove paragraphs that are near-duplicates of an earlier paragraph.
+
+    Paragraphs are compared by the Jaccard similarity of their word shingles.
+    Candidates are found with MinHash signatures and locality-sensitive hashing
+    over bands of the signature, so the work grows linearly with the text, and
+    are confirmed on the exact shingle sets. Short paragraphs, such as headings,
+    are always kept.
+
+    Args:
+        text (str): Markdown text with paragraphs separated by blank lines.
+        threshold (float): Minimum Jaccard similarity of a duplicate.
+        min_words (int): Paragraphs with fewer words are never removed.
+        shingle_size (int): Words per shingle.
+        bands (int): Bands of the signature. More bands find less similar candidates.
+
+    Returns:
+        Tuple[str, int]: The text and the number of removed paragraphs.
+    """
+    rows = len(_MINHASH_MASKS) // bands
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    kept_shingles: Dict[int, Set[int]] = {}
+    kept = []
+    removed = 0
+    for paragraph in text.split("\n\n"):
+        words = _WORD_RE.findall(paragraph.lower())
+        if len(words) < min_words or HEADING_LINE_RE.match(paragraph):
+            kept.append(paragraph)
+            continue
+
+        shingles = _shingles(words, shingle_size)
+        signature = [min(value ^ mask for value in shingles) for mask in _MINHASH_MASKS]
+        keys = [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(bands)]
+        candidates = {index for key in keys for index in buckets.get(key, ())}
+        if any(len(shingles & kept_shingles[index]) / len(shingles | kept_shingles[index]) >= threshold
+               for index in candidates):
+            removed += 1
+            continue
+
+        index = len(kept)
+        kept.append(paragraph)
+        kept_shingles[index] = shingles
+        for key in keys:
+            buckets.setdefault(key, []).append(index)
+    return "\n\n".join(kept), removed
+
+
+def preprocess_markdown(text: str) -> Tuple[str, PreprocessReport]:
+    """
+    Remove boilerplate from extracted markdown before it is sent to the model.
+
+    Running headers and footers, page numbers, tables of contents and reference
+    lists are removed, whitespace is collapsed and near-duplicate paragraphs are
+    dropped. Page separators are kept, so the text can still be split into
+    sections.
+
+    Args:
+        text (str): Markdown text, e.g. the output of pymupdf4llm.to_markdown.
+
+    Returns:
+        Tuple[str, PreprocessReport]: The cleaned text and a report of what was removed.
+    """
+    pages = PAGE_SEPARATOR_RE.split(text)
+    pages, running_lines, page_numbers = remove_running_lines(pages)
+    pages, toc_lines = remove_toc(pages)
+    lines, reference_lines = remove_references(PAGE_SEPARATOR.join(pages).split("\n"))
+    cleaned, duplicates = dedupe_paragraphs(collapse_whitespace("\n".join(lines)))
+    # Drop the pages that were all boilerplate
+    pages = [page.strip() for page in PAGE_SEPARATOR_RE.split(f"\n{cleaned}\n")]
+    cleaned = PAGE_SEPARATOR.join(page for page in pages if page)
+    return cleaned, PreprocessReport(text, cleaned, {
+        "running_lines": running_lines,
+        "page_numbers": page_numbers,
+        "toc_lines": toc_lines,
+        "reference_lines": reference_lines,
+        "duplicate_paragraphs": duplicates,
+    })
@@ -16,12 +16,12 @@ def get_ppt_prompt():
     "is_title_slide": "yes"
     }
     And here is the sample of json data for slides:
-    {"id": 2, title_text": "Slide 1 Title", "text": ["Bullet 1", "Bullet 2"]},
-    {"id": 3, title_text": "Slide 2 Title", "text": ["Bullet 1", "Bullet 2", "Bullet 3"]}
-    {"id": 4, title_text": "Slide 2 Title", 
-     "table": [[' ', '2022', '2021'],['Revenue (USD Million)','92,379','642,338',],
-     ['Operating profit (USD Million)', '6,071', '42,216',],
-     ['Operating margin', '6.6%', '6.6%', '19.1%', '8.1%', '9.1%']]
+    {"id": 2, "title_text": "Slide 1 Title", "text": ["Bullet 1", "Bullet 2"]},
+    {"id": 3, "title_text": "Slide 2 Title", "text": ["Bullet 1", "Bullet 2", "Bullet 3"]},
+    {"id": 4, "title_text": "Slide 3 Title",
+     "table": [[" ", "2022", "2021"], ["Revenue (USD Million)", "92,379", "642,338"],
+     ["Operating profit (USD Million)", "6,071", "42,216"],
+     ["Operating margin", "6.6%", "6.6%"]]
     }
 
     Please make sure the json object is correct and valid. 
@@ -29,4 +29,59 @@ def get_ppt_prompt():
 
     """
 
-    return PROMPT
\ No newline at end of file
+    return PROMPT
+
+def get_chunk_prompt(part: int, total: int):
+
+    PROMPT = f"""
+    The content below is part {part} of {total} of a longer document.
+    The slides generated for all parts will be merged into a single presentation,
+    so only summarize this part and do not repeat an introduction or conclusion for the whole document.
+    The first item in the list must still be a json object for the title slide of the whole presentation.
+    """
+
+    return PROMPT
+
+def get_outline_prompt():
+
+    PROMPT = """
+    Plan a powerpoint presentation for the numbered sections of the input text below.
+    Determine the needed number of slides based on the length of the text and agenda.
+    Return the response as an array of json objects, one per slide, without any bullet points.
+    The first item in the list must be a json object for the title slide.
+    Every other slide has a title and the numbers of the sections it summarizes.
+
+    This is a sample of such json array:
+    [
+    {"id": 1, "title_text": "My Presentation Title", "subtitle_text": "My presentation subtitle", "is_title_slide": "yes"},
+    {"id": 2, "title_text": "Slide 1 Title", "sections": [1, 2]},
+    {"id": 3, "title_text": "Slide 2 Title", "sections": [3]}
+    ]
+
+    Please make sure the json array is correct and valid.
+    Don't output explanation. I just need the JSON array as your output.
+
+    """
+
+    return PROMPT
+
+def get_slide_prompt(title: str):
+
+    PROMPT = f"""
+    Write the content of the slide "{title}" of a powerpoint presentation, using only the excerpt below.
+    Each key point in a slide should be limited to up to 10 words.
+    Consider maximum of 5 bullet points per slide.
+    If the excerpt contains figures best shown as a table, return a table instead of bullet points.
+    Return the response as a single json object.
+
+    This is a sample of such json object:
+    {{"title_text": "{title}", "text": ["Bullet 1", "Bullet 2", "Bullet 3"]}}
+    or, for a table:
+    {{"title_text": "{title}", "table": [[" ", "2022", "2021"], ["Revenue (USD Million)", "92,379", "642,338"]]}}
+
+    Please make sure the json object is correct and valid.
+    Don't output explanation. I just need the JSON object as your output.
+
+    """
+
+    return PROMPT
@@ -0,0 +1,277 @@
+import base64
+import json
+import os
+from html import escape
+from typing import Any, Dict, Iterator, List, Type
+
+from assets import get_asset_store
+from ppt import SlideDeck, reserve_path
+from slides import Deck, Slide, Table, TitleSlide
+
+REVEAL_URL = "https://cdn.jsdelivr.net/npm/reveal.js@5.1.0/dist"
+
+# Colors of the pptx tables, see ppt.HEADER_FILL, ppt.HEADER_FONT_COLOR and ppt.FIRST_COLUMN_FILL
+_TABLE_CSS = """
+.genslides table { border-collapse: collapse; font-size: 0.45em; margin: 0 auto; }
+.genslides th, .genslides td { border: 1px solid #bfbfbf; padding: 0.2em 0.5em; text-align: center; }
+.genslides th { background: #0070C0; color: #FFFFFF; }
+.genslides td:first-child { background: #E6E6E6; font-weight: bold; text-align: left; }
+.genslides img { max-height: 4in; }
+"""
+
+
+class Renderer:
+    """
+    Base class of the output formats of a deck.
+
+    Renderers work on the slide model of the slides module, so every format is
+    rendered from the same validated slides. Text formats are produced as a
+    stream of chunks by iter_render, so large decks can be written or sent
+    while they are rendered.
+    """
+
+    name = ""
+    extension = ""
+    mime = "application/octet-stream"
+
+    def iter_render(self, deck: Deck) -> Iterator[str]:
+        """
+        Yield the rendered deck in chunks, one or more per slide.
+        """
+        raise NotImplementedError
+
+    def render(self, deck: Deck) -> bytes:
+        """
+        Return the rendered deck.
+        """
+        return "".join(self.iter_render(deck)).encode("utf-8")
+
+    def file_name(self, deck: Deck) -> str:
+        """
+        Derive the file name of a rendered deck from its title, see SlideDeck.file_name.
+        """
+        stem, _ = os.path.splitext(SlideDeck.file_name(deck.title_slide.to_dict()))
+        return stem + self.extension
+
+    def save(self, deck: Deck, output_folder: str = "generated") -> str:
+        """
+        Render a deck into a new file of the output folder.
+
+        Args:
+            deck (Deck): The deck to render.
+            output_folder (str): The folder to save the file in.
+
+        Returns:
+            str: The file path of the saved deck.
+        """
+        path = reserve_path(output_folder, self.file_name(deck))
+        with open(path, "w", encoding="utf-8") as f:
+            for chunk in self.iter_render(deck):
+                f.write(chunk)
+        return path
+
+
+class HtmlRenderer(Renderer):
+    """
+    Render a deck as a reveal.js presentation in a single HTML page.
+
+    Args:
+        reveal: Load reveal.js from its CDN. Without it the slides are shown one
+            below the other, e.g. for a quick preview.
+        embed_images: Embed the images as data URIs, downsampled to their placed
+            size by the asset store, so the page is self-contained.
+    """
+
+    name = "html"
+    extension = ".html"
+    mime = "text/html"
+
+    def __init__(self, reveal: bool = True, embed_images: bool = True):
+        self.reveal = reveal
+        self.embed_images = embed_images
+
+    def iter_render(self, deck: Deck) -> Iterator[str]:
+        title = escape(deck.title_slide.title)
+        head = f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{title}</title>\n'
+        if self.reveal:
+            head += (f'<link rel="stylesheet" href="{REVEAL_URL}/reveal.css">\n'
+                     f'<link rel="stylesheet" href="{REVEAL_URL}/theme/white.css">\n')
+        yield head + f"<style>{_TABLE_CSS}</style>\n</head>\n<body>\n"
+        yield '<div class="reveal genslides"><div class="slides">\n' if self.reveal else '<div class="genslides">\n'
+        yield self.render_title_slide(deck.title_slide)
+        for slide in deck:
+            yield self.render_slide(slide)
+        yield "</div></div>\n" if self.reveal else "</div>\n"
+        if self.reveal:
+            yield f'<script src="{REVEAL_URL}/reveal.js"></script>\n<script>Reveal.initialize({{hash: true}});</script>\n'
+        yield "</body>\n</html>\n"
+
+    @staticmethod
+    def render_title_slide(slide: TitleSlide) -> str:
+        subtitle = f"<p>{escape(slide.subtitle)}</p>" if slide.subtitle else ""
+        return f"<section><h1>{escape(slide.title)}</h1>{subtitle}</section>\n"
+
+    def render_slide(self, slide: Slide) -> str:
+        """
+        Return the section element of a content slide.
+        """
+        parts = [f"<section><h2>{escape(slide.title)}</h2>"]
+        if slide.bullets:
+            sub_bullet = f"<ul><li>{_html_text(slide.sub_bullet)}</li></ul>" if slide.sub_bullet is not None else ""
+            parts.append("<ul>" + "".join(f"<li>{_html_text(bullet)}{sub_bullet}</li>" for bullet in slide.bullets)
+                         + "</ul>")
+        for path in slide.images:
+            parts.append(f'<img src="{escape(self.image_src(path))}" alt="">')
+        if slide.table is not None:
+            parts.append(self.render_table(slide.table))
+        parts.append("</section>\n")
+        return "".join(parts)
+
+    @staticmethod
+    def render_table(table: Table) -> str:
+        header, *rows = table.padded_rows()
+        cells = "".join(f"<th>{_html_text(cell)}</th>" for cell in header)
+        body = "".join("<tr>" + "".join(f"<td>{_html_text(cell)}</td>" for cell in row) + "</tr>" for row in rows)
+        return f"<table><thead><tr>{cells}</tr></thead><tbody>{body}</tbody></table>"
+
+    def image_src(self, path: str) -> str:
+        if not self.embed_images:
+            return path
+        try:
+            prepared = get_asset_store().prepare(path, height=4)
+        except FileNotFoundError:
+            print(f"Warning: Image file not found: {path}")
+            return path
+        with open(prepared, "rb") as f:
+            data = base64.b64encode(f.read()).decode("ascii")
+        mime = "image/jpeg" if prepared.lower().endswith((".jpg", ".jpeg")) else "image/png"
+        return f"data:{mime};base64,{data}"
+
+
+def _html_text(text: str) -> str:
+    return escape(text).replace("\n", "<br>")
+
+
+class MarpRenderer(Renderer):
+    """
+    Render a deck as Marp markdown, which Marp turns into HTML, PDF or pptx.
+    """
+
+    name = "marp"
+    extension = ".md"
+    mime = "text/markdown"
+
+    def iter_render(self, deck: Deck) -> Iterator[str]:
+        title_slide = deck.title_slide
+        yield "---\nmarp: true\npaginate: true\n---\n\n<!-- _class: lead -->\n\n"
+        yield f"# {_inline(title_slide.title)}\n\n" + (f"{_inline(title_slide.subtitle)}\n" if title_slide.subtitle else "")
+        for slide in deck:
+            yield "\n---\n\n" + self.render_slide(slide)
+
+    @staticmethod
+    def render_slide(slide: Slide) -> str:
+        lines = [f"## {_inline(slide.title)}", ""]
+        for bullet in slide.bullets:
+            lines.append(f"- {_markdown_text(bullet, 2)}")
+            if slide.sub_bullet is not None:
+                lines.append(f"  - {_markdown_text(slide.sub_bullet, 4)}")
+        if slide.bullets:
+            lines.append("")
+        for path in slide.images:
+            lines += [f"![h:4in]({path})", ""]
+        if slide.table is not None:
+            header, *rows = slide.table.padded_rows()
+            lines.append("| " + " | ".join(_cell(cell) for cell in header) + " |")
+            lines.append("|" + "---|" * len(header))
+            lines += ["| " + " | ".join(_cell(cell) for cell in row) + " |" for row in rows]
+            lines.append("")
+        return "\n".join(lines)
+
+
+def _inline(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _markdown_text(text: str, indent: int) -> str:
+    """
+    Keep the line breaks of a list item as hard breaks inside the item.
+    """
+    return ("  \n" + " " * indent).join(text.splitlines() or [""])
+
+
+def _cell(text: str) -> str:
+    return text.replace("|", "\\|").replace("\n", "<br>")
+
+
+class JsonRenderer(Renderer):
+    """
+    Export a deck as slide JSON, title slide first, the format the pipeline generates and renders.
+    """
+
+    name = "json"
+    extension = ".json"
+    mime = "application/json"
+
+    def iter_render(self, deck: Deck) -> Iterator[str]:
+        yield json.dumps(deck.to_dicts(), ensure_ascii=False, indent=2)
+
+
+class PptxRenderer(Renderer):
+    """
+    Render a deck as a PowerPoint presentation with SlideDeck.
+    """
+
+    name = "pptx"
+    extension = ".pptx"
+    mime = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+    def render(self, deck: Deck) -> bytes:
+        content = deck.to_dicts()
+        return SlideDeck().create_presentation(content[0], content[1:], in_memory=True)
+
+    def save(self, deck: Deck, output_folder: str = "generated") -> str:
+        content = deck.to_dicts()
+        return SlideDeck(output_folder).create_presentation(content[0], content[1:])
+
+
+# Output formats by name
+RENDERERS: Dict[str, Type[Renderer]] = {
+    "pptx": PptxRenderer,
+    "html": HtmlRenderer,
+    "marp": MarpRenderer,
+    "json": JsonRenderer,
+}
+
+
+def get_renderer(name: str, **options: Any) -> Renderer:
+    """
+    Return a renderer of an output format.
+
+    Args:
+        name (str): Name of the format in RENDERERS.
+        **options: Keyword arguments for the renderer class, e.g. reveal for html.
+
+    Returns:
+        Renderer: The renderer.
+
+    Raises:
+        ValueError: If the format is not in RENDERERS.
+    """
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown output format '{name}'. Expected one of {tuple(RENDERERS)}.")
+    return RENDERERS[name](**options)
+
+
+def render_slides(content: List[Dict[str, Any]], name: str, **options: Any) -> bytes:
+    """
+    Render slide JSON, title slide first, in an output format.
+
+    Args:
+        content (List[Dict[str, Any]]): The slides, see parsing.validate_slides.
+        name (str): Name of the format in RENDERERS.
+        **options: Keyword arguments for the renderer class.
+
+    Returns:
+        bytes: The rendered deck.
+    """
+    return get_renderer(name, **options).render(Deck.from_dicts(content))
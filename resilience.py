@@ -0,0 +1,353 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Any, AsyncContextManager, Awaitable, Callable, ContextManager, Optional, Tuple
+
+
+class ModelError(Exception):
+    """
+    A model call failed.
+    """
+
+
+class TransientModelError(ModelError):
+    """
+    A model call failed in a way that is worth retrying, e.g. a rate limit or a 5xx error.
+    """
+
+
+class ModelTimeoutError(TransientModelError):
+    """
+    A model call did not finish before its deadline.
+    """
+
+
+class CircuitOpenError(ModelError):
+    """
+    The backend failed repeatedly and calls are rejected until it has had time to recover.
+    """
+
+
+# HTTP status codes and google.api_core exception names of retryable errors
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "Aborted", "Unavailable",
+    "TimeoutError", "ConnectionError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError",
+}
+
+
+def classify_error(error: BaseException) -> ModelError:
+    """
+    Map an exception raised by a backend to a typed model error.
+
+    Args:
+        error (BaseException): The exception raised by the backend client.
+
+    Returns:
+        ModelError: A TransientModelError for retryable errors, a ModelError otherwise.
+    """
+    if isinstance(error, ModelError):
+        return error
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return ModelTimeoutError(str(error) or "Model call timed out")
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)
+    if isinstance(code, tuple):
+        code = code[0]
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if code in TRANSIENT_STATUS_CODES or names & TRANSIENT_ERROR_NAMES or isinstance(error, ConnectionError):
+        return TransientModelError(f"{type(error).__name__}: {error}")
+    return ModelError(f"{type(error).__name__}: {error}")
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        max_attempts: Maximum number of attempts, including the first one.
+        base_delay: Upper bound of the delay after the first failure, in seconds.
+        max_delay: Cap of the delay upper bound, in seconds.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """
+        Return the delay before the next attempt after the given failed attempt (1-based).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated failures of a backend.
+
+    After failure_threshold consecutive failures the circuit opens and calls are
+    rejected with CircuitOpenError. After reset_timeout seconds a single trial
+    call is let through: success closes the circuit, failure opens it again.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit.
+        reset_timeout: Seconds to wait before letting a trial call through.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> None:
+        """
+        Check that a call may go through.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with a trial call running.
+        """
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return
+        raise CircuitOpenError("Model backend is unavailable, failing fast after repeated errors")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def record(self, error: Optional[BaseException] = None) -> None:
+        """
+        Record the outcome of a call.
+
+        Only transient errors count as failures. Any other outcome, including a
+        rejected request, shows that the backend is reachable.
+
+        Args:
+            error (Optional[BaseException]): The error of the call, None if it succeeded.
+        """
+        if isinstance(error, TransientModelError):
+            self.record_failure()
+        else:
+            self.record_success()
+
+
+class LatencyTracker:
+    """
+    Keeps a window of recent call latencies to derive the hedging threshold.
+
+    Args:
+        window: Number of latencies to keep.
+    """
+
+    def __init__(self, window: int = 200):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """
+        Return the q-quantile of the recent latencies, or None with too few samples.
+        """
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+
+# Runs calls with a deadline or a hedge, the calling thread waits on the futures
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="genslides-call")
+
+
+class ResilientCaller:
+    """
+    Calls a model backend with retries, deadlines, hedging and a circuit breaker.
+
+    Each attempt gets its own deadline. Transient errors are retried with
+    exponential backoff and jitter, other errors are raised right away. With
+    hedging enabled, a second request is sent when the first one takes longer
+    than the p95 latency of recent calls, and the first response wins.
+
+    Args:
+        retry: The retry policy. Defaults to 3 attempts.
+        breaker: The circuit breaker. Defaults to a new breaker.
+        timeout: Deadline of each attempt in seconds. None for no deadline.
+        hedge: Whether to send hedged requests.
+        hedge_quantile: Latency quantile after which a hedged request is sent.
+    """
+
+    def __init__(self,
+                 retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 timeout: Optional[float] = 120.0,
+                 hedge: bool = False,
+                 hedge_quantile: float = 0.95,
+                 ):
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.latencies = LatencyTracker()
+
+    def call(self, fn: Callable[..., Any], *args: Any, limiter: Optional[ContextManager] = None) -> Tuple[Any, int]:
+        """
+        Call fn(*args) with the resilience policies.
+
+        Args:
+            fn (Callable): The backend call.
+            *args: Its arguments.
+            limiter (Optional[ContextManager]): Held by the calling thread during each attempt,
+                e.g. a KeyLimiter. It is released when the deadline of the attempt passes, even
+                if the backend call goes on in its worker thread.
+
+        Returns:
+            Tuple[Any, int]: The result and the number of attempts it took.
+
+        Raises:
+            ModelError: The typed error of the last attempt.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            start = time.monotonic()
+            try:
+                with limiter or nullcontext():
+                    result = self._attempt(fn, *args)
+            except Exception as e:
+                error = classify_error(e)
+                self.breaker.record(error)
+                if not isinstance(error, TransientModelError) or attempt >= self.retry.max_attempts:
+                    raise error from e
+                time.sleep(self.retry.delay(attempt))
+                continue
+            self.latencies.add(time.monotonic() - start)
+            self.breaker.record_success()
+            return result, attempt
+
+    def _attempt(self, fn: Callable[..., Any], *args: Any) -> Any:
+        hedge_after = self.latencies.quantile(self.hedge_quantile) if self.hedge else None
+        if self.timeout is None and hedge_after is None:
+            return fn(*args)
+
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        futures = {_executor.submit(fn, *args)}
+        if hedge_after is not None:
+            done, _ = wait(futures, timeout=self._remaining(deadline, hedge_after))
+            if not done and not self._expired(deadline):
+                futures.add(_executor.submit(fn, *args))
+
+        error = None
+        while futures:
+            done, futures = wait(futures, timeout=self._remaining(deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        if error is not None and not futures:
+            raise error
+        raise ModelTimeoutError(f"Model call did not finish within {self.timeout} seconds")
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args: Any,
+                    limiter: Optional[AsyncContextManager] = None) -> Tuple[Any, int]:
+        """
+        Await fn(*args) with the resilience policies.
+
+        Args:
+            fn (Callable): The async backend call.
+            *args: Its arguments.
+            limiter (Optional[AsyncContextManager]): Held during each attempt, e.g. a KeyLimiter.
+
+        Returns:
+            Tuple[Any, int]: The result and the number of attempts it took.
+
+        Raises:
+            ModelError: The typed error of the last attempt.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            start = time.monotonic()
+            try:
+                async with limiter or nullcontext():
+                    result = await asyncio.wait_for(self._aattempt(fn, *args), self.timeout)
+            except Exception as e:
+                error = classify_error(e)
+                self.breaker.record(error)
+                if not isinstance(error, TransientModelError) or attempt >= self.retry.max_attempts:
+                    raise error from e
+                await asyncio.sleep(self.retry.delay(attempt))
+                continue
+            self.latencies.add(time.monotonic() - start)
+            self.breaker.record_success()
+            return result, attempt
+
+    async def _aattempt(self, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        hedge_after = self.latencies.quantile(self.hedge_quantile) if self.hedge else None
+        if hedge_after is None:
+            return await fn(*args)
+
+        tasks = {asyncio.ensure_future(fn(*args))}
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done:
+            tasks.add(asyncio.ensure_future(fn(*args)))
+        error = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _remaining(deadline: Optional[float], limit: Optional[float] = None) -> Optional[float]:
+        if deadline is None:
+            return limit
+        remaining = max(0.0, deadline - time.monotonic())
+        return remaining if limit is None else min(remaining, limit)
+
+    @staticmethod
+    def _expired(deadline: Optional[float]) -> bool:
+        return deadline is not None and time.monotonic() >= deadline
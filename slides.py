@@ -0,0 +1,156 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Table:
+    """
+    A table, its first row is the header.
+
+    Args:
+        rows: The rows of cells as text. Rows shorter than the widest row are
+            padded the way SlideDeck.add_table does: one empty cell in front,
+            then empty cells at the end.
+    """
+
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: List[List[str]]):
+        self.rows = rows
+
+    @property
+    def columns(self) -> int:
+        return max((len(row) for row in self.rows), default=0)
+
+    def padded_rows(self) -> List[List[str]]:
+        """
+        Return the rows padded to the same number of cells.
+        """
+        columns = self.columns
+        padded = []
+        for row in self.rows:
+            if len(row) < columns:
+                row = ["", *row]
+            padded.append(row + [""] * (columns - len(row)))
+        return padded
+
+
+class Slide:
+    """
+    A content slide: a title, bullets, an optional sub-bullet repeated under
+    every bullet (p1 in the slide JSON), images and a table.
+
+    Args:
+        title: The title of the slide.
+        bullets: The bullet points.
+        sub_bullet: Text shown indented under each bullet.
+        images: Paths of the images.
+        table: The table, if any.
+        id: The id of the slide in the model response.
+    """
+
+    __slots__ = ("title", "bullets", "sub_bullet", "images", "table", "id")
+
+    def __init__(self, title: str = "", bullets: Optional[List[str]] = None, sub_bullet: Optional[str] = None,
+                 images: Optional[List[str]] = None, table: Optional[Table] = None, id: Optional[int] = None):
+        self.title = title
+        self.bullets = bullets or []
+        self.sub_bullet = sub_bullet
+        self.images = images or []
+        self.table = table
+        self.id = id
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Slide":
+        """
+        Build a slide from validated slide JSON, see parsing.validate_slides.
+        """
+        return cls(
+            title=str(data.get("title_text", "")),
+            bullets=[str(bullet) for bullet in data.get("text", [])],
+            sub_bullet=str(data["p1"]) if "p1" in data else None,
+            images=list(data.get("img_path", [])),
+            table=Table([[str(cell) for cell in row] for row in data["table"]]) if data.get("table") else None,
+            id=data.get("id"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {} if self.id is None else {"id": self.id}
+        data["title_text"] = self.title
+        if self.bullets:
+            data["text"] = self.bullets
+        if self.sub_bullet is not None:
+            data["p1"] = self.sub_bullet
+        if self.images:
+            data["img_path"] = self.images
+        if self.table is not None:
+            data["table"] = self.table.rows
+        return data
+
+
+class TitleSlide:
+    """
+    The title slide of a deck.
+
+    Args:
+        title: The title of the presentation.
+        subtitle: The subtitle.
+        id: The id of the slide in the model response.
+    """
+
+    __slots__ = ("title", "subtitle", "id")
+
+    def __init__(self, title: str = "", subtitle: str = "", id: Optional[int] = None):
+        self.title = title
+        self.subtitle = subtitle
+        self.id = id
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TitleSlide":
+        return cls(str(data.get("title_text", "")), str(data.get("subtitle_text", "")), data.get("id"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {} if self.id is None else {"id": self.id}
+        data["title_text"] = self.title
+        if self.subtitle:
+            data["subtitle_text"] = self.subtitle
+        return data
+
+
+class Deck:
+    """
+    A presentation: a title slide and the content slides, independent of the output format.
+
+    Args:
+        title_slide: The title slide.
+        slides: The content slides.
+    """
+
+    __slots__ = ("title_slide", "slides")
+
+    def __init__(self, title_slide: TitleSlide, slides: Optional[List[Slide]] = None):
+        self.title_slide = title_slide
+        self.slides = slides or []
+
+    @classmethod
+    def from_dicts(cls, content: List[Dict[str, Any]]) -> "Deck":
+        """
+        Build a deck from slide JSON, title slide first.
+
+        Raises:
+            ValueError: If there is no title slide.
+        """
+        if not content:
+            raise ValueError("A deck needs at least a title slide")
+        title_slide, *slides = content
+        return cls(TitleSlide.from_dict(title_slide), [Slide.from_dict(slide) for slide in slides])
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Return the slide JSON of the deck, title slide first.
+        """
+        return [self.title_slide.to_dict()] + [slide.to_dict() for slide in self.slides]
+
+    def __iter__(self) -> Iterator[Slide]:
+        return iter(self.slides)
+
+    def __len__(self) -> int:
+        return len(self.slides) + 1
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the response, markdown and asset caches of the tests out of the cache folder of the user
+os.environ["GENSLIDES_CACHE_DIR"] = tempfile.mkdtemp(prefix="genslides-tests-")
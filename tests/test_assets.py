@@ -0,0 +1,76 @@
+import io
+import os
+
+from PIL import Image, ImageDraw
+
+from assets import AssetStore
+
+
+def make_photo(width: int = 1600, height: int = 1200) -> bytes:
+    noise = Image.effect_noise((width, height), 40)
+    image = Image.merge("RGB", [noise, Image.linear_gradient("L").resize((width, height)), noise])
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def make_chart() -> bytes:
+    image = Image.new("RGB", (1200, 800), "white")
+    ImageDraw.Draw(image).rectangle([100, 300, 400, 700], fill=(0, 112, 192))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_prepare_downsamples_to_the_placed_size(tmp_path):
+    store = AssetStore(cache_dir=str(tmp_path), dpi=100)
+    path = store.prepare(make_photo(), width=4)
+
+    with Image.open(path) as image:
+        assert image.format == "JPEG"
+        assert image.size == (400, 300)
+
+
+def test_prepare_keeps_flat_images_as_png(tmp_path):
+    path = AssetStore(cache_dir=str(tmp_path), dpi=100).prepare(make_chart(), width=6)
+
+    assert path.endswith(".png")
+    with Image.open(path) as image:
+        assert image.size == (600, 400)
+
+
+def test_prepare_deduplicates_by_content_and_size(tmp_path):
+    store = AssetStore(cache_dir=str(tmp_path), dpi=100)
+    photo = make_photo()
+    source = tmp_path / "photo.jpg"
+    source.write_bytes(photo)
+
+    assert store.prepare(photo, width=4) == store.prepare(str(source), width=4)
+    assert store.prepare(photo, width=4) != store.prepare(photo, width=2)
+
+
+def test_prepare_returns_undecodable_files_unchanged(tmp_path, capsys):
+    source = tmp_path / "broken.png"
+    source.write_bytes(b"not an image")
+
+    assert AssetStore(cache_dir=str(tmp_path / "cache")).prepare(str(source)) == str(source)
+    assert "Could not process image" in capsys.readouterr().out
+    assert not os.path.exists(tmp_path / "cache")
+
+
+def test_extract_figures_skips_repeated_images(tmp_path):
+    import fitz  # PyMuPDF
+
+    document = fitz.open()
+    chart = make_chart()
+    for page in range(3):
+        pdf_page = document.new_page()
+        pdf_page.insert_text((72, 72), f"Page {page + 1} about the chart")
+        pdf_page.insert_image(fitz.Rect(72, 100, 372, 300), stream=chart)
+    pdf = document.tobytes()
+    store = AssetStore(cache_dir=str(tmp_path))
+
+    figures = store.extract_figures(pdf)
+
+    assert [figure.page for figure in figures] == [0]
+    assert [figure.path for figure in store.extract_figures(pdf)] == [figures[0].path]
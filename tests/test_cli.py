@@ -0,0 +1,70 @@
+import io
+import json
+import os
+
+import pytest
+from pptx import Presentation
+
+from fake_llm import register_fake_model
+from genslides import cli
+from manifest import manifest_path
+
+TEXT = "\n\n".join(f"## Section {i}\n\n" + f"Findings about topic {i}. " * 20 for i in range(4))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "report.md"
+    path.write_text(TEXT, encoding="utf-8")
+    return path
+
+
+def test_build_writes_the_output(source, tmp_path, capsys):
+    register_fake_model("test_cli", n_slides=3)
+    output = tmp_path / "out" / "deck.json"
+
+    status = cli.main(["build", str(source), "-o", str(output), "--format", "json", "--model", "test_cli",
+                       "--no-cache", "--trace"])
+
+    out, err = capsys.readouterr()
+    assert status == 0
+    assert out.strip() == str(output)
+    assert len(json.loads(output.read_bytes())) == 1 + 3
+    assert "stages" in json.loads(err.strip().splitlines()[-1])
+
+
+def test_build_reads_stdin(monkeypatch, tmp_path, capsys):
+    register_fake_model("test_cli_stdin", n_slides=2)
+    monkeypatch.setattr("sys.stdin", io.StringIO(TEXT))
+    output = tmp_path / "deck.md"
+
+    assert cli.main(["build", "-", "-o", str(output), "--format", "marp", "--model", "test_cli_stdin",
+                     "--no-cache"]) == 0
+    assert output.read_text(encoding="utf-8").startswith("---\nmarp: true")
+
+
+def test_build_updates_an_outline_deck(source, tmp_path, capsys):
+    register_fake_model("test_cli_update", n_slides=3)
+    deck = tmp_path / "deck.pptx"
+    common = ["--mode", "outline", "--model", "test_cli_update", "--no-cache"]
+
+    assert cli.main(["build", str(source), "-o", str(deck)] + common) == 0
+    assert os.path.exists(manifest_path(str(deck)))
+
+    source.write_text(TEXT.replace("topic 2.", "topic two."), encoding="utf-8")
+    updated = tmp_path / "updated.pptx"
+    assert cli.main(["build", str(source), "--update", str(deck), "-o", str(updated)] + common) == 0
+    assert len(Presentation(str(updated)).slides) == len(Presentation(str(deck)).slides)
+
+
+def test_build_fails_without_a_deck(source, capsys):
+    register_fake_model("test_cli_error", response="Sorry, I cannot help with that.")
+
+    assert cli.main(["build", str(source), "--model", "test_cli_error", "--no-cache"]) == 1
+
+
+def test_invalid_arguments_exit(capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["build", "report.md", "--mode", "fast"])
+    with pytest.raises(SystemExit):
+        cli.main([])
@@ -0,0 +1,34 @@
+import threading
+
+import fitz  # PyMuPDF
+
+import extraction
+from extraction import MarkdownExtractor, get_process_pool
+
+
+def make_pdf(num_pages: int) -> bytes:
+    document = fitz.open()
+    for number in range(num_pages):
+        document.new_page().insert_text((72, 72), f"Findings of page {number + 1}")
+    return document.tobytes()
+
+
+def test_threads_extract_in_the_shared_pool(tmp_path):
+    pdf = make_pdf(8)
+    results = {}
+
+    def extract(n):
+        extractor = MarkdownExtractor(cache_dir=str(tmp_path / str(n)), max_workers=4, min_parallel_pages=2)
+        results[n] = extractor.extract_pages(pdf, list(range(8)))
+
+    threads = [threading.Thread(target=extract, args=(n,)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 3
+    for pages in results.values():
+        assert [f"page {number + 1}" in text for number, text in enumerate(pages)] == [True] * 8
+    assert get_process_pool() is extraction._process_pool
+    assert get_process_pool()._mp_context.get_start_method() == "spawn"
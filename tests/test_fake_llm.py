@@ -0,0 +1,12 @@
+from fake_llm import register_fake_model
+from genppt import GenPPT
+
+
+def test_fake_models_do_not_share_cached_responses():
+    counts = []
+    for n_slides in (2, 5):
+        register_fake_model("test_cached", n_slides=n_slides)
+        pp = GenPPT(text="The same text", model_name="test_cached", in_memory=True, use_cache=True)
+        assert pp.run() is not None
+        counts.append(len(pp.slides))
+    assert counts == [3, 6]
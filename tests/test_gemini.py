@@ -0,0 +1,14 @@
+import pytest
+
+import gemini
+from gemini import GeminiModel
+
+
+def test_gemini_model_refuses_a_second_api_key(monkeypatch):
+    monkeypatch.setattr(gemini, "_genai_configured", False)
+    monkeypatch.setattr(gemini, "_genai_api_key", None)
+
+    GeminiModel(API_KEY="first-key", use_cache=False)
+    GeminiModel(API_KEY="first-key", use_cache=False)
+    with pytest.raises(ValueError, match="another API key"):
+        GeminiModel(API_KEY="second-key", use_cache=False)
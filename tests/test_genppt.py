@@ -0,0 +1,96 @@
+import asyncio
+import os
+
+from pptx.presentation import Presentation
+
+from fake_llm import register_fake_model
+from genppt import GenPPT, generate_many
+from manifest import manifest_path
+
+TEXT = "\n\n".join(f"## Section {i}\n\n" + f"Content about topic {i}. " * 30 for i in range(6))
+
+
+def test_arun_outline_matches_run():
+    register_fake_model("test_outline", n_slides=4)
+    sync = GenPPT(text=TEXT, model_name="test_outline", mode="outline", in_memory=True, use_cache=False)
+    assert sync.run() is not None
+    concurrent = GenPPT(text=TEXT, model_name="test_outline", mode="outline", in_memory=True, use_cache=False)
+    assert asyncio.run(concurrent.arun()) is not None
+
+    assert concurrent.slides == sync.slides
+    assert concurrent.manifest.slide_hashes() == sync.manifest.slide_hashes()
+
+
+def test_arun_prepares_text_like_run():
+    register_fake_model("test_prepare", n_slides=2)
+    text = "\n\n-----\n\n".join(f"Annual report\n\nPage {page} body text.\n\n{page}" for page in range(1, 6))
+    sync = GenPPT(text=text, model_name="test_prepare", in_memory=True, use_cache=False)
+    sync.run()
+    concurrent = GenPPT(text=text, model_name="test_prepare", in_memory=True, use_cache=False)
+    asyncio.run(concurrent.arun())
+
+    assert concurrent.text == sync.text
+    assert asyncio.run(GenPPT(model_name="test_prepare").arun()) is None
+
+
+def test_update_saves_a_bytes_deck_once(tmp_path, monkeypatch):
+    register_fake_model("test_update", n_slides=4)
+    pp = GenPPT(text=TEXT, model_name="test_update", mode="outline", in_memory=True, use_cache=False)
+    deck = pp.run()
+    saved = []
+    save = Presentation.save
+    monkeypatch.setattr(Presentation, "save", lambda prs, file: saved.append(file) or save(prs, file))
+    monkeypatch.chdir(tmp_path)
+
+    edited = TEXT.replace("Content about topic 2.", "Revised content about topic 2.")
+    path = GenPPT(text=edited, model_name="test_update", mode="outline", use_cache=False).update(deck, pp.manifest)
+
+    assert saved == [path]
+    assert os.path.exists(manifest_path(path))
+
+
+def test_update_keeps_the_outline_only_for_the_same_document():
+    register_fake_model("test_update_source", n_slides=4)
+    pp = GenPPT(text=TEXT, model_name="test_update_source", mode="outline", in_memory=True, use_cache=False)
+    deck = pp.run()
+    manifest = pp.manifest
+    manifest.title_slide = dict(manifest.title_slide, title_text="Old deck")
+
+    def updated_title(text, **options):
+        update = GenPPT(text=text, model_name="test_update_source", mode="outline", in_memory=True,
+                        use_cache=False, **options)
+        assert update.update(deck, manifest) is not None
+        return update.slides[0]["title_text"]
+
+    unrelated = "\n\n".join(f"## Chapter {i}\n\n" + f"Other subject {i}. " * 30 for i in range(6))
+    assert updated_title(TEXT.replace("topic 2.", "topic two.")) == "Old deck"
+    assert updated_title(unrelated) != "Old deck"
+    assert updated_title(TEXT, document_key="digest of another pdf") != "Old deck"
+
+
+def test_failed_runs_keep_the_error():
+    register_fake_model("test_error", n_slides=2)
+    pp = GenPPT(model_name="test_error", in_memory=True, use_cache=False)
+
+    assert pp.run_streaming() is None
+    assert isinstance(pp.error, ValueError)
+    pp.output_format = "json"
+    assert pp.update(b"deck") is None
+    assert "Only pptx decks can be updated" in str(pp.error)
+    pp.output_format = "pptx"
+
+    pp.text = TEXT
+    assert pp.run() is not None
+    assert pp.error is None
+
+
+def test_generate_many_fails_only_the_invalid_job():
+    register_fake_model("test_many", n_slides=2)
+    jobs = [{"text": TEXT, "model_name": "test_many", "in_memory": True, "use_cache": False},
+            {"text": TEXT, "model_name": "test_many", "mode": "unknown"},
+            {"text": TEXT, "model_name": "test_many", "output_format": "json", "in_memory": True, "use_cache": False}]
+
+    first, invalid, last = generate_many(jobs, processes=1)
+
+    assert first is not None and last is not None
+    assert invalid is None
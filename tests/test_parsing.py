@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from fake_llm import make_malformed_responses, make_slides, register_fake_model
+from genppt import GenPPT
+from parsing import extract_slides
+
+SLIDES = make_slides(3)
+BARE_OBJECTS = ",\n".join(json.dumps(slide) for slide in SLIDES)
+CORPUS = make_malformed_responses(20)
+
+
+@pytest.mark.parametrize("response", [BARE_OBJECTS, f"Here you go:\n{BARE_OBJECTS}"], ids=["bare", "chatter"])
+def test_streaming_repairs_bare_objects_like_run(response):
+    register_fake_model("test_bare", response=response, chunk_size=16)
+    streamed = []
+    pp = GenPPT(text="Some text", model_name="test_bare", in_memory=True, use_cache=False)
+    assert pp.run_streaming(on_slide=streamed.append) is not None
+    assert [slide["title_text"] for slide in streamed] == [slide["title_text"] for slide in SLIDES]
+    assert GenPPT(text="Some text", model_name="test_bare", in_memory=True, use_cache=False).run() is not None
+
+
+@pytest.mark.parametrize("response", [f"Sure [see below]:\n```json\n{json.dumps(SLIDES)}\n```",
+                                      f"Notes [1] and {{2}}: {json.dumps(SLIDES)}"], ids=["fenced", "unfenced"])
+def test_brackets_in_chatter_do_not_hide_the_array(response):
+    register_fake_model("test_bracket_chatter", response=response, chunk_size=16)
+    streamed = []
+    pp = GenPPT(text="Some text", model_name="test_bracket_chatter", in_memory=True, use_cache=False)
+    assert pp.run_streaming(on_slide=streamed.append) is not None
+    assert [slide["title_text"] for slide in streamed] == [slide["title_text"] for slide in SLIDES]
+    assert extract_slides(response)[0] == SLIDES
+
+
+
+@pytest.mark.parametrize("case,response,expected", CORPUS, ids=[case for case, _, _ in CORPUS])
+def test_extract_slides_recovers_malformed_responses(case, response, expected):
+    slides, _ = extract_slides(response)
+    assert len(slides) == expected
+    assert all(slide["title_text"] for slide in slides)
+
+
+@pytest.mark.parametrize("case,response,expected", CORPUS, ids=[case for case, _, _ in CORPUS])
+def test_streaming_recovers_malformed_responses(case, response, expected):
+    register_fake_model(f"test_corpus_{case}", response=response, chunk_size=64)
+    streamed = []
+    pp = GenPPT(text="Some text", model_name=f"test_corpus_{case}", in_memory=True, use_cache=False)
+    assert pp.run_streaming(on_slide=streamed.append) is not None
+    assert len(streamed) == expected
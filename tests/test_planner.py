@@ -0,0 +1,38 @@
+from planner import plan_budget, truncate_to_budget
+from preprocess import PAGE_SEPARATOR
+from tokens import estimate_tokens
+
+TOPICS = ["revenue and sales", "hiring and staff", "energy and emissions", "pricing and margins"]
+TEXT = PAGE_SEPARATOR.join(
+    f"## {topic.title()}\n\n" + f"This section covers {topic} in detail. " * 40 for topic in TOPICS
+)
+
+
+def test_text_within_budget_is_unchanged():
+    text, plan = plan_budget(TEXT, "Generic", estimate_tokens(TEXT))
+
+    assert text == TEXT
+    assert plan.tokens_dropped == 0
+
+
+def test_selects_the_units_matching_the_agenda():
+    text, plan = plan_budget(TEXT, "Emissions", 600)
+
+    assert plan.tokens_selected <= 600
+    assert estimate_tokens(text) <= 600
+    assert "energy and emissions" in text
+    assert "hiring and staff" not in text
+
+
+def test_truncates_the_best_unit_when_none_fits():
+    text = "Revenue grew strongly in every region this year. " * 40
+    selected, plan = plan_budget(text, "Revenue", 10)
+
+    assert selected and text.startswith(selected)
+    assert 0 < estimate_tokens(selected) <= 10
+    assert plan.selected == [0]
+
+
+def test_truncate_to_budget_cuts_at_a_word_boundary():
+    assert truncate_to_budget("alpha beta gamma delta", 4) == "alpha beta"
+    assert truncate_to_budget("short", 10) == "short"
@@ -0,0 +1,79 @@
+from preprocess import PAGE_SEPARATOR, preprocess_markdown
+
+
+def make_pages(n_pages: int) -> str:
+    return PAGE_SEPARATOR.join(
+        f"Annual Report 2022 | Example Corp\n\n## Chapter {page}\n\nBody of chapter {page} about topic {page}.\n\n- {page} -"
+        for page in range(1, n_pages + 1)
+    )
+
+
+def test_removes_running_headers_and_page_numbers():
+    cleaned, report = preprocess_markdown(make_pages(6))
+
+    assert "Annual Report" not in cleaned
+    assert "- 3 -" not in cleaned
+    assert report.removed["running_lines"] == 6
+    assert report.removed["page_numbers"] == 6
+    assert report.tokens_saved > 0
+
+
+def test_keeps_numbered_headings():
+    cleaned, _ = preprocess_markdown(make_pages(6))
+
+    assert [f"## Chapter {page}" in cleaned for page in range(1, 7)] == [True] * 6
+
+
+def test_keeps_numbers_of_a_single_page():
+    text = "1\n\nRevenue grew.\n\n2\n\nCosts fell.\n\n2022"
+    cleaned, report = preprocess_markdown(text)
+
+    assert cleaned == text
+    assert report.removed["page_numbers"] == 0
+
+
+def test_keeps_numbers_off_the_page_sequence():
+    text = PAGE_SEPARATOR.join("Results of the year.\n\nSales were up.\n\n2022" for _ in range(5))
+    cleaned, report = preprocess_markdown(text)
+
+    assert report.removed["page_numbers"] == 0
+    assert cleaned.count("2022") == 5
+
+
+def test_removes_toc_and_references():
+    text = PAGE_SEPARATOR.join([
+        "## Contents\n\nIntroduction ..... 2\nMethods ..... 3\nResults ..... 4",
+        "## Introduction\n\nThe study looks at pricing.\n\n## References\n\nSmith, J. (2020). Pricing.\nDoe, A. (2021). Costs.",
+    ])
+    cleaned, report = preprocess_markdown(text)
+
+    assert "Methods" not in cleaned and "Smith" not in cleaned
+    assert "The study looks at pricing." in cleaned
+    assert report.removed["toc_lines"] == 4
+    assert report.removed["reference_lines"] == 3
+
+
+def test_bold_references_heading_keeps_the_following_sections():
+    text = PAGE_SEPARATOR.join([
+        "## Introduction\n\nThe study looks at pricing.\n\n**References**\n\n"
+        "[1] Smith, J. Pricing. 2020.\n2. Doe, A. (2021). Costs.\nRoe B, Poe C. Margins. 2019;4:1-9.\n\n"
+        "**Appendix**\n\nThe appendix lists regional sales.",
+        "## Outlook\n\nSales will grow next year in every region.",
+    ])
+    cleaned, report = preprocess_markdown(text)
+
+    assert "Smith" not in cleaned and "Roe B" not in cleaned
+    assert "The appendix lists regional sales." in cleaned
+    assert "Sales will grow next year in every region." in cleaned
+    assert report.removed["reference_lines"] == 4
+
+
+def test_references_end_at_the_page_separator():
+    text = PAGE_SEPARATOR.join([
+        "Body text.\n\nReferences\n\n[1] Smith, J. Pricing. 2020.",
+        "Costs fell in the second half of the year.",
+    ])
+    cleaned, _ = preprocess_markdown(text)
+
+    assert "Smith" not in cleaned
+    assert "Costs fell in the second half of the year." in cleaned
@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+from PIL import Image
+from pptx import Presentation
+
+from fake_llm import make_slides
+from renderers import RENDERERS, get_renderer, render_slides
+from slides import Deck
+
+SLIDES = make_slides(4, table_rows=3, table_cols=3)
+
+
+def test_deck_round_trips_slide_json():
+    title_slide, *slides = Deck.from_dicts(SLIDES).to_dicts()
+
+    assert title_slide["title_text"] == SLIDES[0]["title_text"]
+    assert slides == SLIDES[1:]
+
+
+def test_pptx_renderer():
+    prs = Presentation(io.BytesIO(render_slides(SLIDES, "pptx")))
+
+    assert len(prs.slides) == len(SLIDES)
+    assert any(shape.has_table for slide in prs.slides for shape in slide.shapes)
+
+
+def test_html_renderer(tmp_path):
+    image = tmp_path / "chart.png"
+    Image.new("RGB", (1200, 800), "white").save(image)
+    content = SLIDES + [{"title_text": "Figure & <notes>", "img_path": [str(image)]}]
+
+    html = render_slides(content, "html").decode("utf-8")
+
+    assert html.count("<section>") == len(content)
+    assert "Figure &amp; &lt;notes&gt;" in html
+    assert "data:image/png;base64," in html
+    assert "<table>" in html
+    assert "reveal.js" not in render_slides(content, "html", reveal=False, embed_images=False).decode("utf-8")
+
+
+def test_marp_renderer():
+    markdown = render_slides(SLIDES, "marp").decode("utf-8")
+
+    assert markdown.startswith("---\nmarp: true")
+    # The end of the front matter and a separator before each content slide
+    assert markdown.count("\n---\n") == len(SLIDES)
+    assert f"## {SLIDES[1]['title_text']}" in markdown
+    assert "|---|---|---|" in markdown
+
+
+def test_json_renderer():
+    assert json.loads(render_slides(SLIDES, "json")) == Deck.from_dicts(SLIDES).to_dicts()
+
+
+@pytest.mark.parametrize("name", sorted(RENDERERS))
+def test_save_uses_the_format_extension(name, tmp_path):
+    renderer = get_renderer(name)
+    path = renderer.save(Deck.from_dicts(SLIDES), str(tmp_path))
+
+    assert path.endswith(renderer.extension)
+    assert path.startswith(str(tmp_path))
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="Unknown output format"):
+        get_renderer("docx")
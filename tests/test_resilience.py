@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from fake_llm import FakeModel
+from gemini import KeyLimiter
+from resilience import CircuitBreaker, ModelError, ModelTimeoutError, ResilientCaller, RetryPolicy
+
+
+def test_abandoned_half_open_stream_closes_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    model = FakeModel(resilience=ResilientCaller(breaker=breaker), chunk_size=8)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+
+    stream = model.stream("prompt")
+    next(stream)
+    stream.close()
+
+    assert breaker.state == "closed"
+    assert model.execute("prompt").content
+
+
+def test_stream_retries_transient_errors_before_the_first_chunk():
+    model = FakeModel(fail_first=1, resilience=ResilientCaller(retry=RetryPolicy(base_delay=0)))
+    assert "".join(model.stream("prompt")) == model.response
+    assert model.calls == 2
+
+
+def test_non_transient_errors_do_not_open_the_circuit():
+    caller = ResilientCaller(breaker=CircuitBreaker(failure_threshold=2))
+
+    def rejected():
+        raise ValueError("400 Bad request")
+
+    for _ in range(3):
+        with pytest.raises(ModelError):
+            caller.call(rejected)
+    assert caller.breaker.state == "closed"
+
+
+def test_timed_out_attempt_releases_its_limiter_slot():
+    limiter = KeyLimiter(max_concurrency=1)
+    caller = ResilientCaller(retry=RetryPolicy(max_attempts=1), timeout=0.05)
+    with pytest.raises(ModelTimeoutError):
+        caller.call(time.sleep, 0.5, limiter=limiter)
+    assert limiter._semaphore.acquire(blocking=False)
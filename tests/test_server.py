@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from fake_llm import register_fake_model
+from genslides.server import Job, JobQueue, QueueFullError, make_server
+
+TEXT = "\n\n".join(f"## Section {i}\n\n" + f"Findings about topic {i}. " * 20 for i in range(4))
+
+
+@pytest.fixture
+def server():
+    register_fake_model("test_server", n_slides=3)
+    jobs = JobQueue(workers=1, queue_size=4, model_name="test_server")
+    httpd = make_server("127.0.0.1", 0, jobs)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+    jobs.shutdown()
+
+
+def request(url, method="GET", data=None, content_type="application/json"):
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def wait_for(url, job_id):
+    for _ in range(200):
+        status, _, body = request(f"{url}/jobs/{job_id}")
+        job = json.loads(body)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_submit_poll_and_fetch_the_result(server):
+    body = json.dumps({"text": TEXT, "agenda": "Findings", "output_format": "json"}).encode()
+    status, headers, submitted = request(f"{server}/jobs", "POST", body)
+    job_id = json.loads(submitted)["id"]
+
+    assert status == 202
+    assert headers["Location"] == f"/jobs/{job_id}"
+    assert wait_for(server, job_id)["status"] == "done"
+
+    status, headers, result = request(f"{server}/jobs/{job_id}/result")
+    assert status == 200
+    assert headers["Content-Type"] == "application/json"
+    assert len(json.loads(result)) == 1 + 3
+
+    assert request(f"{server}/jobs/{job_id}", "DELETE")[0] == 204
+    assert request(f"{server}/jobs/{job_id}")[0] == 404
+
+
+def test_submit_a_pdf_with_query_options(server):
+    import fitz  # PyMuPDF
+
+    document = fitz.open()
+    for number in range(2):
+        document.new_page().insert_text((72, 72), f"Findings of page {number + 1}")
+    status, _, submitted = request(f"{server}/jobs?pages=1-2&figures=no&output_format=marp", "POST",
+                                   document.tobytes(), "application/pdf")
+    job_id = json.loads(submitted)["id"]
+
+    assert status == 202
+    assert wait_for(server, job_id)["status"] == "done"
+    status, headers, result = request(f"{server}/jobs/{job_id}/result")
+    assert status == 200
+    assert headers["Content-Disposition"].endswith('.md"')
+    assert result.startswith(b"---\nmarp: true")
+
+
+@pytest.mark.parametrize("options,message", [
+    ({"agenda": "Findings"}, '"text" field'),
+    ({"text": TEXT, "mode": "fast"}, "Unknown mode"),
+    ({"text": TEXT, "max_pages": "many"}, "Invalid value of max_pages"),
+    ({"text": TEXT, "output_format": "docx"}, "Unknown output format"),
+])
+def test_submit_rejects_invalid_options(server, options, message):
+    status, _, body = request(f"{server}/jobs", "POST", json.dumps(options).encode())
+
+    assert status == 400
+    assert message in json.loads(body)["error"]
+
+
+def test_failed_jobs_have_no_result(server):
+    register_fake_model("test_server_error", response="Sorry, I cannot help with that.")
+    body = json.dumps({"text": TEXT, "model_name": "test_server_error"}).encode()
+    job_id = json.loads(request(f"{server}/jobs", "POST", body)[2])["id"]
+
+    job = wait_for(server, job_id)
+    assert job["status"] == "failed"
+    assert job["error"]
+    assert request(f"{server}/jobs/{job_id}/result")[0] == 409
+
+
+def test_healthz_and_metrics(server):
+    job_id = json.loads(request(f"{server}/jobs", "POST", json.dumps({"text": TEXT}).encode())[2])["id"]
+    wait_for(server, job_id)
+
+    status, _, health = request(f"{server}/healthz")
+    assert status == 200
+    assert json.loads(health)["workers"] == 1
+
+    status, headers, metrics = request(f"{server}/metrics")
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/plain")
+    assert 'genslides_stage_seconds_count{stage="llm"}' in metrics.decode()
+
+
+def test_full_queue_refuses_jobs():
+    jobs = JobQueue(workers=0, queue_size=1)
+    jobs.submit(Job({}, text=TEXT))
+
+    with pytest.raises(QueueFullError):
+        jobs.submit(Job({}, text=TEXT))
+    assert jobs.stats()["queued"] == 1
@@ -0,0 +1,34 @@
+from tracing import Span, Tracer, prometheus_text
+
+
+def make_span(name: str, duration: float) -> Span:
+    span = Span(name)
+    span.duration = duration
+    return span
+
+
+def test_long_lived_tracer_keeps_recent_spans_and_all_aggregates():
+    root = Tracer(max_spans=3)
+    for run in range(10):
+        tracer = Tracer(parent=root)
+        tracer.record(make_span("llm", run / 10))
+        tracer.count("tokens", 5)
+        assert len(tracer.spans) == 1
+
+    assert [span.duration for span in root.spans] == [0.7, 0.8, 0.9]
+    summary = root.summary()
+    assert summary["stages"]["llm"]["count"] == 10
+    assert summary["stages"]["llm"]["max_s"] == 0.9
+    assert abs(summary["stages"]["llm"]["total_s"] - 4.5) < 1e-9
+    assert summary["counters"] == {"tokens": 50}
+
+
+def test_prometheus_text():
+    tracer = Tracer()
+    with tracer.span("render"):
+        pass
+    tracer.count("cache_hits", 2)
+    text = prometheus_text(tracer)
+
+    assert 'genslides_stage_seconds_count{stage="render"} 1' in text
+    assert "genslides_cache_hits_total 2" in text
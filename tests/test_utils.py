@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from utils import PageRangeError, parse_page_ranges
+
+
+def reference_pages(page_string: str, num_pages: int, max_pages: int):
+    """
+    Select pages by enumerating every page of every item, the obvious and slow way.
+    """
+    selected = set()
+    for item in page_string.split(","):
+        item, _, step = item.partition(":")
+        step = int(step or 1)
+        first, dash, last = item.partition("-")
+        if not dash:
+            selected.add(int(first) - 1)
+        elif not first:
+            selected.update(range(max(0, num_pages - int(last)), num_pages, step))
+        else:
+            selected.update(range(int(first) - 1, int(last) if last else num_pages, step))
+    return sorted(page for page in selected if page < num_pages)[:max_pages]
+
+
+def random_spec(rnd: random.Random, num_pages: int) -> str:
+    items = []
+    for _ in range(rnd.randint(1, 6)):
+        first = rnd.randint(1, num_pages + 10)
+        last = first + rnd.randint(0, num_pages // 2)
+        step = f":{rnd.randint(1, 5)}" if rnd.random() < 0.3 else ""
+        items.append(rnd.choice([f"{first}", f"{first}-{last}{step}", f"{first}-{step}",
+                                 f"-{rnd.randint(1, num_pages)}{step}"]))
+    return ",".join(items)
+
+
+def test_parse_page_ranges_matches_the_reference():
+    rnd = random.Random(0)
+    for _ in range(2000):
+        num_pages = rnd.randint(1, 120)
+        max_pages = rnd.randint(1, 40)
+        spec = random_spec(rnd, num_pages)
+        expected = reference_pages(spec, num_pages, max_pages)
+        if expected:
+            assert parse_page_ranges(spec, num_pages, max_pages) == expected, spec
+        else:
+            with pytest.raises(PageRangeError):
+                parse_page_ranges(spec, num_pages, max_pages)
+
+
+@pytest.mark.parametrize("spec,expected", [
+    ("", [0, 1, 2, 3, 4]),
+    ("3, 1-2", [0, 1, 2]),
+    ("5-100", [4, 5, 6, 7, 8, 9]),
+    ("8-", [7, 8, 9]),
+    ("-2", [8, 9]),
+    ("1-10:3", [0, 3, 6, 9]),
+])
+def test_parse_page_ranges(spec, expected):
+    assert parse_page_ranges(spec, 10, 5 if not spec else 20) == expected
+
+
+@pytest.mark.parametrize("spec,message", [
+    ("a-3", "Invalid page range 'a-3'"),
+    ("0-3", "numbered from 1"),
+    ("3:2", "a step needs a range"),
+    ("1-5:0", "a step needs a range"),
+    ("5-2", "the first page is after the last"),
+    ("20-30", "selects no pages of the 10-page document"),
+])
+def test_parse_page_ranges_errors(spec, message):
+    with pytest.raises(PageRangeError, match=message):
+        parse_page_ranges(spec, 10, 20)
+
+
+def test_parse_page_ranges_checks_max_pages():
+    with pytest.raises(TypeError):
+        parse_page_ranges("1-3", 10, "5")
+    with pytest.raises(ValueError):
+        parse_page_ranges("1-3", 10, 0)
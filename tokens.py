@@ -0,0 +1,106 @@
+import re
+import threading
+from typing import Any, Dict, Optional
+
+# Words, numbers and single punctuation marks, roughly what a subword
+# tokenizer splits on before merging pieces.
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+# Average number of characters per token of a word for Gemini-style tokenizers
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without calling the model API.
+
+    Every punctuation mark counts as one token and every word as one token per
+    started four characters, which is close to the Gemini tokenizer for English prose.
+
+    Args:
+        text (str): The text to estimate.
+
+    Returns:
+        int: The estimated token count.
+    """
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        tokens += -(-len(piece) // _CHARS_PER_TOKEN)
+    return tokens
+
+
+class TokenUsage:
+    """
+    Token counts of a single model call.
+
+    Args:
+        prompt_tokens: Number of tokens in the prompt.
+        output_tokens: Number of tokens in the generated text.
+        total_tokens: Total number of billed tokens. Defaults to prompt plus output tokens.
+        source: Where the counts come from: "api" for usage metadata reported by the
+            model, "estimate" for the local estimator, "cache" for cached responses.
+    """
+
+    __slots__ = ("prompt_tokens", "output_tokens", "total_tokens", "source")
+
+    def __init__(self, prompt_tokens: int = 0, output_tokens: int = 0, total_tokens: Optional[int] = None, source: str = "api"):
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.total_tokens = prompt_tokens + output_tokens if total_tokens is None else total_tokens
+        self.source = source
+
+    @classmethod
+    def estimate(cls, prompt: str, output: str) -> "TokenUsage":
+        """
+        Build token counts from the local estimator.
+        """
+        return cls(estimate_tokens(prompt), estimate_tokens(output), source="estimate")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"TokenUsage({self.as_dict()})"
+
+
+class UsageMetrics:
+    """
+    Thread-safe running totals of the token usage of a model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cache_hits = 0
+        self.estimated_calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.total_tokens = 0
+
+    def record(self, usage: TokenUsage) -> None:
+        """
+        Add the counts of a model call to the totals.
+
+        Args:
+            usage (TokenUsage): The counts of the call.
+        """
+        with self._lock:
+            self.calls += 1
+            if usage.source == "cache":
+                self.cache_hits += 1
+            elif usage.source == "estimate":
+                self.estimated_calls += 1
+            self.prompt_tokens += usage.prompt_tokens
+            self.output_tokens += usage.output_tokens
+            self.total_tokens += usage.total_tokens
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "estimated_calls": self.estimated_calls,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "total_tokens": self.total_tokens,
+            }
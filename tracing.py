@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# Recent spans kept by the process-wide tracer, its stage aggregates cover all spans
+RECENT_SPANS = 1000
+
+
+class Span:
+    """
+    A timed stage of the pipeline.
+
+    Args:
+        name: The stage name, e.g. "extract" or "llm".
+        attrs: Attributes of the stage, e.g. the number of pages or tokens.
+    """
+
+    __slots__ = ("name", "attrs", "start", "duration")
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.time()
+        self.duration = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "start": self.start, "duration_s": self.duration, **self.attrs}
+
+
+class JsonLinesExporter:
+    """
+    Append every finished span to a file as one JSON object per line.
+
+    Args:
+        path: The file to append to.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.as_dict(), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+class Tracer:
+    """
+    Records spans and counters of the pipeline.
+
+    Spans time the stages (extraction, prompt build, LLM call, parsing, rendering),
+    counters track totals such as tokens, cache hits and retries. A tracer can
+    forward everything it records to a parent, so a per-run tracer can feed the
+    process-wide one. The count, total and maximum duration of each stage are
+    aggregated as spans are recorded, so a long-lived tracer only needs to keep
+    the most recent spans.
+
+    Args:
+        parent: Tracer to forward spans and counters to.
+        exporters: Objects with an export(span) method, called for every finished span.
+        max_spans: Number of recent spans kept in spans, None to keep all of them.
+    """
+
+    def __init__(self, parent: Optional["Tracer"] = None, exporters: Optional[List[Any]] = None,
+                 max_spans: Optional[int] = None):
+        self.parent = parent
+        self.exporters = exporters or []
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        """
+        Time a block of code as a span.
+
+        Args:
+            name (str): The stage name.
+            **attrs: Initial attributes, more can be set on the yielded span.
+
+        Yields:
+            Span: The running span.
+        """
+        span = Span(name, attrs)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            self.record(span)
+
+    def record(self, span: Span) -> None:
+        """
+        Store a finished span and pass it to the exporters and the parent.
+        """
+        with self._lock:
+            self.spans.append(span)
+            stage = self.stages.setdefault(span.name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stage["count"] += 1
+            stage["total_s"] += span.duration
+            stage["max_s"] = max(stage["max_s"], span.duration)
+        for exporter in self.exporters:
+            exporter.export(span)
+        if self.parent is not None:
+            self.parent.record(span)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """
+        Add a value to a counter.
+
+        Args:
+            name (str): The counter name, e.g. "cache_hits".
+            value (float): The amount to add.
+        """
+        if not value:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.parent is not None:
+            self.parent.count(name, value)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Return the aggregates of all recorded spans per stage and the counters.
+
+        Returns:
+            Dict[str, Any]: "stages" maps each stage to its count, total and maximum
+                duration in seconds, "counters" holds the counters.
+        """
+        with self._lock:
+            return {"stages": {name: dict(stage) for name, stage in self.stages.items()},
+                    "counters": dict(self.counters)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.stages.clear()
+            self.counters.clear()
+
+
+def prometheus_text(tracer: Tracer, prefix: str = "genslides") -> str:
+    """
+    Render the summary of a tracer in the Prometheus text exposition format.
+
+    Args:
+        tracer (Tracer): The tracer to export.
+        prefix (str): Prefix of the metric names.
+
+    Returns:
+        str: The metrics, one sample per line.
+    """
+    summary = tracer.summary()
+    lines = [f"# TYPE {prefix}_stage_seconds summary"]
+    for name, stage in sorted(summary["stages"].items()):
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stage["total_s"]:.6f}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+    for name, value in sorted(summary["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+_default_tracer: Optional[Tracer] = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Return the process-wide tracer, creating it on first use.
+
+    It keeps the RECENT_SPANS most recent spans. If the GENSLIDES_TRACE_FILE
+    environment variable is set, every span is also appended to that file as a
+    JSON line.
+
+    Returns:
+        Tracer: The shared tracer.
+    """
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            trace_file = os.getenv("GENSLIDES_TRACE_FILE")
+            _default_tracer = Tracer(exporters=[JsonLinesExporter(trace_file)] if trace_file else [],
+                                     max_spans=RECENT_SPANS)
+        return _default_tracer
@@ -1,75 +1,207 @@
-from typing import List, Union
+import heapq
+import re
+from itertools import islice
+from typing import Iterator, List
 
-def parse_page_ranges(page_string: str, num_pages:int, max_pages: int) -> List[int]:
+# pymupdf4llm.to_markdown separates pages with a horizontal rule
+PAGE_SEPARATOR_RE = re.compile(r"\n-{5,}\n")
+HEADING_RE = re.compile(r"(?m)^(?=#{1,6}\s)")
+
+class PageRangeError(ValueError):
+    """
+    A page range string is malformed or selects no pages of the document.
+    """
+
+
+# One item of a page range: "5", "2-8", "5-" (to the end), "-3" (the last three), each range with an optional ":step"
+_PAGE_ITEM_RE = re.compile(r"(\d+)?(-)?(\d+)?(?::(\d+))?")
+
+
+def parse_page_spec(page_string: str) -> List[slice]:
     """
-    Parse a string of page ranges and return a list of valid page numbers.
+    Parse a page range string into slices of the list of pages of a document.
+
+    Pages are numbered from 1. Items are separated by commas:
+
+    - "5": page 5.
+    - "2-8": pages 2 to 8.
+    - "5-": page 5 to the last page.
+    - "-3": the last three pages.
+    - "1-20:2", "10-:5", "-10:2": any range with a step, here every second page.
+
+    The string is only checked for syntax, so it can be validated before the
+    document is opened, e.g. when a job is submitted.
 
     Args:
-        page_string (str): A string containing page ranges (e.g., "1-3,5,7-9").
-        max_pages (int): The maximum number of pages allowed.
+        page_string (str): The page ranges, e.g. "1-3,5,7-".
 
     Returns:
-        List[int]: A sorted list of unique, valid page numbers.
+        List[slice]: One slice per item, in Python slice semantics over the 0-based pages.
+
+    Raises:
+        PageRangeError: If an item is malformed, a page is 0, a range is reversed or a step is 0.
+    """
+    if not isinstance(page_string, str):
+        raise TypeError("page_string must be a string")
+
+    spec = []
+    for item in "".join(page_string.split()).split(","):
+        if not item:
+            continue
+        if item.isdecimal() and int(item):
+            spec.append(slice(int(item) - 1, int(item)))
+            continue
+        match = _PAGE_ITEM_RE.fullmatch(item)
+        if match is None or not (match.group(1) or match.group(3)):
+            raise PageRangeError(f"Invalid page range '{item}'. Use pages and ranges like 5, 2-8, 5-, -3 or 1-20:2.")
+        first, dash, last, step = match.groups()
+        first, last, step = (int(group) if group else None for group in (first, last, step))
+        if first == 0 or last == 0:
+            raise PageRangeError(f"Invalid page range '{item}': pages are numbered from 1.")
+        if step is not None and (dash is None or step == 0):
+            raise PageRangeError(f"Invalid page range '{item}': a step needs a range and must be at least 1.")
+        if dash is None:
+            spec.append(slice(first - 1, first))
+        elif first is None:
+            spec.append(slice(-last, None, step))
+        elif last is None:
+            spec.append(slice(first - 1, None, step))
+        elif first > last:
+            raise PageRangeError(f"Invalid page range '{item}': the first page is after the last.")
+        else:
+            spec.append(slice(first - 1, last, step))
+    return spec
+
+
+def iter_pages(ranges: List[range]) -> Iterator[int]:
+    """
+    Yield the pages of a list of ranges in ascending order, each once.
+
+    Overlapping and adjacent ranges without a step are merged first, stepped
+    ranges are then merged in lazily, so only the pages that are consumed are
+    generated.
+
+    Args:
+        ranges (List[range]): Ascending ranges of 0-based pages.
+
+    Yields:
+        int: The pages.
+    """
+    merged: List[range] = []
+    stepped = []
+    for pages in sorted((pages for pages in ranges if pages), key=lambda pages: pages.start):
+        if pages.step != 1:
+            stepped.append(pages)
+        elif merged and pages.start <= merged[-1].stop:
+            merged[-1] = range(merged[-1].start, max(merged[-1].stop, pages.stop))
+        else:
+            merged.append(pages)
+
+    if not stepped:
+        # Disjoint and sorted, so no merge is needed
+        for pages in merged:
+            yield from pages
+        return
+    previous = -1
+    for page in heapq.merge(*merged, *stepped):
+        if page != previous:
+            yield page
+            previous = page
+
+
+def parse_page_ranges(page_string: str, num_pages: int, max_pages: int) -> List[int]:
+    """
+    Parse a string of page ranges and return the selected pages of a document.
+
+    See parse_page_spec for the syntax. Ranges are clamped to the document,
+    e.g. "5-100" of a 20-page document selects pages 5 to 20. Work and memory
+    depend on the number of ranges and max_pages, not on the size of the ranges.
+
+    Args:
+        page_string (str): Page ranges, e.g. "1-3,5,7-". An empty string selects all pages.
+        num_pages (int): Number of pages of the document.
+        max_pages (int): Maximum number of pages to return. The first pages of the
+            selection in document order are kept.
+
+    Returns:
+        List[int]: Sorted unique 0-based page indices.
 
     Raises:
         TypeError: If page_string is not a string or max_pages is not an integer.
-        ValueError: If max_pages is not positive or if the input string is invalid.
+        ValueError: If max_pages is not positive.
+        PageRangeError: If the string is malformed or selects no page of the document.
+    """
+    if not isinstance(max_pages, int):
+        raise TypeError("max_pages must be an integer")
+    if max_pages <= 0:
+        raise ValueError("max_pages must be a positive integer")
+
+    spec = parse_page_spec(page_string)
+    if not spec:
+        return list(range(min(max_pages, num_pages)))
+
+    # Slicing a range clamps it to the document in constant time
+    document = range(num_pages)
+    pages = list(islice(iter_pages([document[item] for item in spec]), max_pages))
+    if not pages:
+        raise PageRangeError(f"Page range '{page_string}' selects no pages of the {num_pages}-page document.")
+    return pages
+
+
+def split_sections(text: str) -> List[str]:
+    """
+    Split markdown text into sections at page boundaries and headings.
+
+    Args:
+        text (str): Markdown text, e.g. the output of pymupdf4llm.to_markdown.
+
+    Returns:
+        List[str]: Non-empty sections in document order.
+    """
+    sections = []
+    for page in PAGE_SEPARATOR_RE.split(text):
+        for section in HEADING_RE.split(page):
+            if section.strip():
+                sections.append(section.strip())
+    return sections
+
+
+def chunk_markdown(text: str, max_chars: int) -> List[str]:
     """
+    Pack the sections of a markdown text into chunks of at most max_chars.
+
+    Sections longer than max_chars are split on paragraph breaks first and,
+    if a single paragraph is still too long, on a hard character boundary.
+
+    Args:
+        text (str): Markdown text to split.
+        max_chars (int): Maximum number of characters per chunk.
+
+    Returns:
+        List[str]: Chunks in document order.
+
+    Raises:
+        ValueError: If max_chars is not positive.
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be a positive integer")
+
+    pieces = []
+    for section in split_sections(text):
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        for paragraph in section.split("\n\n"):
+            for start in range(0, len(paragraph), max_chars):
+                pieces.append(paragraph[start:start + max_chars])
 
-    def validate_and_parse_range(range_str: str) -> List[int]:
-        """
-        Validate and parse a single range string.
-
-        Args:
-            range_str (str): A string representing a single range (e.g., "1-3" or "5").
-
-        Returns:
-            List[int]: A list of page numbers in the range.
-
-        Raises:
-            ValueError: If the range string is invalid.
-        """
-        try:
-            if '-' in range_str:
-                start, end = map(int, range_str.split('-'))
-                if start > end:
-                    raise ValueError(f"Invalid range: {range_str}")
-                
-                return list(range(max(0, start), end+1))
-            else:
-                page = int(range_str)
-                
-                return [page]
-        except ValueError as e:
-            raise ValueError(f"Invalid input: {range_str}") from e
-
-    try:
-        # Input validation
-        if not isinstance(page_string, str):
-            raise TypeError("page_string must be a string")
-        
-        if not isinstance(max_pages, int):
-            raise TypeError("max_pages must be an integer")
-        
-        if max_pages <= 0:
-            raise ValueError("max_pages must be a positive integer")
-
-        # Remove whitespace and split into individual ranges
-        page_ranges = page_string.replace(' ', '').split(',')
-        result = []
-
-        for page_range in page_ranges:
-            pages = validate_and_parse_range(page_range)
-            
-            for page in pages:
-                if page not in result and page>=0 and page <= num_pages:
-                    result.append(page-1)
-
-        # If no valid pages were found, return the default range
-        return sorted(result[:max_pages]) if result else list(range(0, min(max_pages, num_pages)))
-
-    except (TypeError, ValueError) as e:
-        # Log the error (you might want to use a proper logging system here)
-        print(f"Error parsing page ranges: {str(e)}")
-        # Return default list in case of any exception
-        return list(range(0, min(num_pages,max_pages)))
\ No newline at end of file
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks